@@ -3,13 +3,98 @@
 # 11/15/2016
 
 '''module that contains classes and functions to run a game'''
-from random import randint
+from rng import get_dice
+from diceexpr import hardcore_stats, four_d6_stats
 from character import *
 from monster import *
 from items import *
 
-def combat(one, two):
-    ''' runs combat between two Characters, named one and two'''
+class CombatResult(object):
+    ''' summary of a single fight, as returned by combat()
+
+        winner and loser are set when somebody dies, fled is set when
+        somebody runs away.  If the fight was cut off by maxRounds, all
+        three are None.  oneDamage and twoDamage are the hit points each
+        side actually took off the other.'''
+    def __init__(self, one, two):
+        self.one = one
+        self.two = two
+        self.rounds = 0
+        self.winner = None
+        self.loser = None
+        self.fled = None
+        self.oneDamage = 0
+        self.twoDamage = 0
+
+    @property
+    def isDraw(self):
+        ''' True if nobody died or fled before the round limit '''
+        return self.winner is None and self.fled is None
+
+def publisher(output = print, events = None):
+    ''' a publish(event) function that hands every CombatEvent to events,
+        an EventStream, and its text to output; either can be None '''
+    def publish(event):
+        if events:
+            events.emit(event)
+        if output:
+            output(str(event))
+    return publish
+
+def resolve_action(current, target, choice):
+    ''' carry out one combatant's choice: "f" flees, "h" drinks a potion
+        and anything else attacks target
+
+        this is the one place the rules for a turn live; combat(),
+        acombat() and encounter() all come here.  Returns the action's
+        CombatEvent, the hit points target lost, and a DEATH event if that
+        killed it (None if not).'''
+    if choice == "f":
+        success, message = current.flee()
+        return message, 0, None
+    if choice == "h":
+        success, message = current.heal()
+        return message, 0, None
+    healthBefore = target.health
+    success, message = current.attack(target)
+    death = None
+    if target.health <= 0:
+        death = CombatEvent(DEATH, target, current)
+    return message, healthBefore - target.health, death
+
+def score_action(result, current, target, message, damage, death):
+    ''' count one action in a CombatResult; True if it ended the fight
+
+        used by combat() and acombat() as they go, and by replays as they
+        play back.'''
+    if message.kind == FLEE:
+        result.fled = current
+        return True
+    if current is result.one:
+        result.oneDamage += damage
+    else:
+        result.twoDamage += damage
+    if death:
+        result.winner = current
+        result.loser = target
+        return True
+    return False
+
+def combat(one, two, output = print, chooser = None, maxRounds = None,
+           dice = None, events = None):
+    ''' runs combat between two Characters, named one and two
+
+        output is called with the text of every message; pass None to fight
+        silently.  events, an EventStream, is handed every CombatEvent as it
+        happens, unformatted.
+        chooser, if given, is called with the active Character and returns
+        its choice, instead of asking its combat_choice().  maxRounds stops
+        a fight that drags on too long.  dice are used for initiative; the
+        characters roll everything else with their own dice.  Returns a
+        CombatResult.'''
+
+    result = CombatResult(one, two)
+    publish = publisher(output, events)
 
     def take_action(current, target, choice):
         '''handle the current active character's choice
@@ -17,47 +102,47 @@ def combat(one, two):
             current is the one doing the action, choice is the chosen action,
             target is the opponent who could be attacked. The function returns
             a Boolean, which indicates whether to end the combat loop.'''
-        
-        isOver = False
-        
-        if choice == "f":
-            isOver, message = current.flee() #Fleeing ends combat
-            
-        elif choice == "h":
-            success, message = current.heal() #This has no effect on the loop
-            
-        else:
-            success, message = current.attack(target)
-            if target.health <= 0:  #combat ends if the enemy dies
-                isOver = True
-                message += "\n" + target.name + " is Dead!"
-
-        print(message)
-
-        return isOver
+        message, damage, death = resolve_action(current, target, choice)
+        publish(message)
+        if death:
+            publish(death)
+        return score_action(result, current, target, message, damage, death)
         #end of internal function
+
+    def get_choice(current):
+        '''ask the chooser, or the character itself, what to do'''
+        if chooser:
+            return chooser(current)
+        return current.combat_choice()
     
     ''' combat function begins here'''    
+    randint = get_dice(dice).randint
     combatIsOver = False
     rounds = 0
     while not combatIsOver:
+        if maxRounds and rounds >= maxRounds:
+            break
         rounds +=1
-        print("\nRound", rounds, "begins...")
+        result.rounds = rounds
+        if output or events:
+            publish(CombatEvent(ROUND, amount = rounds))
         # 'Init' is short for 'Initiative', got tired of typos - TMS
         oneInit = randint(1, 20) + one.speed
         twoInit = randint(1, 20) + two.speed
         if oneInit >= twoInit:
-            combatIsOver = take_action(one, two, one.combat_choice())
+            combatIsOver = take_action(one, two, get_choice(one))
             if combatIsOver:
                 continue # go directly to beginning of loop
-            combatIsOver = take_action(two, one, two.combat_choice())
+            combatIsOver = take_action(two, one, get_choice(two))
         else:
-            combatIsOver = take_action(two, one, two.combat_choice())
+            combatIsOver = take_action(two, one, get_choice(two))
             if combatIsOver:
                 continue # go directly to beginning of loop
-            combatIsOver = take_action(one, two, one.combat_choice())
+            combatIsOver = take_action(one, two, get_choice(one))
+
+    return result
 
-def create_player():
+def create_player(dice = None):
     '''  generate a character based on user input
 
         This function contains several local functions, each using a different
@@ -78,7 +163,10 @@ def create_player():
                 in each set, the top three dice are kept and added together.
                 Then these scores are assigned by the user. This method usually
                 has the highest satisfaction for the player, but is also the
-                most complicated, due to the many choices required.'''
+                most complicated, due to the many choices required.
+        All of the rolls are made with the given dice, or the shared ones.'''
+
+    randint = get_dice(dice).randint
 
     def simple():
         return Character()
@@ -93,23 +181,13 @@ def create_player():
                 scores. This method is the easiest, but usually has the least
                 satisfaction for the user.'''
 
-        valid = False
-        while not valid:
-
-            gStrength = randint(3,18)
-            gDexterity = randint(3,18)
-            gConstitution = randint(3,18)
-            gIntelligence = randint(3,18)
-            gWisdom = randint(3,18)
-            gCharisma = randint(3,18)
-            if gStrength > 11 or gDexterity > 11 or\
-               gConstitution > 11 or gIntelligence > 11 or\
-               gWisdom > 11 or gCharisma > 11:
-                valid = True
+        # drawn straight from the rerolled-until-valid odds, see diceexpr
+        gStrength, gDexterity, gConstitution, gIntelligence, gWisdom, \
+                   gCharisma = hardcore_stats(dice)
         gName = input("What is your character's name?: ")
         gPotionCount = 0
-        gWeapon = Weapon(name = "Stick", base = 3, bonus = 0)
-        gArmor = Armor(name = "Loincloth", base = 0, bonus = 0)
+        gWeapon = Weapon.shared(name = "Stick", base = 3, bonus = 0)
+        gArmor = Armor.shared(name = "Loincloth", base = 0, bonus = 0)
         gHealth = randint(1,8)
         if gConstitution > 12:
             gHealth += 1
@@ -130,13 +208,7 @@ def create_player():
             most complicated, due to the many choices required.
 '''
         #generate the scores
-        daScores = []
-        for i in range(6):
-            rolls = []
-            for j in range(4):
-                rolls.append(randint(1,6))
-            rolls.remove(min(rolls))
-            daScores.append(sum(rolls))
+        daScores = four_d6_stats(0, dice)
         #choose strength
         valid = False
         while not valid:
@@ -199,8 +271,8 @@ def create_player():
         #name, potions, weapon, armor, and health
         inputName = input("What is your character's name?: ")
         inputPotionCount = randint(1,4)
-        inputWeapon = Weapon(name = "Longsword", base = 8, bonus = 0)
-        inputArmor = Armor(name = "Leather", base = 3, bonus = 0)
+        inputWeapon = Weapon.shared(name = "Longsword", base = 8, bonus = 0)
+        inputArmor = Armor.shared(name = "Leather", base = 3, bonus = 0)
         inputHealth = randint(1,8)
         if inputCon > 12:
             inputHealth += 1
@@ -4,10 +4,35 @@
 
 ''' GUI-based character generator'''
 
+import time
+LAUNCHED = time.perf_counter()
+import os
+import sys
 import tkinter as tk
 import character as ch
-import monster as mon
-from random import randint
+import rng
+import events
+import assets
+# diceexpr, logview, gameloop, world, chunkstore and savegame are imported
+# where they're first needed, so none of them hold up the menu
+
+STARTED = time.perf_counter()
+# run with --timing to print how long startup took
+TIMING = "--timing" in sys.argv
+
+# the pages worth building early while each page is showing
+NEXT_PAGES = {"Menu": ("Simple", "Hardcore", "FourD6"),
+              "Hardcore": ("Travel",),
+              "Simple": ("Travel",),
+              "FourD6": ("Travel",),
+              "Help": ("Simple", "Hardcore", "FourD6")}
+
+# the explored world is kept in here between runs
+WORLD_FILE = os.path.join(assets.ASSET_DIR, "world.chunks")
+# and the player in here
+SAVE_FILE = os.path.join(assets.ASSET_DIR, "game.save")
+# how often the game saves itself while traveling, in game loop ticks
+AUTOSAVE_TICKS = 100
 
 TITLE_FONT = ("Helvetica", 22, "bold")
 CHAR_HELP_STR_TITLE = 'generate a character based on user input'
@@ -17,13 +42,19 @@ CHAR_HELP_STR_FOURD6 = '4d6, keep best three, arrange to suit - 6 sets of 4d6 ar
 
 class RootApp(tk.Tk):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, prebuild = True, **kwargs):
         tk.Tk.__init__(self, *args, **kwargs)
         ''' Custom Window class for Game
 
         Data Model - Character object
         referenced in frames by using:
-            self.controller.player'''
+            self.controller.player
+
+        Pages are built the first time they're shown.  With prebuild on,
+        the pages a player is likely to go to next (NEXT_PAGES) are built
+        whenever Tk is idle.  The world, the saves and the game loop are
+        only set up (start_world) once Travel is built, so the menu comes
+        up without waiting for any of them.'''
 
         # the container is where we'll stack a bunch of frames
         # on top of each other, then the one we want visible
@@ -44,21 +75,107 @@ class RootApp(tk.Tk):
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
 
-        self.player = ch.Character()
-
+        # every roll in the app comes from these dice; seed them to
+        # replay a session
+        self.dice = rng.Dice()
+        self.player = ch.Character(dice = self.dice.stream())
+        # the world is made from this seed as the player gets near each
+        # part of it, and kept in WORLD_FILE; position is [x, y, level].
+        # world, loop and saves stay None until start_world()
+        self.worldSeed = self.dice.randint(0, 2 ** 32 - 1)
+        self.world = None
+        self.position = [0, 0, 0]
+        # combat events go out through here; the Travel log listens in
+        self.events = events.EventStream()
+        # every image the views show comes from here, loaded once
+        self.assets = assets.AssetCache(self)
+        self.loop = None
+        self.saves = None
+        # playing is True once the player is out traveling
+        self.playing = False
+
+        # pages are only built the first time they are shown (or when
+        # there's idle time to build the likely next ones early)
+        self.container = container
+        self.pages = dict((F.__name__, F) for F in
+                          (Menu, Hardcore, Simple, FourD6, Help, Travel))
         self.frames = {}
-        for F in (Menu, Hardcore, Simple, FourD6, Help, Travel):
-            page_name = F.__name__
-            frame = F(parent=container, controller=self)
+        self.prebuild = prebuild
+        self.timings = [("imports", STARTED - LAUNCHED)]
+        # after_idle would fire before the window is even on screen
+        self.painted = False
+        self.bind("<Map>", self.first_paint, "+")
+
+        self.protocol("WM_DELETE_WINDOW", self.shut_down)
+        self.show_frame("Menu")
+        
+    def start_world(self):
+        '''set up the world, the game loop and the saves, the first time
+        they're needed'''
+        if self.world is not None:
+            return
+        import world, chunkstore, gameloop, savegame
+        start = time.perf_counter()
+        self.world = world.World(seed = self.worldSeed,
+                                 store = chunkstore.ChunkStore(WORLD_FILE))
+        self.world.visit(self.position)
+        self.assets.preload(["Development Land.gif", "enemy.gif",
+                             "itemIconFiller.gif"])
+        # the game runs in fixed ticks on this loop; key and button
+        # handlers only hand their work to it
+        self.loop = gameloop.GameLoop(self)
+        self.loop.start()
+        # saves only go to disk when something has changed, and never on
+        # the Tk thread
+        self.saves = savegame.SaveGame(SAVE_FILE)
+        self.loop.every(AUTOSAVE_TICKS, self.autosave)
+        self.timings.append(("world", time.perf_counter() - start))
+
+    def get_frame(self, page_name):
+        '''the frame for a page, built now if it hasn't been yet'''
+        frame = self.frames.get(page_name)
+        if frame is None:
+            if page_name == "Travel":
+                self.start_world()
+            start = time.perf_counter()
+            frame = self.pages[page_name](parent=self.container,
+                                          controller=self)
             self.frames[page_name] = frame
 
             # put all of the pages in the same location;
             # the one on the top of the stacking order
             # will be the one that is visible.
             frame.grid(row=0, column=0, sticky="nsew")
+            self.timings.append((page_name, time.perf_counter() - start))
+        return frame
+
+    def prebuild_pages(self, page_names):
+        '''build pages in idle time, one per idle callback'''
+        page_names = [name for name in page_names if name not in self.frames]
+        if page_names:
+            frame = self.get_frame(page_names[0])
+            frame.lower()
+            self.after_idle(self.prebuild_pages, page_names[1:])
+
+    def first_paint(self, event):
+        '''called when the main window is first mapped onto the screen'''
+        if self.painted or event.widget is not self:
+            return
+        self.painted = True
+        self.timings.append(("first paint", time.perf_counter() - STARTED))
+        if TIMING:
+            print(self.timing_report())
+
+    def timing_report(self):
+        '''how long startup and each page build took'''
+        lines = ["STARTUP",
+                 "-----------------------------------"]
+        for name, seconds in self.timings:
+            lines.append("{:<14}{:>8.1f} ms".format(name + ":",
+                                                   seconds * 1000))
+        lines.append("-----------------------------------")
+        return "\n".join(lines)
 
-        self.show_frame("Menu")
-        
     def cheat_handler(self):
         '''handle cheat binding'''
         self.cheat = (self.cheat + 1) % 5
@@ -69,11 +186,77 @@ class RootApp(tk.Tk):
             print(self.cheatsDescription[self.cheat])
     def stupid_mistake(self):
         print("That was a stupid thing to do.... now I'm dead...")
-        self.destroy()
+        self.shut_down()
+    def autosave(self):
+        '''save if anything has changed, telling the player if it can't'''
+        if self.playing:
+            try:
+                self.save_game()
+            except OSError as error:
+                self.report("Couldn't save the game: " + str(error))
+    def save_game(self):
+        '''save now; True if anything had changed since the last save
+
+        the world's changed chunks go into its store here and onto disk
+        on the save thread, ahead of the save file, so the two always agree
+        about what's been picked up and the Tk thread never waits on disk'''
+        self.world.write_back()
+        return self.saves.save(self.player, self.position,
+                               before = self.world.store.sync)
+    def report(self, text):
+        '''tell the player something, in the Travel log if there is one'''
+        travel = self.frames.get("Travel")
+        if travel is not None:
+            travel.say(text)
+        else:
+            print(text)
+    def has_save(self):
+        '''True if there's a saved game to carry on from'''
+        return os.path.exists(SAVE_FILE)
+    def load_game(self):
+        '''carry on from the save file'''
+        self.start_world()
+        try:
+            # the world's monsters are kept by its chunk store, which is
+            # synced ahead of every save, so the save itself has none
+            self.player, position, monsters = self.saves.load(
+                dice = self.dice.stream())
+        except (OSError, ValueError) as error:
+            print("Couldn't load the saved game:", error)
+            return
+        if position is not None:
+            self.position[:] = position
+            self.world.visit(self.position)
+        print(self.player)
+        self.show_frame("Travel")
+    def shut_down(self):
+        '''stop the game loop, save, put the world away and close the
+        window'''
+        if self.world is None:
+            # never got as far as the world; nothing to save
+            self.destroy()
+            return
+        self.loop.stop()
+        try:
+            self.autosave()
+            try:
+                self.saves.close()
+            except OSError as error:
+                print("Couldn't save the game:", error)
+        finally:
+            # whatever went wrong above, the world and window still close
+            try:
+                self.world.close()
+            finally:
+                self.destroy()
     def show_frame(self, page_name):
-        '''Show a frame for the given page name'''
-        frame = self.frames[page_name]
+        '''Show a frame for the given page name, building it if needed'''
+        frame = self.get_frame(page_name)
         frame.tkraise()
+        if page_name == "Travel":
+            self.playing = True
+        if self.prebuild:
+            self.after_idle(self.prebuild_pages, NEXT_PAGES.get(page_name, ()))
 
 
 class Menu(tk.Frame):
@@ -119,6 +302,12 @@ class Menu(tk.Frame):
                              command = lambda: self.controller.show_frame("Help"))
         self.helpBttn.grid()
 
+        # create Continue button, if there's a game to continue
+        if self.controller.has_save():
+            self.continueBttn = tk.Button(self, text = "Continue",
+                                          command = self.controller.load_game)
+            self.continueBttn.grid()
+
 class Hardcore(tk.Frame):
     '''frame for hardcore character creation'''
     def __init__(self, parent, controller):
@@ -242,6 +431,7 @@ class Hardcore(tk.Frame):
         
     def roll_stats(self):
         '''roll for stats'''
+        randint = self.controller.dice.randint
         return [randint(3,18),
                 randint(3,18),
                 randint(3,18),
@@ -413,25 +603,10 @@ class FourD6(tk.Frame):
         self.create_widgets()
 
     def roll_4d6(self):
-        '''Generate rolls based off the 4d6 rules'''
-        rolls = []
-        for i in range(4):
-            roll = randint(1, 6)
-            if self.controller.cheat:
-                if self.controller.cheat == 1:
-                    roll = randint(1, 6)
-                elif self.controller.cheat == 2:
-                    if roll == 1:
-                        roll = 6
-                elif self.controller.cheat == 3:
-                    if roll == 1 or roll == 2:
-                        roll = randint(1, 6)
-                elif self.controller.cheat == 4:
-                    if roll == 1 or roll == 2:
-                        roll = 7 - roll
-            rolls.append(roll)
-        rolls.remove(min(rolls))
-        return sum(rolls)
+        '''Generate rolls based off the 4d6 rules, with the current cheat'''
+        import diceexpr
+        return diceexpr.roll(diceexpr.CHEAT_EXPRESSIONS[self.controller.cheat],
+                             self.controller.dice)
     
     def char_submit(self):
         '''Finalizes the user's character with the attributes from the frame.'''
@@ -623,86 +798,98 @@ class Help(tk.Frame):
                            command=lambda: controller.show_frame("Menu"))
         button.grid()
 
+# the keypad keys for the Travel verbs
+TRAVEL_KEYS = {'<KP_7>': 'potion', '<KP_8>': 'north', '<KP_9>': 'char_info',
+               '<KP_4>': 'west', '<KP_5>': 'SI_handler', '<KP_6>': 'east',
+               '<KP_1>': 'save', '<KP_2>': 'south', '<KP_3>': 'help',
+               '<KP_Subtract>': 'down', '<KP_Add>': 'up',
+               '<KP_Enter>': 'SE_handler'}
+
 class Travel(tk.Frame):
     def __init__(self, parent, controller):
         tk.Frame.__init__(self, parent)
         self.controller = controller
-        self.controller.bind('<KP_7>', lambda e: self.potion())
-        self.controller.bind('<KP_8>', lambda e: self.north())
-        self.controller.bind('<KP_9>', lambda e: self.char_info())
-        self.controller.bind('<KP_4>', lambda e: self.west())
-        self.controller.bind('<KP_5>', lambda e: self.SI_handler())
-        self.controller.bind('<KP_6>', lambda e: self.east())
-        self.controller.bind('<KP_1>', lambda e: self.save())
-        self.controller.bind('<KP_2>', lambda e: self.south())
-        self.controller.bind('<KP_3>', lambda e: self.help())
-        self.controller.bind('<KP_Subtract>', lambda e: self.down())
-        self.controller.bind('<KP_Add>', lambda e: self.up())
-        self.controller.bind('<KP_Enter>', lambda e: self.SE_handler())
+        # held keys repeat; the loop does each command at most once a tick
+        for key, command in TRAVEL_KEYS.items():
+            self.controller.bind(key, lambda e, command=command:
+                                 self.command(command))
         for i in range(2):
             self.columnconfigure(i, weight=1)
             self.rowconfigure(i, weight=1)
         self.create_widgets()
         
+    def command(self, name):
+        '''do one of the Travel verbs on the next tick of the game loop'''
+        self.controller.loop.input(name, getattr(self, name))
+
     def cool_print(self,text='you forgot to give text!'):
-        for letter in text:
-            self.logText.text_widget.insert(tk.END,letter)
+        self.logText.type(text)
+    def say(self, *things):
+        self.logText.print(*things)
+    def go(self, direction):
+        self.say(self.controller.world.step(self.controller.position,
+                                            direction))
     def north(self):
-        print('You go North')
+        self.go('north')
 
     def south(self):
-        print('You go South')
+        self.go('south')
 
     def east(self):
-        print('You go East')
+        self.go('east')
 
     def west(self):
-        print('You go West')
+        self.go('west')
         
     def up(self):
-        print('You went up')
+        self.go('up')
 
     def down(self):
-        print('You went down')
+        self.go('down')
         
     def potion(self):
-        self.controller.player.heal()
+        success, event = self.controller.player.heal()
+        self.controller.events.emit(event)
 
     def char_info(self):
-        print(self.controller.player)
+        self.say(self.controller.player)
 
     def save(self):
-        print('I would save if it was important!')
+        try:
+            if self.controller.save_game():
+                self.say('Game saved.')
+            else:
+                self.say('Nothing new to save.')
+        except OSError as error:
+            self.say("Couldn't save the game:", error)
 
     def help(self):
-        print("I'm helpful!")
+        self.say("I'm helpful!")
 
     def SI_handler(self):
-        print('You find nothing in the nowhere-ness.')
+        self.say(self.controller.world.search(self.controller.position,
+                                              self.controller.player))
 
     def SE_handler(self):
-        print("Nothing to save, but I guess we're leaving!")
-        self.controller.destroy()
+        print("Saving, and leaving!")
+        self.controller.shut_down()
         
     def create_widgets(self):
         #makes view window
-        self.viewImage = tk.PhotoImage(file='Development Land.gif')#place holder image
+        self.viewImage = self.controller.assets.acquire('Development Land.gif')#place holder image
         self.viewLabel = tk.Label(self,image=self.viewImage,
                                   relief=tk.SUNKEN,borderwidth=5)
         self.viewLabel.grid(row=0,column=0)
         #makes log
+        import logview
         self.logFrame = tk.Frame(self,relief=tk.SUNKEN,borderwidth=5)
         self.logFrame.grid(row=0,column=1)
-        self.text_widget = tk.Text(self.logFrame,width=(int(500//7.24637681)-21),
-                                   height=int(500//12)-15,font='-size 12')
-        self.text_widget.grid(row=0,column=0)
-##        self.logText = self.Text2(self.logFrame,width=500,height=500,
-##                                  font='-size 12',wrap=tk.WORD)
-##        self.logText.grid(row=0,column=0)
-        self.logScroll = tk.Scrollbar(self.logFrame,command=self.text_widget.yview)
-        self.logScroll.grid(row=0,column=1,sticky='nsw')
-        self.text_widget.configure(yscrollcommand=self.logScroll.set)
-##        self.logText.text_widget.config(yscrollcommand=self.logScroll.set)
+        self.logText = logview.LogView(self.logFrame,
+                                       width=(int(500//7.24637681)-21),
+                                       height=int(500//12)-15,font='-size 12')
+        self.logText.grid(row=0,column=0)
+        self.text_widget = self.logText.text
+        self.controller.events.subscribe(self.logText)
         #makes inventory grid
         self.inventoryGrid = tk.Frame(self,width=500,height=200,
                                       relief=tk.SUNKEN,borderwidth=5)
@@ -716,43 +903,55 @@ class Travel(tk.Frame):
             self.buttonGrid.rowconfigure(i,weight=1)
         self.buttonGrid.columnconfigure(3,weight=1)
         self.potionButton = tk.Button(self.buttonGrid,text='Potion\n\n7',
-                                      command=self.potion,font='-size 14 -weight bold')
+                                      command=lambda: self.command('potion'),
+                                      font='-size 14 -weight bold')
         self.potionButton.grid(row=0,column=0,sticky='nsew')
-        self.nButton = tk.Button(self.buttonGrid,text='North\n\n8',command=self.north,
+        self.nButton = tk.Button(self.buttonGrid,text='North\n\n8',
+                                 command=lambda: self.command('north'),
                                  font='-size 14 -weight bold')
         self.nButton.grid(row=0,column=1,sticky='nsew')
         #character info button 'CI'
         self.CIButton = tk.Button(self.buttonGrid,text='Character\nInfo\n\n9',
-                                  command=self.char_info,font='-size 14 -weight bold')
+                                  command=lambda: self.command('char_info'),
+                                  font='-size 14 -weight bold')
         self.CIButton.grid(row=0,column=2,sticky='nsew')
-        self.wButton = tk.Button(self.buttonGrid,text='West\n\n4',command=self.west,
+        self.wButton = tk.Button(self.buttonGrid,text='West\n\n4',
+                                 command=lambda: self.command('west'),
                                  font='-size 14 -weight bold')
         self.wButton.grid(row=1,column=0,sticky='nsew')
         #'SI'=Search/Interact
         self.SIButton = tk.Button(self.buttonGrid,text='Search/\nInteract\n\n5',
-                                  command=self.SI_handler,font='-size 14 -weight bold')
+                                  command=lambda: self.command('SI_handler'),
+                                  font='-size 14 -weight bold')
         self.SIButton.grid(row=1,column=1,sticky='nsew')
-        self.eButton = tk.Button(self.buttonGrid,text='East\n\n6',command=self.east,
+        self.eButton = tk.Button(self.buttonGrid,text='East\n\n6',
+                                 command=lambda: self.command('east'),
                                  font='-size 14 -weight bold')
         self.eButton.grid(row=1,column=2,sticky='nsew')
-        self.saveButton = tk.Button(self.buttonGrid,text='Save\n\n1',command=self.save,
+        self.saveButton = tk.Button(self.buttonGrid,text='Save\n\n1',
+                                    command=lambda: self.command('save'),
                                     font='-size 14 -weight bold')
         self.saveButton.grid(row=2,column=0,sticky='nsew')
-        self.sButton = tk.Button(self.buttonGrid,text='South\n\n2',command=self.south,
+        self.sButton = tk.Button(self.buttonGrid,text='South\n\n2',
+                                 command=lambda: self.command('south'),
                                  font='-size 14 -weight bold')
         self.sButton.grid(row=2,column=1,sticky='nsew')
-        self.helpButton = tk.Button(self.buttonGrid,text='Help\n\n3',command=self.help,
+        self.helpButton = tk.Button(self.buttonGrid,text='Help\n\n3',
+                                    command=lambda: self.command('help'),
                                     font='-size 14 -weight bold')
         self.helpButton.grid(row=2,column=2,sticky='nsew')
-        self.downButton = tk.Button(self.buttonGrid,text='Down\n\n-',command=self.down,
+        self.downButton = tk.Button(self.buttonGrid,text='Down\n\n-',
+                                    command=lambda: self.command('down'),
                                     font='-size 14 -weight bold')
         self.downButton.grid(row=0,column=3,sticky='nsew')
-        self.upButton = tk.Button(self.buttonGrid,text='Up\n\n+',command=self.up,
+        self.upButton = tk.Button(self.buttonGrid,text='Up\n\n+',
+                                  command=lambda: self.command('up'),
                                   font='-size 14 -weight bold')
         self.upButton.grid(row=1,column=3,sticky='nsew')
         #SE=save/exit
         self.SEButton = tk.Button(self.buttonGrid,text='Save/\nExit\n\nEnter',
-                                  command=self.SE_handler,font='-size 14 -weight bold')
+                                  command=lambda: self.command('SE_handler'),
+                                  font='-size 14 -weight bold')
         self.SEButton.grid(row=2,column=3,sticky='nsew')
         
         
@@ -0,0 +1,205 @@
+# assets.py
+# 10/18/2026
+
+''' image loading for the Tk views
+
+    An AssetCache loads each image file once and hands out the same
+    tk.PhotoImage every time it's asked for again:
+
+        assets = AssetCache(root)
+        label = tk.Label(frame, image = assets.acquire("enemy.gif"))
+
+    It keeps at most capacity images, throwing out the one used longest
+    ago, but never one that's still acquired: Tk blanks an image from
+    every widget showing it as soon as Python lets go of it, so a view
+    should acquire() what it shows and release() it when it's done.
+
+    Sprite sheets are cut up with define_atlas() and sprite(), or any
+    rectangle of an image with region(); the pieces are cached too.
+    preload() reads files from disk on a worker thread and turns them
+    into images on the Tk thread a little at a time, so the next room is
+    ready before it's needed.
+'''
+import base64
+import os
+import queue
+import threading
+import tkinter as tk
+from collections import OrderedDict
+
+# images are looked for next to the game's code, wherever it's run from
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# how often, in ms, the Tk thread checks for preloaded files
+POLL_INTERVAL = 20
+
+class Atlas(object):
+    ''' a sprite sheet: one image file cut into equal tiles, numbered
+        left to right and then top to bottom '''
+    def __init__(self, file, tileWidth, tileHeight):
+        self.file = file
+        self.tileWidth = tileWidth
+        self.tileHeight = tileHeight
+
+    def box(self, index, sheetWidth):
+        ''' the (x, y, width, height) of tile number index '''
+        columns = max(sheetWidth // self.tileWidth, 1)
+        return ((index % columns) * self.tileWidth,
+                (index // columns) * self.tileHeight,
+                self.tileWidth, self.tileHeight)
+
+class AssetCache(object):
+    ''' PhotoImages by file name (or region), loaded once each
+
+        keys are file names for whole images and (file, x, y, width,
+        height) tuples for regions.'''
+    def __init__(self, master = None, capacity = 32, directory = ASSET_DIR):
+        self.master = master
+        self.capacity = capacity
+        self.directory = directory
+        self.images = OrderedDict()
+        self.references = {}
+        self.atlases = {}
+        self.loaded = queue.Queue()
+        self.loading = set()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, key):
+        ''' the image for a key, from the cache if it's there '''
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+            self.hits += 1
+            return image
+        self.misses += 1
+        if isinstance(key, tuple):
+            image = self.cut(*key)
+        else:
+            image = tk.PhotoImage(master = self.master, file = self.path(key))
+        self.store(key, image)
+        return image
+
+    def image(self, name):
+        ''' a whole image file '''
+        return self.get(name)
+
+    def store(self, key, image):
+        self.images[key] = image
+        self.images.move_to_end(key)
+        self.evict()
+
+    def evict(self):
+        ''' drop the least recently used images that nobody holds, until
+            there are no more than capacity '''
+        extra = len(self.images) - self.capacity
+        if extra <= 0:
+            return
+        for key in list(self.images):
+            if extra <= 0:
+                break
+            if not self.references.get(key):
+                del self.images[key]
+                extra -= 1
+
+    def acquire(self, key):
+        ''' get an image and keep it in the cache until it's released '''
+        image = self.get(key)
+        self.references[key] = self.references.get(key, 0) + 1
+        return image
+
+    def release(self, key):
+        ''' done with an acquired image; it may now be thrown out '''
+        count = self.references.get(key, 0) - 1
+        if count > 0:
+            self.references[key] = count
+        else:
+            self.references.pop(key, None)
+        self.evict()
+
+    def cut(self, name, x, y, width, height):
+        ''' a new PhotoImage holding one rectangle of an image '''
+        sheet = self.get(name)
+        part = tk.PhotoImage(master = self.master, width = width,
+                             height = height)
+        part.tk.call(part, "copy", sheet, "-from", x, y, x + width,
+                     y + height)
+        return part
+
+    def region(self, name, x, y, width, height):
+        ''' one rectangle of an image, cached like a whole image '''
+        return self.get((name, x, y, width, height))
+
+    def define_atlas(self, atlasName, file, tileWidth, tileHeight):
+        ''' name a sprite sheet so sprite() can cut tiles out of it '''
+        self.atlases[atlasName] = Atlas(file, tileWidth, tileHeight)
+
+    def sprite(self, atlasName, index):
+        ''' tile number index of a sprite sheet '''
+        atlas = self.atlases[atlasName]
+        sheet = self.get(atlas.file)
+        return self.region(atlas.file, *atlas.box(index, sheet.width()))
+
+    def preload(self, names):
+        ''' start loading image files in the background
+
+            a worker thread reads the files; the Tk thread makes them into
+            images when it next gets the chance.  Files already cached or
+            on their way are skipped.'''
+        names = [name for name in names
+                 if name not in self.images and name not in self.loading]
+        if not names:
+            return
+        self.loading.update(names)
+        worker = threading.Thread(target = self.read_files, args = (names,),
+                                  daemon = True)
+        worker.start()
+        self.master.after(POLL_INTERVAL, self.receive)
+
+    def read_files(self, names):
+        ''' worker thread: read each file and queue its bytes '''
+        for name in names:
+            try:
+                with open(self.path(name), "rb") as file:
+                    self.loaded.put((name, file.read()))
+            except OSError:
+                self.loaded.put((name, None))
+
+    def receive(self):
+        ''' Tk thread: turn one read file into an image, then come back '''
+        try:
+            name, data = self.loaded.get_nowait()
+        except queue.Empty:
+            name = None
+        if name is not None:
+            self.loading.discard(name)
+            if data is not None and name not in self.images:
+                self.store(name, tk.PhotoImage(
+                    master = self.master, data = base64.b64encode(data)))
+        if self.loading:
+            self.master.after(POLL_INTERVAL if name is None else 1,
+                              self.receive)
+
+    def __len__(self):
+        return len(self.images)
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    assets = AssetCache(root, capacity = 4)
+    assets.define_atlas("enemies", "enemy.gif", 55, 38)
+    assets.preload(["Development Land.gif", "itemIconFiller.gif"])
+    scenery = tk.Label(root, image = assets.acquire("Development Land.gif"))
+    scenery.grid(row = 0, column = 0, columnspan = 3)
+    # plain image() and sprite() results can be thrown out of the cache,
+    # so whoever shows them has to hold on to them
+    enemies = [assets.sprite("enemies", i) for i in range(2)]
+    for i, enemy in enumerate(enemies):
+        tk.Label(root, image = enemy).grid(row = 1, column = i)
+    tk.Label(root, image = assets.image("itemIconFiller.gif")).grid(
+        row = 1, column = 2)
+    print(len(assets), "images cached,", assets.hits, "hits,",
+          assets.misses, "misses")
+    root.mainloop()
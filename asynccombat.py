@@ -0,0 +1,263 @@
+# asynccombat.py
+# 10/18/2026
+
+''' combat() for asyncio, with pluggable controllers
+
+    acombat() fights just like GameEngine.combat, but asks a controller
+    for each combatant's choice instead of calling combat_choice(), and
+    awaits the answer if it has to:
+
+        result = await acombat(hero, Orc(),
+                               controllers = (ConsoleController(), None),
+                               timeout = 30)
+
+    A controller is anything with a choose(combatant) method that returns
+    "a", "h" or "f", or an awaitable that will.  A plain answer is used
+    on the spot, so AI and scripted turns cost no more than they do in
+    combat(); only a player who has to be waited for is awaited.  If they
+    take longer than timeout seconds, they get the default choice.
+
+    Controllers left as None get AIController for Monsters and
+    ConsoleController for plain Characters, which is what combat() does
+    with combat_choice(), except that nobody else has to wait for input().
+'''
+import asyncio
+import sys
+import threading
+from inspect import isawaitable
+from GameEngine import *
+from rng import get_dice
+
+class AIController(object):
+    ''' a Monster's own combat AI; never has to be awaited '''
+    def choose(self, combatant):
+        return combatant.combat_choice()
+
+class ScriptedController(object):
+    ''' plays a fixed list of choices, then keeps choosing then '''
+    def __init__(self, choices, then = "a"):
+        self.choices = list(choices)
+        self.choices.reverse()
+        self.then = then
+
+    def choose(self, combatant):
+        if self.choices:
+            return self.choices.pop()
+        return self.then
+
+class QueueController(object):
+    ''' waits for somebody to put() a choice in
+
+        the base for controllers driven from the outside, like a GUI.
+        Choices put in ahead of time are used in order.'''
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    def put(self, choice):
+        self.queue.put_nowait(choice)
+
+    def choose(self, combatant):
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        return self.queue.get()
+
+class TkController(QueueController):
+    ''' choices come from Tk buttons or keys
+
+        attach() makes a button put its choice in; bind_keys() does the
+        same for the a, h and f keys of a widget.  The Tk and asyncio
+        loops have to share the thread, for instance by calling
+        root.update() from a task.'''
+    def attach(self, button, choice):
+        button.configure(command = lambda: self.put(choice))
+
+    def bind_keys(self, widget):
+        for choice in ("a", "h", "f"):
+            widget.bind("<Key-" + choice + ">",
+                        lambda event, choice = choice: self.put(choice))
+
+class LineController(object):
+    ''' asks with an async ask(prompt) function that returns a line, such
+        as a server session's, and reads a, h or f off the front of it '''
+    def __init__(self, ask, prompt = "Your Choice [A/h/f]: "):
+        self.ask = ask
+        self.prompt = prompt
+
+    async def read_choice(self):
+        answer = await self.ask(self.prompt)
+        return answer[:1].lower() or "a"
+
+    def choose(self, combatant):
+        return self.read_choice()
+
+class ConsoleReader(object):
+    ''' the one thread that reads the console, for every event loop
+
+        a blocked input() can't be cancelled, so a thread of its own for
+        each prompt would hang on after a timeout and steal the answer to
+        the next one.  Instead this thread reads line after line for as
+        long as the program runs and puts each one in lines(), the queue
+        of whichever event loop last asked.  eof is set once stdin ends.'''
+    def __init__(self, stream = None):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.loop = None
+        self.queue = None
+        self.backlog = []       # lines that came while no loop could take them
+        self.eof = False
+        self.thread = None
+
+    def lines(self):
+        ''' the running loop's queue of lines, starting the thread the
+            first time '''
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if loop is not self.loop:
+                old = self.queue
+                self.loop = loop
+                self.queue = asyncio.Queue()
+                while old is not None and not old.empty():
+                    self.backlog.append(old.get_nowait())
+                for line in self.backlog:
+                    self.queue.put_nowait(line)
+                self.backlog = []
+            if self.thread is None:
+                self.thread = threading.Thread(target = self.read_lines,
+                                               daemon = True)
+                self.thread.start()
+            return self.queue
+
+    def read_lines(self):
+        stream = self.stream if self.stream is not None else sys.stdin
+        while True:
+            line = stream.readline()
+            if not line:
+                self.eof = True
+            with self.lock:
+                try:
+                    self.loop.call_soon_threadsafe(self.queue.put_nowait,
+                                                   line)
+                except RuntimeError:
+                    # that loop is closed; keep it for the next one
+                    self.backlog.append(line)
+            if not line:
+                return
+
+    async def readline(self):
+        ''' the next line, without its newline; "" once stdin has ended '''
+        lines = self.lines()
+        if self.eof and lines.empty():
+            return ""
+        return (await lines.get()).rstrip("\n")
+
+CONSOLE = ConsoleReader()
+
+class ConsoleController(LineController):
+    ''' the combat prompt on the console, read through the shared
+        ConsoleReader so the event loop carries on while it waits '''
+    def __init__(self, prompt = """
+                  YOU ARE IN COMBAT!
+                  What do you want to do?
+                  You can:
+                     A)ttack
+                     H)eal
+                     F)lee
+                   Your Choice [A/h/f]: """, reader = CONSOLE):
+        super(ConsoleController, self).__init__(self.console_input, prompt)
+        self.reader = reader
+
+    async def console_input(self, prompt):
+        print(prompt, end = "", flush = True)
+        return await self.reader.readline()
+
+def default_controller(combatant):
+    ''' what a combatant without a controller gets '''
+    if type(combatant).combat_choice is Character.combat_choice:
+        return ConsoleController()
+    return AIController()
+
+async def acombat(one, two, controllers = None, output = print,
+                  maxRounds = None, dice = None, events = None,
+                  timeout = None, default = "a"):
+    ''' runs combat between two Characters, named one and two, without
+        blocking the event loop
+
+        controllers is a pair, one for each combatant; either can be None.
+        timeout is how many seconds a controller gets for each turn, after
+        which default is chosen for it.  output, maxRounds, dice and events
+        are the same as for combat().  Returns a CombatResult.'''
+    controllers = list(controllers or (None, None))
+    for i, combatant in enumerate((one, two)):
+        if controllers[i] is None:
+            controllers[i] = default_controller(combatant)
+    controllerOf = {id(one): controllers[0], id(two): controllers[1]}
+    result = CombatResult(one, two)
+
+    publish = publisher(output, events)
+
+    async def get_choice(current):
+        '''a plain answer right away; otherwise wait, up to timeout'''
+        choice = controllerOf[id(current)].choose(current)
+        if not isawaitable(choice):
+            return choice
+        try:
+            return await asyncio.wait_for(choice, timeout)
+        except asyncio.TimeoutError:
+            return default
+
+    def take_action(current, target, choice):
+        '''the same as in combat(); True if the fight is over'''
+        message, damage, death = resolve_action(current, target, choice)
+        publish(message)
+        if death:
+            publish(death)
+        return score_action(result, current, target, message, damage, death)
+
+    randint = get_dice(dice).randint
+    combatIsOver = False
+    while not combatIsOver:
+        if maxRounds and result.rounds >= maxRounds:
+            break
+        result.rounds += 1
+        if output or events:
+            publish(CombatEvent(ROUND, amount = result.rounds))
+        if randint(1, 20) + one.speed >= randint(1, 20) + two.speed:
+            order = ((one, two), (two, one))
+        else:
+            order = ((two, one), (one, two))
+        for current, target in order:
+            combatIsOver = take_action(current, target,
+                                       await get_choice(current))
+            if combatIsOver:
+                break
+    return result
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from rng import Dice
+
+    async def many_fights(count):
+        ''' lots of fights at once on one loop, each player answering
+            slowly, some too slowly '''
+        class Sleepy(object):
+            def __init__(self, delay):
+                self.delay = delay
+            async def answer(self):
+                await asyncio.sleep(self.delay)
+                return "a"
+            def choose(self, combatant):
+                return self.answer()
+        dice = Dice(1)
+        fights = [acombat(Character(name = "Player " + str(i)),
+                          Orc(dice = dice.stream()),
+                          controllers = (Sleepy(0.01 * (i % 3)), None),
+                          output = None, dice = dice.stream(), timeout = 0.015)
+                  for i in range(count)]
+        return await asyncio.gather(*fights)
+
+    start = perf_counter()
+    results = asyncio.run(many_fights(2000))
+    print(len(results), "fights with waiting players in {:.2f} s".format(
+        perf_counter() - start))
+    asyncio.run(acombat(Character(name = "Mr. Peebles"), Orc(),
+                        controllers = (ScriptedController("ahaf"), None)))
@@ -23,12 +23,65 @@
     critical fumble (roll of 1).
     11/21/2016
       added __str__ method to allow easy printing.
+    10/18/2026
+      added the dice constructor parameter and attribute.  All of the
+    character's rolls (attack, damage, healing and fleeing) come from
+    these dice; None means the shared dice in the rng module.
+    10/18/2026
+      potions and the default weapon and armor now come from the shared
+    item catalog (Potion.shared() etc.) instead of being new objects for
+    every character.
+    10/18/2026
+      the ability bonuses, AC and the new attackBonus are now cached in
+    self.derived.  Setting an ability score, the weapon or the armor
+    clears the cache (call invalidate() after changing an item in place).
+    Buffs and debuffs can join in through add_modifier().
+    10/18/2026
+      heal, flee and attack now return a CombatEvent as their message, so
+    the text is only put together if somebody prints it.
+    10/18/2026
+      shared catalog items are read-only now.  enchant() is the way to
+    make a weapon or armor better: it swaps the shared item for an
+    ItemInstance of the character's own.
     
 
 '''
-from random import randint
+from rng import get_dice
+from events import *
 from items import *
 
+ABILITIES = ("strength", "dexterity", "constitution", "intelligence",
+             "wisdom", "charisma")
+
+def source_property(name):
+    ''' a property that clears the cached derived stats when it is set
+
+        used for everything the derived stats are worked out from.'''
+    def getter(self):
+        return self.sources[name]
+    def setter(self, value):
+        self.sources[name] = value
+        self.derived.clear()
+    return property(getter, setter)
+
+def derived_stat(compute):
+    ''' turn a calculation into a cached property
+
+        the value is worked out once, passed through any modifiers added
+        for it with add_modifier, and kept until the cache is cleared.'''
+    name = compute.__name__
+    def getter(self):
+        derived = self.derived
+        if name in derived:
+            return derived[name]
+        value = compute(self)
+        if self.modifiers and name in self.modifiers:
+            for modifier in self.modifiers[name]:
+                value = modifier(self, value)
+        derived[name] = value
+        return value
+    return property(getter, doc = compute.__doc__)
+
 class Character(object):
     ''' Base Character Class '''
     def __init__(self,
@@ -45,8 +98,12 @@ class Character(object):
                  numberOfPotions = 2,
                  inventory = [],
                  weapon = "",
-                 armor = ""):
+                 armor = "",
+                 dice = None):
         ''' All values represent the average score '''
+        self.sources = {}
+        self.derived = {}
+        self.modifiers = None
         self.name = name
         self.maxHealth = maxHealth
         self.health = maxHealth
@@ -63,43 +120,88 @@ class Character(object):
         for item in inventory:
             self.inventory.append(item[:])
         self.potions = []
+        potion = Potion.shared()
         for i in range(numberOfPotions):
-            self.potions.append(Potion())
+            self.potions.append(potion)
         if weapon == "":
-            self.weapon = Weapon()
+            self.weapon = Weapon.shared()
         else:
             self.weapon = weapon
         if armor == "":
-            self.armor = Armor()
+            self.armor = Armor.shared()
         else:
             self.armor = armor
-
-    @property
+        self.dice = dice
+
+    strength = source_property("strength")
+    dexterity = source_property("dexterity")
+    constitution = source_property("constitution")
+    intelligence = source_property("intelligence")
+    wisdom = source_property("wisdom")
+    charisma = source_property("charisma")
+    weapon = source_property("weapon")
+    armor = source_property("armor")
+
+    def invalidate(self):
+        ''' forget the cached derived stats, e.g. after changing an item '''
+        self.derived.clear()
+
+    def enchant(self, slot, amount = 1):
+        ''' add amount to the bonus of the "weapon" or "armor"
+
+            a shared item is first swapped for an ItemInstance of this
+            character's own, so nobody else's gear changes.'''
+        item = getattr(self, slot)
+        if not isinstance(item, ItemInstance):
+            item = item.instance()
+        item.enchantment += amount
+        setattr(self, slot, item)
+
+    def add_modifier(self, stat, modifier):
+        ''' let a buff or debuff change a derived stat
+
+            stat is the name of a derived stat ("strBonus", "AC", ...), and
+            modifier is called as modifier(character, value) and returns
+            the changed value.  Stats worked out from a modified one (AC
+            from dexBonus, say) pick the change up too.'''
+        if self.modifiers is None:
+            self.modifiers = {}
+        self.modifiers.setdefault(stat, []).append(modifier)
+        self.invalidate()
+
+    def remove_modifier(self, stat, modifier):
+        ''' take a buff or debuff back off '''
+        self.modifiers[stat].remove(modifier)
+        if not self.modifiers[stat]:
+            del self.modifiers[stat]
+        self.invalidate()
+
+    @derived_stat
     def strBonus(self):
         ''' calculates d20 OGL bonus for strength'''
         return (self.strength//2) - 5
 
-    @property
+    @derived_stat
     def dexBonus(self):
         ''' calculates d20 OGL bonus for dexterity'''
         return (self.dexterity//2) - 5
 
-    @property
+    @derived_stat
     def conBonus(self):
         ''' calculates d20 OGL bonus for dexterity'''
         return (self.constitution//2) - 5
 
-    @property
+    @derived_stat
     def intBonus(self):
         ''' calculates d20 OGL bonus for intelligence'''
         return (self.intelligence//2) - 5
 
-    @property
+    @derived_stat
     def wisBonus(self):
         ''' calculates d20 OGL bonus for dexterity'''
         return (self.wisdom//2) - 5
 
-    @property
+    @derived_stat
     def chaBonus(self):
         ''' calculates d20 OGL bonus for dexterity'''
         return (self.charisma//2) - 5
@@ -119,11 +221,16 @@ class Character(object):
         potionNames = potionNames[:-2] #strip off the last ", "
         return potionNames
 
-    @property
+    @derived_stat
     def AC(self):
         ''' calculates the overall d20 OGL Armor Class (AC) value'''
         return 10 + self.dexBonus + self.armor.defense
 
+    @derived_stat
+    def attackBonus(self):
+        ''' what gets added to the d20 when attacking '''
+        return self.strBonus + self.weapon.attack
+
 
     def get_damaged(self, damage):
         ''' inflicts damage from an outside source '''
@@ -136,11 +243,10 @@ class Character(object):
             this method, like the other action methods, returns two values
             which may or may not be used by the main program.  the first value
             is a Boolean: success.  Hopefully, that one is self-explanatory.
-            message is just a text string that gives the game some descriptive
-            text to give the user.'''
+            message is a CombatEvent (see the events module) that turns into
+            descriptive text for the user when it is printed.'''
         
         success = False
-        message = ""
         
         #first check if there is a potion in inventory
         if self.potionCount > 0:
@@ -149,7 +255,7 @@ class Character(object):
             ''' NOTE: this is fine for now, since there's only one type of
                 potion, but later the user should be given a choice of which
                 to use...'''
-            amount = self.potions[-1].use()  
+            amount = self.potions[-1].use(self.dice)  
             self.health += amount
             self.potions.pop()
 
@@ -157,10 +263,9 @@ class Character(object):
                 self.health = self.maxHealth
 
             success = True
-            message = self.name + " drinks a potion, and heals " +\
-                      str(amount) + " points."
+            message = CombatEvent(HEAL, self, amount = amount)
         if not success:
-            message = self.name + " has no potions!"
+            message = CombatEvent(NO_POTION, self)
 
         return success, message
 
@@ -170,19 +275,17 @@ class Character(object):
             this method, like the other action methods, returns two values
             which may or may not be used by the main program.  the first value
             is a Boolean: success.  Hopefully, that one is self-explanatory.
-            message is just a text string that gives the game some descriptive
-            text to give the user.'''
+            message is a CombatEvent (see the events module) that turns into
+            descriptive text for the user when it is printed.'''
 
         success = False
-        message = ""
         
-        chance = randint(1,100)
+        chance = get_dice(self.dice).randint(1,100)
         if chance <= self.speed:
             success = True
-            message = "When danger reared it's ugly head,\n" + self.name +\
-                      " bravely turned and fled!"
+            message = CombatEvent(FLEE, self)
         else:
-            message = self.name + " tried to flee, but couldn't get away!"
+            message = CombatEvent(FLEE_FAILED, self)
 
         return success, message
 
@@ -192,28 +295,26 @@ class Character(object):
             this method, like the other action methods, returns two values
             which may or may not be used by the main program.  the first value
             is a Boolean: success.  Hopefully, that one is self-explanatory.
-            message is just a text string that gives the game some descriptive
-            text to give the user.'''
+            message is a CombatEvent (see the events module) that turns into
+            descriptive text for the user when it is printed.'''
 
         success = False
-        message = ""
-        roll = randint(1,20)
+        roll = get_dice(self.dice).roll(20)
         if roll == 1:
             success = False
-            message = self.name + "fumbles their attack!"
+            message = CombatEvent(FUMBLE, self, enemy, roll = roll)
 
         else:
-            attack = roll + self.strBonus + self.weapon.attack
+            attack = roll + self.attackBonus
             if attack >= enemy.AC:
-                damage = self.weapon.damage + self.strBonus
+                damage = self.weapon.roll_damage(self.dice) + self.strBonus
                 if damage < 1:
                     damage = 1
                 enemy.get_damaged(damage)
                 success = True
-                message = self.name + " hits " + enemy.name + " and does " +\
-                          str(damage) + " damage."
+                message = CombatEvent(HIT, self, enemy, damage, roll)
             else:
-                message = self.name + " misses " + enemy.name + "."
+                message = CombatEvent(MISS, self, enemy, roll = roll)
 
         return success, message
 
@@ -256,6 +357,17 @@ if __name__ == "__main__":
     print(hero)
     print(orc)
 
+    # an enchanted hero has to survive being copied, as simulate() and
+    # sweep() copy their templates for every fight
+    import pickle
+    from copy import copy, deepcopy
+    hero.enchant("weapon", 2)
+    for copier in (copy, deepcopy, lambda c: pickle.loads(pickle.dumps(c))):
+        twin = copier(hero)
+        assert twin.weapon.bonus == hero.weapon.bonus == 2
+        assert twin.weapon.item is Weapon.shared()
+    print("copies, deep copies and pickles of an enchanted hero: ok")
+
     
 
 
@@ -0,0 +1,225 @@
+# chunkstore.py
+# 10/18/2026
+
+''' world chunks on disk, in one memory-mapped file
+
+    A ChunkStore keeps every chunk a World has let go of, so a world
+    that's been explored for hours comes back just as it was, and moving
+    around it reads chunks off disk instead of generating them again.
+
+        store = ChunkStore("world.chunks")
+        world = World(store = store)
+        ...
+        world.close()       # writes back what's changed, then closes
+
+    The file is a header followed by fixed-size records, one per chunk:
+
+        key       <iii  cx, cy, level
+        count     <B    how many things
+        tiles     CHUNK_SIZE * CHUNK_SIZE bytes
+        things    count of <BBB  x and y in the chunk, THING_KINDS index
+
+    Records are mapped in segments of SEGMENT_RECORDS, so the file can grow
+    without moving what's already mapped.  The offset index (which record
+    holds which chunk) is built from the record keys when the file is
+    opened; nothing else is read until it's needed.  A chunk read from
+    the store gets its tiles as a memoryview straight into the map, with
+    no copy, and only its handful of things are unpacked.  Writing a
+    chunk back that's already on disk only rewrites its things.
+'''
+import mmap
+import os
+import struct
+from world import *
+
+MAGIC = b"GEWC"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQQ")  # magic, version, has seed, chunk size,
+                                    # seed, records used
+HEADER_BYTES = max(mmap.ALLOCATIONGRANULARITY, 4096)
+RECORD_HEAD = struct.Struct("<iiiB")
+THING = struct.Struct("<BBB")
+TILE_BYTES = CHUNK_SIZE * CHUNK_SIZE
+TILES_AT = 16
+THINGS_AT = TILES_AT + TILE_BYTES
+# most things a chunk can have on disk: as many as it can hold at all
+RECORD_THINGS = MAX_CHUNK_THINGS
+RECORD_SIZE = THINGS_AT + RECORD_THINGS * THING.size    # 512 bytes
+# records per mapped segment; 1 MiB, a whole number of allocation
+# granules on every platform
+SEGMENT_RECORDS = 2048
+SEGMENT_BYTES = SEGMENT_RECORDS * RECORD_SIZE
+
+KIND_CODES = dict((kind, code) for code, kind in enumerate(THING_KINDS))
+
+class ChunkStore(object):
+    ''' fixed-size chunk records in a memory-mapped file
+
+        index maps chunk keys to record numbers.  seed is the seed of the
+        world the chunks came from (None until a World sets it), since
+        chunks from one seed make no sense in another.'''
+    def __init__(self, path):
+        self.path = path
+        self.segments = []
+        self.index = {}
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self.file.truncate(HEADER_BYTES)
+        self.header = mmap.mmap(self.file.fileno(), HEADER_BYTES)
+        if exists:
+            self.read_header()
+        else:
+            self.seed = None
+            self.count = 0
+            self.write_header()
+        for start in range(0, self.count, SEGMENT_RECORDS):
+            self.map_segment(len(self.segments))
+        for slot in range(self.count):
+            segment, offset = self.locate(slot)
+            self.index[RECORD_HEAD.unpack_from(segment, offset)[:3]] = slot
+
+    def read_header(self):
+        magic, version, hasSeed, chunkSize, seed, count = HEADER.unpack_from(
+            self.header)
+        if magic != MAGIC:
+            raise ValueError(self.path + " is not a chunk store")
+        if version != VERSION:
+            raise ValueError("chunk store version {} can't be read".format(
+                version))
+        if chunkSize != CHUNK_SIZE:
+            raise ValueError("chunk store has {0}x{0} chunks, not {1}x{1}"
+                             .format(chunkSize, CHUNK_SIZE))
+        self.seed = seed if hasSeed else None
+        self.count = count
+
+    def write_header(self):
+        HEADER.pack_into(self.header, 0, MAGIC, VERSION,
+                         self.seed is not None, CHUNK_SIZE, self.seed or 0,
+                         self.count)
+
+    def set_seed(self, seed):
+        self.seed = seed
+        self.write_header()
+
+    def map_segment(self, number):
+        ''' map segment number, growing the file if it isn't that long '''
+        end = HEADER_BYTES + (number + 1) * SEGMENT_BYTES
+        if os.fstat(self.file.fileno()).st_size < end:
+            self.file.truncate(end)
+        self.segments.append(mmap.mmap(self.file.fileno(), SEGMENT_BYTES,
+                                       offset = end - SEGMENT_BYTES))
+
+    def locate(self, slot):
+        ''' the segment a record is in and where in it '''
+        return (self.segments[slot // SEGMENT_RECORDS],
+                slot % SEGMENT_RECORDS * RECORD_SIZE)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return self.count
+
+    def read(self, key):
+        ''' the chunk for a key, or None if it was never stored
+
+            the tiles are a view of the file; the chunk must be dropped
+            before the store is closed.'''
+        slot = self.index.get(key)
+        if slot is None:
+            return None
+        segment, offset = self.locate(slot)
+        record = memoryview(segment)[offset:offset + RECORD_SIZE]
+        count = record[RECORD_HEAD.size - 1]
+        cx, cy, level = key
+        x = cx * CHUNK_SIZE
+        y = cy * CHUNK_SIZE
+        things = [Thing(x + dx, y + dy, level, THING_KINDS[code])
+                  for dx, dy, code in THING.iter_unpack(
+                      record[THINGS_AT:THINGS_AT + count * THING.size])]
+        chunk = Chunk(key, record[TILES_AT:THINGS_AT], things)
+        chunk.stored = True
+        return chunk
+
+    def write(self, chunk):
+        ''' store a chunk, or just its things if it's already stored
+
+            this runs while chunks are being evicted and the world is
+            being shut down, so it never refuses one; Chunk.add keeps
+            chunks within RECORD_THINGS, and anything past that put there
+            some other way is left off.'''
+        things = chunk.things[:RECORD_THINGS]
+        slot = self.index.get(chunk.key)
+        isNew = slot is None
+        if isNew:
+            slot = self.count
+            if slot // SEGMENT_RECORDS >= len(self.segments):
+                self.map_segment(len(self.segments))
+        segment, offset = self.locate(slot)
+        RECORD_HEAD.pack_into(segment, offset, chunk.key[0], chunk.key[1],
+                              chunk.key[2], len(things))
+        if isNew:
+            segment[offset + TILES_AT:offset + THINGS_AT] = chunk.tiles
+        at = offset + THINGS_AT
+        for thing in things:
+            THING.pack_into(segment, at, thing.x - chunk.x,
+                            thing.y - chunk.y, KIND_CODES[thing.kind])
+            at += THING.size
+        if isNew:
+            # the record is complete before the header counts it
+            self.index[chunk.key] = slot
+            self.count += 1
+            self.write_header()
+        chunk.stored = True
+        chunk.dirty = False
+
+    def flush(self):
+        ''' make sure everything written so far is on disk '''
+        for segment in self.segments:
+            segment.flush()
+        self.header.flush()
+
+    def sync(self):
+        ''' put everything written so far on disk through the file itself
+
+            unlike flush() this can run on another thread (a SaveWriter's)
+            while this one carries on; the map shares its pages with the
+            file, so syncing the file syncs what was written to the map.'''
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush()
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+        self.header.close()
+        self.file.close()
+
+if __name__ == "__main__":
+    import tempfile
+    from random import Random
+    from time import perf_counter
+    path = os.path.join(tempfile.mkdtemp(), "world.chunks")
+    walker = Random(1)
+    moves = [walker.choice(("north", "east", "south", "west"))
+             for i in range(50000)]
+
+    world = World(seed = 7, store = ChunkStore(path))
+    position = [0, 0, 0]
+    start = perf_counter()
+    for move in moves:
+        world.step(position, move)
+    print("exploring: {:.2f} s, {} chunks made".format(
+        perf_counter() - start, world.misses))
+    world.close()
+
+    world = World(store = ChunkStore(path))
+    position = [0, 0, 0]
+    start = perf_counter()
+    for move in moves:
+        world.step(position, move)
+    print("again from disk: {:.2f} s, {} chunks read, {} on disk, {} KiB"
+          .format(perf_counter() - start, world.misses, len(world.store),
+                  os.path.getsize(path) // 1024))
+    world.close()
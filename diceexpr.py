@@ -0,0 +1,320 @@
+# diceexpr.py
+# 10/18/2026
+
+''' exact dice distributions
+
+    distribution() turns a dice expression into the exact probability of
+    every result, and remembers the answer, so questions like "how likely
+    is this orc to hit" or "what does a Longsword do on average" need no
+    simulation at all.  Probabilities are Fractions, so they are exact.
+
+    Expressions look like this:
+
+        1d8+1       weapon damage and Cure Light potions
+        3d6         three six-sided dice, added up
+        4d6kh3      roll 4d6, keep the highest 3 (kl keeps the lowest)
+        4d6r1kh3    reroll any 1 once before keeping
+        4d6r6kh3    reroll every die once, whatever it shows (cheat 1)
+        4d6f1kh3    flip 1's into 6's (cheat 2)
+        4d6r2kh3    reroll 1's and 2's once (cheat 3)
+        4d6f2kh3    flip 1's into 6's and 2's into 5's (cheat 4)
+
+    rN rerolls, once, any die showing N or less; fN turns any die showing
+    N or less into (sides + 1 - roll).  A Distribution can also be
+    sampled in constant time with an alias table.
+'''
+import re
+from fractions import Fraction
+from functools import lru_cache
+from itertools import product
+from rng import get_dice
+from monster import halves_damage
+
+EXPRESSION = re.compile(r"^(\d*)d(\d+)((?:[rf]\d+)*)(k[hl]\d+)?([+-]\d+)?$")
+
+# the 4d6 expression used by FourD6.roll_4d6 for each RootApp.cheat mode.
+# Cheat 1 has always rerolled every die, not just the 1's its description
+# promises, so it comes out the same as no cheat at all.
+CHEAT_EXPRESSIONS = {0: "4d6kh3",
+                     1: "4d6r6kh3",
+                     2: "4d6f1kh3",
+                     3: "4d6r2kh3",
+                     4: "4d6f2kh3"}
+
+# create_player's hardcore ability scores are each a flat roll from
+# HARDCORE_LOW to HARDCORE_HIGH (randint, whatever the help text says about
+# 3d6), and a stat block only counts if one of its six is HARDCORE_NEEDED
+HARDCORE_LOW = 3
+HARDCORE_HIGH = 18
+HARDCORE_NEEDED = 12
+
+# more outcomes than this are refused by keep-highest / keep-lowest
+MAX_OUTCOMES = 2000000
+
+class Distribution(object):
+    ''' the exact distribution of a whole-number result
+
+        weights maps every possible result to a whole-number weight; the
+        probability of a result is its weight over the total weight.'''
+    def __init__(self, weights):
+        self.weights = dict((value, weight) for value, weight
+                            in weights.items() if weight)
+        self.total = sum(self.weights.values())
+        self.aliasTable = None
+
+    def probability(self, value):
+        ''' chance of exactly value '''
+        return Fraction(self.weights.get(value, 0), self.total)
+
+    def at_least(self, value):
+        ''' chance of value or more '''
+        return Fraction(sum(weight for result, weight in self.weights.items()
+                            if result >= value), self.total)
+
+    def at_most(self, value):
+        ''' chance of value or less '''
+        return Fraction(sum(weight for result, weight in self.weights.items()
+                            if result <= value), self.total)
+
+    @property
+    def mean(self):
+        return Fraction(sum(value * weight for value, weight
+                            in self.weights.items()), self.total)
+
+    @property
+    def minimum(self):
+        return min(self.weights)
+
+    @property
+    def maximum(self):
+        return max(self.weights)
+
+    def shift(self, bonus):
+        ''' the distribution of this result + bonus '''
+        return Distribution(dict((value + bonus, weight) for value, weight
+                                 in self.weights.items()))
+
+    def floor(self, lowest):
+        ''' the distribution of max(result, lowest) '''
+        weights = {}
+        for value, weight in self.weights.items():
+            value = max(value, lowest)
+            weights[value] = weights.get(value, 0) + weight
+        return Distribution(weights)
+
+    def halve(self):
+        ''' the distribution of result // 2, as a WrathMan takes damage '''
+        weights = {}
+        for value, weight in self.weights.items():
+            weights[value // 2] = weights.get(value // 2, 0) + weight
+        return Distribution(weights)
+
+    def convolve(self, other):
+        ''' the distribution of this result plus an independent other '''
+        weights = {}
+        for value, weight in self.weights.items():
+            for otherValue, otherWeight in other.weights.items():
+                total = value + otherValue
+                weights[total] = weights.get(total, 0) + weight * otherWeight
+        return Distribution(weights)
+
+    def build_alias_table(self):
+        ''' Vose's alias method, in whole numbers so sampling stays exact
+
+            each column holds a result, a threshold out of total and an
+            alias; a roll picks a column and keeps its result if a second
+            roll is under the threshold, otherwise takes the alias.'''
+        values = sorted(self.weights)
+        count = len(values)
+        scaled = [self.weights[value] * count for value in values]
+        threshold = [self.total] * count
+        alias = list(range(count))
+        small = [i for i in range(count) if scaled[i] < self.total]
+        large = [i for i in range(count) if scaled[i] >= self.total]
+        while small and large:
+            little = small.pop()
+            big = large.pop()
+            threshold[little] = scaled[little]
+            alias[little] = big
+            scaled[big] -= self.total - scaled[little]
+            if scaled[big] < self.total:
+                small.append(big)
+            else:
+                large.append(big)
+        self.aliasTable = (values, threshold,
+                           [values[i] for i in alias], count)
+        return self.aliasTable
+
+    def sample(self, dice = None):
+        ''' draw one result in constant time '''
+        values, threshold, alias, count = self.aliasTable or \
+                                          self.build_alias_table()
+        rand = get_dice(dice).random
+        column = rand.randrange(count)
+        if rand.randrange(self.total) < threshold[column]:
+            return values[column]
+        return alias[column]
+
+    def __str__(self):
+        lines = []
+        for value in sorted(self.weights):
+            lines.append("{:>4}: {:.4%}".format(value,
+                                                float(self.probability(value))))
+        return "\n".join(lines)
+
+def die_weights(sides, modifiers):
+    ''' weights for one die after its reroll / flip modifiers '''
+    weights = dict((face, 1) for face in range(1, sides + 1))
+    for kind, limit in re.findall(r"([rf])(\d+)", modifiers):
+        limit = int(limit)
+        total = sum(weights.values())
+        newWeights = {}
+        for face, weight in weights.items():
+            if face > limit:
+                newWeights[face] = newWeights.get(face, 0) + weight * \
+                                   (total if kind == "r" else 1)
+            elif kind == "f":
+                flipped = sides + 1 - face
+                newWeights[flipped] = newWeights.get(flipped, 0) + weight
+            else:
+                # a reroll: this die's weight is spread over a fresh roll
+                for newFace, newWeight in weights.items():
+                    newWeights[newFace] = newWeights.get(newFace, 0) + \
+                                          weight * newWeight
+        weights = newWeights
+    return weights
+
+def keep_distribution(count, die, keep, highest):
+    ''' distribution of the sum of the highest (or lowest) keep dice '''
+    if len(die) ** count > MAX_OUTCOMES:
+        raise ValueError("too many dice to keep exactly: " + str(count))
+    weights = {}
+    faces = list(die.items())
+    for roll in product(faces, repeat = count):
+        results = sorted((face for face, weight in roll), reverse = highest)
+        total = sum(results[:keep])
+        weight = 1
+        for face, faceWeight in roll:
+            weight *= faceWeight
+        weights[total] = weights.get(total, 0) + weight
+    return Distribution(weights)
+
+def normalize(expression):
+    ''' the canonical spelling of an expression, used as the cache key '''
+    return expression.replace(" ", "").lower()
+
+def distribution(expression):
+    ''' exact Distribution of a dice expression, cached by expression '''
+    return cached_distribution(normalize(expression))
+
+@lru_cache(maxsize = 256)
+def cached_distribution(expression):
+    ''' the uncached work behind distribution() '''
+    match = EXPRESSION.match(expression)
+    if not match:
+        raise ValueError("not a dice expression: " + expression)
+    count, sides, modifiers, keep, bonus = match.groups()
+    count = int(count or 1)
+    sides = int(sides)
+    if count < 1 or sides < 1:
+        raise ValueError("not a dice expression: " + expression)
+    die = die_weights(sides, modifiers)
+    if keep:
+        result = keep_distribution(count, die, int(keep[2:]), keep[1] == "h")
+    else:
+        single = Distribution(die)
+        result = single
+        for i in range(count - 1):
+            result = result.convolve(single)
+    if bonus:
+        result = result.shift(int(bonus))
+    return result
+
+def roll(expression, dice = None):
+    ''' roll a dice expression once '''
+    return distribution(expression).sample(dice)
+
+def weapon_expression(weapon, bonus = 0):
+    ''' the dice expression for a Weapon's damage, plus any extra bonus '''
+    return "1d{}{:+d}".format(weapon.base, weapon.bonus + bonus)
+
+def potion_expression(potion):
+    ''' the dice expression for what a Potion heals '''
+    return "1d{}{:+d}".format(potion.base, potion.bonus)
+
+def hit_chance(attacker, defender):
+    ''' exact chance that attacker.attack(defender) hits
+
+        a natural 1 always fumbles; any other d20 hits when the roll plus
+        strength bonus plus weapon attack meets the defender's AC.'''
+    needed = defender.AC - attacker.strBonus - attacker.weapon.attack
+    hits = len([roll for roll in range(2, 21) if roll >= needed])
+    return Fraction(hits, 20)
+
+def damage_distribution(attacker, defender = None):
+    ''' exact distribution of the health a hit takes off the defender
+
+        damage is never less than 1, and a WrathMan defender only loses
+        half of it.'''
+    damage = distribution(weapon_expression(attacker.weapon,
+                                            attacker.strBonus)).floor(1)
+    if halves_damage(defender):
+        damage = damage.halve()
+    return damage
+
+def expected_damage(attacker, defender):
+    ''' expected health lost by defender to one of attacker's attacks '''
+    return hit_chance(attacker, defender) * \
+           damage_distribution(attacker, defender).mean
+
+def hardcore_first_high():
+    ''' Distribution of which of the six stats is the first one that is
+        HARDCORE_NEEDED or more, given that one of them is
+
+        the stats before it are all too low and the one at it is high
+        enough, so position k has weight low ** k * high * any ** (5 - k).'''
+    low = HARDCORE_NEEDED - HARDCORE_LOW
+    high = HARDCORE_HIGH + 1 - HARDCORE_NEEDED
+    anything = low + high
+    return Distribution(dict((k, low ** k * high * anything ** (5 - k))
+                             for k in range(6)))
+
+HARDCORE_FIRST_HIGH = hardcore_first_high()
+
+def hardcore_stats(dice = None):
+    ''' six ability scores for create_player's hardcore method, in stat
+        block order
+
+        gives exactly what rerolling the whole block until something is
+        HARDCORE_NEEDED or more gives, but with no rerolls: pick where the
+        first high stat is, then roll the ones before it low, it high and
+        the rest anything.'''
+    randint = get_dice(dice).randint
+    first = HARDCORE_FIRST_HIGH.sample(dice)
+    stats = []
+    for i in range(6):
+        if i < first:
+            stats.append(randint(HARDCORE_LOW, HARDCORE_NEEDED - 1))
+        elif i == first:
+            stats.append(randint(HARDCORE_NEEDED, HARDCORE_HIGH))
+        else:
+            stats.append(randint(HARDCORE_LOW, HARDCORE_HIGH))
+    return stats
+
+def four_d6_stats(cheat = 0, dice = None):
+    ''' six 4d6-keep-3 ability scores, with one of the cheat modes '''
+    scores = distribution(CHEAT_EXPRESSIONS[cheat])
+    return [scores.sample(dice) for i in range(6)]
+
+if __name__ == "__main__":
+    from monster import Orc, Character
+    for cheat, expression in CHEAT_EXPRESSIONS.items():
+        print("cheat", cheat, expression, "mean",
+              float(distribution(expression).mean))
+    print(distribution("3d6"))
+    hero = Character(name = "Mr. Peebles")
+    orc = Orc()
+    print("hero hits orc:", hit_chance(hero, orc),
+          " expected damage:", float(expected_damage(hero, orc)))
+    print("orc hits hero:", hit_chance(orc, hero),
+          " expected damage:", float(expected_damage(orc, hero)))
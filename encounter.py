@@ -0,0 +1,244 @@
+# encounter.py
+# 10/18/2026
+
+''' fights between whole teams
+
+    encounter() is GameEngine.combat for any number of combatants on any
+    number of teams:
+
+        heroes = [Character(name = "Mr. Peebles"), Character(name = "Bob")]
+        result = encounter([heroes, Spawner().spawn_many(5)])
+
+    Every round, everybody still fighting rolls initiative (d20 + speed,
+    just like combat) into an InitiativeQueue, a heap that hands them out
+    highest first.  On their turn each one makes its combat_choice (or the
+    chooser's), and an attack goes to a random living member of another
+    team, picked out of each Team's index of the living.  Somebody who
+    dies or runs away is taken out of the queue and their team's index
+    straight away, in O(log n) and O(1), so nothing ever has to loop
+    over the dead, and raids of hundreds stay cheap.
+'''
+from GameEngine import *
+from rng import get_dice
+
+class InitiativeQueue(object):
+    ''' who acts next this round, highest initiative first
+
+        a binary heap that also remembers where each combatant sits in
+        it, so one who dies or flees can be taken out in O(log n) instead
+        of being skipped later.  Ties go to whoever was pushed first.'''
+    def __init__(self):
+        self.heap = []
+        self.places = {}
+        self.count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, combatant):
+        return id(combatant) in self.places
+
+    def push(self, combatant, initiative):
+        self.heap.append((-initiative, self.count, combatant))
+        self.count += 1
+        self.places[id(combatant)] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        ''' take out and return whoever has the highest initiative '''
+        combatant = self.heap[0][2]
+        self.remove_at(0)
+        return combatant
+
+    def remove(self, combatant):
+        ''' take a combatant out of the queue, if they're still in it '''
+        index = self.places.get(id(combatant))
+        if index is not None:
+            self.remove_at(index)
+
+    def remove_at(self, index):
+        heap = self.heap
+        del self.places[id(heap[index][2])]
+        last = heap.pop()
+        if index < len(heap):
+            heap[index] = last
+            self.places[id(last[2])] = index
+            self.sift_up(index)
+            self.sift_down(self.places[id(last[2])])
+
+    def swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.places[id(heap[i][2])] = i
+        self.places[id(heap[j][2])] = j
+
+    def sift_up(self, index):
+        heap = self.heap
+        while index:
+            parent = (index - 1) // 2
+            if heap[index] >= heap[parent]:
+                break
+            self.swap(index, parent)
+            index = parent
+
+    def sift_down(self, index):
+        heap = self.heap
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if heap[index] <= heap[child]:
+                break
+            self.swap(index, child)
+            index = child
+
+class Team(object):
+    ''' one side of an encounter, and which of it are still fighting
+
+        living is kept in no particular order, with each combatant's
+        place in it remembered, so removing one is a swap with the last
+        and picking a random one is a single roll.'''
+    def __init__(self, number, members):
+        self.number = number
+        self.members = list(members)
+        self.living = list(self.members)
+        self.places = dict((id(member), i) for i, member
+                           in enumerate(self.living))
+        self.damage = 0
+
+    def __len__(self):
+        ''' how many are still fighting '''
+        return len(self.living)
+
+    def remove(self, combatant):
+        ''' take a combatant that died or fled out of the living '''
+        index = self.places.pop(id(combatant))
+        last = self.living.pop()
+        if last is not combatant:
+            self.living[index] = last
+            self.places[id(last)] = index
+
+class EncounterResult(object):
+    ''' summary of an encounter, as returned by encounter()
+
+        winner is the Team left standing, or None if the encounter was cut
+        off by maxRounds or nobody is left.  dead and fled list
+        combatants in the order it happened to them; each Team's damage is
+        the health it took off everybody else.'''
+    def __init__(self, teams):
+        self.teams = teams
+        self.rounds = 0
+        self.winner = None
+        self.dead = []
+        self.fled = []
+
+    @property
+    def isDraw(self):
+        ''' True if the fight stopped with more than one team standing '''
+        return len([team for team in self.teams if team]) > 1
+
+def encounter(teams, output = print, chooser = None, maxRounds = None,
+              dice = None, events = None):
+    ''' runs a fight between teams, each a list of Characters
+
+        output, chooser, maxRounds, dice and events work just as they do
+        for combat().  It goes on until only one team has anybody left
+        fighting.  Returns an EncounterResult.'''
+    teams = [Team(number, members) for number, members in enumerate(teams)]
+    result = EncounterResult(teams)
+    teamOf = {}
+    for team in teams:
+        for member in team.members:
+            teamOf[id(member)] = team
+    randint = get_dice(dice).randint
+    queue = InitiativeQueue()
+
+    publish = publisher(output, events)
+
+    def standing():
+        '''how many teams still have somebody fighting'''
+        return len([team for team in teams if team])
+
+    def choose_target(team):
+        '''a random living combatant from any other team'''
+        total = 0
+        for other in teams:
+            if other is not team:
+                total += len(other)
+        pick = randint(0, total - 1)
+        for other in teams:
+            if other is not team:
+                if pick < len(other):
+                    return other.living[pick]
+                pick -= len(other)
+
+    def take_out(combatant):
+        '''a combatant who died or fled stops fighting'''
+        teamOf[id(combatant)].remove(combatant)
+        queue.remove(combatant)
+
+    def take_action(current, team, choice):
+        '''handle the current active character's choice'''
+        target = None
+        if choice not in ("f", "h"):
+            target = choose_target(team)
+        message, damage, death = resolve_action(current, target, choice)
+        team.damage += damage
+        if message.kind == FLEE:
+            result.fled.append(current)
+            take_out(current)
+        if death:
+            result.dead.append(target)
+            take_out(target)
+        publish(message)
+        if death:
+            publish(death)
+
+    def get_choice(current):
+        '''ask the chooser, or the character itself, what to do'''
+        if chooser:
+            return chooser(current)
+        return current.combat_choice()
+
+    while standing() > 1:
+        if maxRounds and result.rounds >= maxRounds:
+            break
+        result.rounds += 1
+        if output or events:
+            publish(CombatEvent(ROUND, amount = result.rounds))
+        for team in teams:
+            for member in team.living:
+                queue.push(member, randint(1, 20) + member.speed)
+        while queue and standing() > 1:
+            current = queue.pop()
+            take_action(current, teamOf[id(current)], get_choice(current))
+
+    if standing() == 1:
+        result.winner = [team for team in teams if team][0]
+    return result
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from simulation import auto_choice
+    from rng import Dice
+    heroes = [Character(name = name) for name in ("Mr. Peebles", "Bob")]
+    result = encounter([heroes, Spawner(dice = Dice(1)).spawn_many(3)],
+                       chooser = auto_choice, dice = Dice(2))
+    print("\nteam", result.winner.number if result.winner else None,
+          "won in", result.rounds, "rounds")
+
+    spawner = Spawner(SpawnTable([(Orc, 4), (Monster, 1)]), dice = Dice(3))
+    raid = [Character(name = "Raider", maxHealth = 40,
+                      weapon = Weapon.shared(name = "Longsword", base = 8))
+            for i in range(200)]
+    horde = spawner.spawn_many(600)
+    start = perf_counter()
+    result = encounter([raid, horde], output = None, chooser = auto_choice,
+                       dice = Dice(4))
+    print("200 vs 600: team", result.winner.number if result.winner else
+          None, "won in", result.rounds, "rounds,", len(result.dead),
+          "dead,", len(result.fled), "fled, {:.2f} s".format(
+              perf_counter() - start))
@@ -0,0 +1,369 @@
+# entitystore.py
+# 10/18/2026
+
+''' columnar storage for big crowds of characters and monsters
+
+    An EntityStore keeps every combatant as one row across a set of typed
+    numpy columns (stats, health, potion counts, weapon / armor ids, AI
+    weights) instead of as a Character object with its own dict, potion
+    objects and items.  A million monsters fit in a few tens of MB, and a
+    whole column can be worked on at once:
+
+        store = EntityStore()
+        store.add_many(Orc(), 1000000)
+        store.health[store.health < 3] += 1     # one pass over everybody
+
+    store.view(id) gives back a thin object that behaves like the
+    Character, Monster, Orc or WrathMan that row came from (attack, heal,
+    flee, combat_choice, print, ...) but reads and writes the columns, so
+    existing code like GameEngine.combat can use it unchanged.
+
+    This module needs numpy, like vectorcombat.
+'''
+import numpy as np
+from monster import *
+from vectorcombat import ai_choices, ATTACK
+
+# column name: numpy type
+COLUMNS = {"nameId": np.int32,
+           "kind": np.int8,
+           "alive": np.bool_,
+           "maxHealth": np.int16,
+           "health": np.int16,
+           "speed": np.int16,
+           "stamina": np.int16,
+           "hunger": np.int16,
+           "strength": np.int16,
+           "dexterity": np.int16,
+           "constitution": np.int16,
+           "intelligence": np.int16,
+           "wisdom": np.int16,
+           "charisma": np.int16,
+           "potionCount": np.int16,
+           "potionId": np.int16,
+           "weaponId": np.int16,
+           "armorId": np.int16,
+           "aggression": np.int16,
+           "awareness": np.int16,
+           "fear": np.int16}
+
+STAT_COLUMNS = ("maxHealth", "health", "speed", "stamina", "hunger",
+                "strength", "dexterity", "constitution", "intelligence",
+                "wisdom", "charisma")
+AI_COLUMNS = ("aggression", "awareness", "fear")
+
+# the class each value of the kind column stands for
+KINDS = (Character, Monster, Orc, WrathMan)
+
+class PotionStack(object):
+    ''' a count of identical potions that acts like a list of them
+
+        Character.heal only ever looks at the last potion and pops it, so
+        a count and one shared Potion are all it needs.'''
+    def __init__(self, view):
+        self.view = view
+
+    def __len__(self):
+        return int(self.view.store.potionCount[self.view.index])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.view.potion] * len(range(*index.indices(len(self))))
+        if not -len(self) <= index < len(self):
+            raise IndexError("potion index out of range")
+        return self.view.potion
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.view.potion
+
+    def pop(self):
+        if len(self) == 0:
+            raise IndexError("pop from empty potion stack")
+        self.view.store.potionCount[self.view.index] -= 1
+        return self.view.potion
+
+    def append(self, potion):
+        store = self.view.store
+        index = self.view.index
+        potionId = store.intern_id("potions", potion)
+        if len(self) and store.potionId[index] != potionId:
+            raise ValueError("a potion stack only holds one kind of potion")
+        store.potionId[index] = potionId
+        store.potionCount[index] += 1
+
+def column_property(name):
+    ''' a property that reads and writes one column for this view's row '''
+    def getter(self):
+        return self.store.columns[name][self.index].item()
+    def setter(self, value):
+        self.store.columns[name][self.index] = value
+    return property(getter, setter)
+
+def item_property(column, catalog):
+    ''' a property for a weapon / armor / potion id column '''
+    def getter(self):
+        return getattr(self.store, catalog)[self.store.columns[column]
+                                            [self.index]]
+    def setter(self, item):
+        self.store.columns[column][self.index] = \
+            self.store.intern_id(catalog, item)
+    return property(getter, setter)
+
+def item_key(item):
+    ''' what makes two items the same, for the store's catalogs '''
+    return (type(item), item.name, item.base, item.bonus)
+
+class EntityView(Character):
+    ''' a Character-compatible window onto one row of an EntityStore
+
+        views are cheap; make one whenever you need to hand a row to code
+        that expects a Character, and drop it again afterwards.'''
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    for columnName in STAT_COLUMNS:
+        locals()[columnName] = column_property(columnName)
+    del columnName
+
+    weapon = item_property("weaponId", "weapons")
+    armor = item_property("armorId", "armor")
+    potion = item_property("potionId", "potions")
+
+    @property
+    def name(self):
+        return self.store.names[self.store.nameId[self.index]]
+
+    @name.setter
+    def name(self, value):
+        self.store.nameId[self.index] = self.store.name_id(value)
+
+    @property
+    def potions(self):
+        return PotionStack(self)
+
+    @property
+    def inventory(self):
+        return self.store.inventories.setdefault(self.index, [])
+
+    @property
+    def dice(self):
+        ''' the store's dice, unless this view has been given its own '''
+        dice = self.__dict__.get("ownDice")
+        return dice if dice is not None else self.store.dice
+
+    @dice.setter
+    def dice(self, dice):
+        # for this view only, as for a fight replayed from a seed; None
+        # goes back to the store's
+        self.ownDice = dice
+
+    # the columns can change under a view at any time, so nothing is cached
+    modifiers = None
+
+    @property
+    def derived(self):
+        return {}
+
+    def __eq__(self, other):
+        return isinstance(other, EntityView) and self.store is other.store \
+               and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+class MonsterView(EntityView, Monster):
+    ''' an EntityView that also has the Monster AI columns '''
+    for columnName in AI_COLUMNS:
+        locals()[columnName] = column_property(columnName)
+    del columnName
+
+class OrcView(MonsterView, Orc):
+    pass
+
+class WrathManView(MonsterView, WrathMan):
+    pass
+
+VIEWS = (EntityView, MonsterView, OrcView, WrathManView)
+
+class EntityStore(object):
+    ''' typed columns holding any number of combatants, one row each
+
+        rows are ids; a removed row is marked dead and reused by the next
+        add.  Each column is also an attribute (store.health and so on)
+        covering only the rows in use.'''
+    def __init__(self, capacity = 1024, dice = None):
+        self.size = 0
+        self.capacity = max(capacity, 1)
+        self.columns = dict((name, np.zeros(self.capacity, dtype = kind))
+                            for name, kind in COLUMNS.items())
+        self.free = []
+        self.names = []
+        self.nameIds = {}
+        self.weapons = []
+        self.armor = []
+        self.potions = [Potion()]
+        # for each catalog, item key: its id, so interning is one lookup
+        self.itemIds = {"weapons": {}, "armor": {},
+                        "potions": {item_key(self.potions[0]): 0}}
+        self.inventories = {}
+        self.dice = dice
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns")
+        if columns is not None and name in columns:
+            return columns[name][:self.size]
+        raise AttributeError(name)
+
+    def __len__(self):
+        ''' how many rows are alive '''
+        return int(self.alive.sum())
+
+    def name_id(self, name):
+        ''' the id of a name, adding it to the name table if it is new '''
+        if name not in self.nameIds:
+            self.nameIds[name] = len(self.names)
+            self.names.append(name)
+        return self.nameIds[name]
+
+    def intern_id(self, catalog, item):
+        ''' the id of an item in one of the catalogs ("weapons", "armor"
+            or "potions"), adding it if new
+
+            items are compared by class, name, base and bonus, so every
+            row holding a plain Longsword shares one Weapon object.'''
+        ids = self.itemIds[catalog]
+        key = item_key(item)
+        itemId = ids.get(key)
+        if itemId is None:
+            items = getattr(self, catalog)
+            itemId = ids[key] = len(items)
+            items.append(item)
+        return itemId
+
+    def grow(self, needed):
+        ''' make room for at least needed rows '''
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self.columns.items():
+            bigger = np.zeros(capacity, dtype = column.dtype)
+            bigger[:self.size] = column[:self.size]
+            self.columns[name] = bigger
+        self.capacity = capacity
+
+    def row_values(self, character):
+        ''' the column values for one Character object '''
+        values = dict((name, getattr(character, name))
+                      for name in STAT_COLUMNS)
+        kind = 0
+        for i, cls in enumerate(KINDS):
+            if isinstance(character, cls):
+                kind = i
+        values["kind"] = kind
+        values["alive"] = True
+        values["nameId"] = self.name_id(character.name)
+        values["weaponId"] = self.intern_id("weapons", character.weapon)
+        values["armorId"] = self.intern_id("armor", character.armor)
+        values["potionCount"] = character.potionCount
+        values["potionId"] = self.intern_id("potions",
+                                            character.potions[-1]) \
+                             if character.potions else 0
+        for name in AI_COLUMNS:
+            values[name] = getattr(character, name, 0)
+        return values
+
+    def add(self, character):
+        ''' copy a Character (or Monster) into a new row; returns its id '''
+        values = self.row_values(character)
+        if self.free:
+            index = self.free.pop()
+        else:
+            self.grow(self.size + 1)
+            index = self.size
+            self.size += 1
+        for name, value in values.items():
+            self.columns[name][index] = value
+        if character.inventory:
+            self.inventories[index] = [item[:] for item in
+                                       character.inventory]
+        return index
+
+    def add_many(self, template, count):
+        ''' add count copies of one Character; returns their ids
+
+            the copies go on the end, so one slice assignment fills each
+            column no matter how many there are.'''
+        values = self.row_values(template)
+        self.grow(self.size + count)
+        start = self.size
+        for name, value in values.items():
+            self.columns[name][start:start + count] = value
+        self.size += count
+        return np.arange(start, start + count)
+
+    def remove(self, index):
+        ''' mark a row dead so its id can be reused '''
+        self.columns["alive"][index] = False
+        self.inventories.pop(index, None)
+        self.free.append(index)
+
+    def view(self, index):
+        ''' a Character-compatible view of one row '''
+        return VIEWS[self.columns["kind"][index]](self, index)
+
+    def alive_ids(self):
+        return np.flatnonzero(self.alive)
+
+    # vectorized versions of the Character properties
+    def bonus(self, stat):
+        ''' d20 OGL bonus for a whole stat column '''
+        return (getattr(self, stat) // 2) - 5
+
+    @property
+    def defense(self):
+        ''' each row's armor defense '''
+        table = np.array([armor.defense for armor in self.armor] or [0],
+                         dtype = np.int16)
+        return table[self.armorId]
+
+    @property
+    def AC(self):
+        return 10 + self.bonus("dexterity") + self.defense
+
+    def combat_choices(self, ids = None, rng = None):
+        ''' the monster AI's choice for every row in ids (default: all
+            living rows), as ATTACK / HEAL / FLEE codes
+
+            rows without any AI, plain Characters, always attack, as they
+            do in simulation.auto_choice.'''
+        if ids is None:
+            ids = self.alive_ids()
+        ids = np.asarray(ids)
+        choice = ai_choices(self.columns["aggression"][ids],
+                            self.columns["awareness"][ids],
+                            self.columns["fear"][ids], rng)
+        choice[self.columns["kind"][ids] == 0] = ATTACK
+        return choice
+
+    @property
+    def nbytes(self):
+        ''' memory used by the columns themselves '''
+        return sum(column.nbytes for column in self.columns.values())
+
+if __name__ == "__main__":
+    from GameEngine import combat
+    from simulation import auto_choice
+    store = EntityStore()
+    ids = store.add_many(Orc(), 1000000)
+    print(len(store), "orcs in {:.1f} MB".format(store.nbytes / 2 ** 20))
+    store.strength[::2] += 4     # every other orc hits the gym
+    print("mean strength bonus: {:.2f}".format(store.bonus("strength").mean()))
+    hero = store.view(store.add(Character(name = "Mr. Peebles")))
+    orc = store.view(ids[0])
+    combat(hero, orc, chooser = auto_choice)
+    print(hero)
+    print(orc)
@@ -0,0 +1,138 @@
+# events.py
+# 10/18/2026
+
+''' structured combat events
+
+    Character.attack, heal and flee hand back a CombatEvent instead of a
+    ready-made message string.  An event is a tiny record (what happened,
+    who did it, to whom, how much), and it is only turned into text when
+    something actually wants the text: print(event), str(event), or
+    "some text" + event all give the same words the game always printed.
+
+    An EventStream passes events on to whatever sinks are subscribed to
+    it.  With no sinks, emitting costs next to nothing, so fights nobody
+    is watching never format a single message:
+
+        stream = EventStream()
+        stream.subscribe(ConsoleSink())
+        combat(hero, orc, output = None, events = stream)
+'''
+
+ROUND = 0
+HIT = 1
+MISS = 2
+FUMBLE = 3
+HEAL = 4
+NO_POTION = 5
+FLEE = 6
+FLEE_FAILED = 7
+DEATH = 8
+
+KIND_NAMES = ("round", "hit", "miss", "fumble", "heal", "no potion",
+              "flee", "flee failed", "death")
+
+# what each kind of event says; {actor}, {target} and {amount} are filled in
+TEMPLATES = ("\nRound {amount} begins...",
+             "{actor} hits {target} and does {amount} damage.",
+             "{actor} misses {target}.",
+             "{actor}fumbles their attack!",
+             "{actor} drinks a potion, and heals {amount} points.",
+             "{actor} has no potions!",
+             "When danger reared it's ugly head,\n{actor}"
+             " bravely turned and fled!",
+             "{actor} tried to flee, but couldn't get away!",
+             "{actor} is Dead!")
+
+class CombatEvent(object):
+    ''' one thing that happened in a fight
+
+        kind is one of the constants above, actor is whoever did it (or
+        died), target is who it was done to, amount is the damage or
+        healing (or the round number), and roll is the d20 of an attack.'''
+    __slots__ = ("kind", "actor", "target", "amount", "roll")
+
+    def __init__(self, kind, actor = None, target = None, amount = 0,
+                 roll = 0):
+        self.kind = kind
+        self.actor = actor
+        self.target = target
+        self.amount = amount
+        self.roll = roll
+
+    @property
+    def text(self):
+        ''' the message for this event, formatted now '''
+        return TEMPLATES[self.kind].format(
+            actor = self.actor.name if self.actor is not None else "",
+            target = self.target.name if self.target is not None else "",
+            amount = self.amount)
+
+    def __str__(self):
+        return self.text
+
+    def __add__(self, other):
+        return self.text + other
+
+    def __radd__(self, other):
+        return other + self.text
+
+    def __repr__(self):
+        return "CombatEvent({}, {!r}, {!r}, {})".format(
+            KIND_NAMES[self.kind],
+            getattr(self.actor, "name", None),
+            getattr(self.target, "name", None), self.amount)
+
+class EventStream(object):
+    ''' hands every emitted event to each subscribed sink
+
+        a sink is anything callable with one CombatEvent.'''
+    def __init__(self):
+        self.sinks = []
+
+    def subscribe(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def unsubscribe(self, sink):
+        self.sinks.remove(sink)
+
+    def __bool__(self):
+        ''' an EventStream is "on" only while somebody is listening '''
+        return bool(self.sinks)
+
+    def emit(self, event):
+        for sink in self.sinks:
+            sink(event)
+
+class ConsoleSink(object):
+    ''' prints every event, like the game always did '''
+    def __call__(self, event):
+        print(event.text)
+
+class TextSink(object):
+    ''' appends every event to a Tk Text widget and scrolls to it '''
+    def __init__(self, widget):
+        self.widget = widget
+
+    def __call__(self, event):
+        self.widget.insert("end", event.text + "\n")
+        self.widget.see("end")
+
+class FileSink(object):
+    ''' writes every event as a line of text to an open file '''
+    def __init__(self, file):
+        self.file = file
+
+    def __call__(self, event):
+        self.file.write(event.text + "\n")
+
+class ListSink(object):
+    ''' keeps the raw events, unformatted, for looking at later '''
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def count(self, kind):
+        return sum(1 for event in self.events if event.kind == kind)
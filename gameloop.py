@@ -0,0 +1,202 @@
+# gameloop.py
+# 10/18/2026
+
+''' a fixed-timestep game loop for the Tk front end
+
+    Tk only does things when an event comes in.  A GameLoop adds a
+    steady beat on top of that with after():
+
+      - the game moves on in fixed ticks of tickMs, however often frames
+        actually come, so travel, spawning and combat run at the same
+        speed on a fast machine and a slow one
+      - render callbacks run once per frame, after the ticks, and get
+        how far into the next tick the frame is (0 to 1)
+      - key and button handlers don't do the work themselves; they hand
+        it to input(), and the same input given several times in one tick
+        (a held keypad key repeating) only happens once
+      - schedule() and every() run callbacks a number of ticks from now
+
+    A frame that runs over budgetMs stops catching up on ticks and lets
+    the lost time go, rather than getting further and further behind.
+
+    A callback that raises doesn't stop the loop: the error goes to the
+    root's report_callback_exception, like any other Tk callback's, and
+    the game carries on with the next one.
+
+        loop = GameLoop(root)
+        loop.on_update(world.update)
+        root.bind('<KP_8>', lambda e: loop.input('north', go_north))
+        loop.start()
+'''
+import heapq
+import sys
+import time
+import traceback
+from collections import OrderedDict
+
+class GameLoop(object):
+    ''' fixed ticks, free frames, coalesced input '''
+    def __init__(self, root, tickMs = 50, frameMs = 16, maxTicksPerFrame = 5,
+                 budgetMs = 12):
+        self.root = root
+        self.tickMs = tickMs
+        self.frameMs = frameMs
+        self.maxTicksPerFrame = maxTicksPerFrame
+        self.budgetMs = budgetMs
+        self.tick = 0
+        self.updates = []
+        self.renders = []
+        self.inputs = OrderedDict()
+        self.timers = []
+        self.timerCount = 0
+        self.running = False
+        self.last = None
+        self.lag = 0.0
+        self.frames = 0
+        self.slowFrames = 0
+        self.droppedMs = 0.0
+        self.frameTime = 0.0
+
+    def on_update(self, callback):
+        ''' call callback(tick) every tick '''
+        self.updates.append(callback)
+        return callback
+
+    def on_render(self, callback):
+        ''' call callback(alpha) every frame '''
+        self.renders.append(callback)
+        return callback
+
+    def input(self, name, callback, *args):
+        ''' do callback(*args) at the next tick
+
+            another input with the same name before then replaces this
+            one, so key repeat can't pile up work.'''
+        self.inputs[name] = (callback, args)
+
+    def schedule(self, ticks, callback, *args):
+        ''' call callback(*args) ticks from now '''
+        heapq.heappush(self.timers, (self.tick + max(ticks, 1),
+                                     self.timerCount, callback, args))
+        self.timerCount += 1
+
+    def every(self, ticks, callback, *args):
+        ''' call callback(*args) every so many ticks, until it returns
+            False '''
+        def repeat():
+            keepGoing = True
+            try:
+                keepGoing = callback(*args) is not False
+            finally:
+                # one that raised still comes round again
+                if keepGoing:
+                    self.schedule(ticks, repeat)
+        self.schedule(ticks, repeat)
+
+    def call(self, callback, *args):
+        ''' run one callback, reporting anything it raises '''
+        try:
+            callback(*args)
+        except Exception:
+            report = getattr(self.root, "report_callback_exception", None)
+            if report is not None:
+                report(*sys.exc_info())
+            else:
+                traceback.print_exc()
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.last = time.perf_counter()
+            self.root.after(self.frameMs, self.frame)
+
+    def stop(self):
+        self.running = False
+
+    def step(self):
+        ''' one fixed tick: inputs, then timers that are due, then updates
+
+            stops as soon as a callback stops the loop, since whatever
+            comes after it may only work on a game that's still going (one
+            that shut the window down, say).  A tick stepped by hand on a
+            loop that isn't running runs everything.'''
+        stoppable = self.running
+        self.tick += 1
+        inputs = self.inputs
+        self.inputs = OrderedDict()
+        for callback, args in inputs.values():
+            self.call(callback, *args)
+            if stoppable and not self.running:
+                return
+        while self.timers and self.timers[0][0] <= self.tick:
+            due, count, callback, args = heapq.heappop(self.timers)
+            self.call(callback, *args)
+            if stoppable and not self.running:
+                return
+        for update in self.updates:
+            self.call(update, self.tick)
+            if stoppable and not self.running:
+                return
+
+    def frame(self):
+        ''' run the ticks that are due, then render once '''
+        if not self.running:
+            return
+        start = time.perf_counter()
+        try:
+            self.run_frame(start)
+        finally:
+            # the next frame comes frameMs after this one started, as near
+            # as Tk allows, whatever happened in this one
+            if self.running:
+                self.frameTime = (time.perf_counter() - start) * 1000
+                wait = max(int(self.frameMs - self.frameTime), 1)
+                self.root.after(wait, self.frame)
+
+    def run_frame(self, start):
+        self.lag += (start - self.last) * 1000
+        self.last = start
+        steps = 0
+        while self.lag >= self.tickMs and steps < self.maxTicksPerFrame:
+            self.step()
+            self.lag -= self.tickMs
+            steps += 1
+            if not self.running:
+                # something in the tick stopped the loop, maybe for good
+                return
+            if (time.perf_counter() - start) * 1000 > self.budgetMs:
+                break
+        if self.lag >= self.tickMs:
+            # too far behind to catch up; drop the backlog
+            self.droppedMs += self.lag - self.lag % self.tickMs
+            self.lag %= self.tickMs
+        alpha = self.lag / self.tickMs
+        for render in self.renders:
+            self.call(render, alpha)
+        self.frames += 1
+        if (time.perf_counter() - start) * 1000 > self.budgetMs:
+            self.slowFrames += 1
+
+    def __str__(self):
+        info = "TICKS:       " + str(self.tick) + "\n" +\
+               "-----------------------------------\n" +\
+               "Frames:      " + str(self.frames) + "\n" +\
+               "Slow frames: " + str(self.slowFrames) + "\n" +\
+               "Dropped:     {:.0f} ms\n".format(self.droppedMs) +\
+               "Last frame:  {:.1f} ms\n".format(self.frameTime) +\
+               "-----------------------------------\n"
+        return info
+
+if __name__ == "__main__":
+    import tkinter as tk
+    root = tk.Tk()
+    loop = GameLoop(root)
+    label = tk.Label(root, text = "hold a key down")
+    label.grid()
+    presses = []
+    root.bind("<Key>", lambda e: loop.input("key", presses.append, e.keysym))
+    loop.on_render(lambda alpha: label.configure(
+        text = "tick {}  keys handled {}".format(loop.tick, len(presses))))
+    loop.every(100, lambda: print(loop))
+    loop.start()
+    root.mainloop()
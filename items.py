@@ -2,8 +2,21 @@
 # Thorin Schmidt
 # 11/17/2016
 
-''' base items for the game environment'''
-from random import randint
+''' base items for the game environment
+
+    Items are plain definitions (a name, a base and a bonus), so one
+    object can be shared by everybody carrying the same thing.  Use
+    Weapon.shared(...) and friends to get the catalog's copy instead of
+    making a new one.  Shared items are read-only; setting anything on
+    one raises AttributeError.  Anything that belongs to one particular
+    sword, like how worn down or enchanted it is, goes in an ItemInstance
+    wrapped around the shared item (see Item.instance()).'''
+from copy import copy
+from types import MethodType
+from rng import get_dice
+
+CATALOG = {}    # (class, name, base, bonus): the shared item
+SPELLINGS = {}  # (class, args, kwargs) of a shared() call: the shared item
 
 class Item(object):
     '''generic base class'''
@@ -12,6 +25,66 @@ class Item(object):
         self.base = base
         self.bonus = bonus
 
+    @property
+    def key(self):
+        ''' what makes two item definitions the same '''
+        return (type(self), self.name, self.base, self.bonus)
+
+    @classmethod
+    def shared(cls, *args, **kwargs):
+        ''' the catalog's copy of an item, made only the first time
+
+            takes the same arguments as the constructor.  Repeating a call
+            costs one dictionary lookup and no new objects.'''
+        spelling = (cls, args, tuple(sorted(kwargs.items())))
+        item = SPELLINGS.get(spelling)
+        if item is None:
+            item = cls(*args, **kwargs)
+            item = CATALOG.setdefault(item.key, item)
+            object.__setattr__(item, "isShared", True)
+            SPELLINGS[spelling] = item
+        return item
+
+    def __setattr__(self, name, value):
+        ''' shared items can't be changed, or everybody's would change '''
+        if self.__dict__.get("isShared") and CATALOG.get(self.key) is self:
+            raise AttributeError("{} is a shared {}; wrap it in an "
+                                 "ItemInstance to change it".format(
+                                     self.name, type(self).__name__))
+        object.__setattr__(self, name, value)
+
+    def instance(self, durability = None, enchantment = 0):
+        ''' a copy of this item of one's own, to wear down or enchant '''
+        return ItemInstance(self, durability, enchantment)
+
+    def __deepcopy__(self, memo):
+        ''' catalog items stay shared when a character is deep-copied
+
+            other items only hold a name and two numbers, so a shallow
+            copy is already a full one.'''
+        if CATALOG.get(self.key) is self:
+            return self
+        return copy(self)
+
+    def __copy__(self):
+        ''' a copy is never the catalog's, so it can be changed '''
+        item = object.__new__(type(self))
+        for name, value in self.__dict__.items():
+            if name != "isShared":
+                object.__setattr__(item, name, value)
+        return item
+
+    def __reduce_ex__(self, protocol):
+        ''' a pickled catalog item comes back as the catalog's, in this
+            process or another; any other item comes back as a copy '''
+        if CATALOG.get(self.key) is self:
+            return (catalog_item, self.key)
+        return object.__reduce_ex__(self, protocol)
+
+def catalog_item(kind, name, base, bonus):
+    ''' the catalog's copy of the item with these values '''
+    return kind.shared(name, base, bonus)
+
 class Weapon(Item):
     '''generic weapon class'''
     def __init__(self, name = "Fists", base = 6, bonus = 0):
@@ -23,7 +96,11 @@ class Weapon(Item):
 
     @property
     def damage(self):
-        return randint(1, self.base) + self.bonus
+        return self.roll_damage()
+
+    def roll_damage(self, dice = None):
+        ''' roll 1d(base) + bonus, with the given dice or the shared ones'''
+        return get_dice(dice).roll(self.base) + self.bonus
 
 class Armor(Item):
     '''generic armor class'''
@@ -39,11 +116,49 @@ class Potion(Item):
     def __init__(self, name = "Cure Light", base = 8, bonus = 1):
         super(Potion, self).__init__(name, base, bonus)
 
-    def use(self):
-        return randint(1, self.base) + self.bonus
+    def use(self, dice = None):
+        return get_dice(dice).roll(self.base) + self.bonus
+
+class ItemInstance(object):
+    '''one particular copy of a shared item
+
+    holds only what is different about this copy: its durability (None
+    means it never wears out) and an enchantment that adds to the bonus.
+    Everything else comes from the shared item, and its properties and
+    methods (damage, defense, use, ...) see this copy's bonus.'''
+    def __init__(self, item, durability = None, enchantment = 0):
+        self.item = item
+        self.durability = durability
+        self.enchantment = enchantment
+
+    @property
+    def bonus(self):
+        return self.item.bonus + self.enchantment
+
+    @property
+    def broken(self):
+        return self.durability is not None and self.durability <= 0
+
+    def wear(self, amount = 1):
+        '''use up some durability; returns True once the item breaks'''
+        if self.durability is not None:
+            self.durability -= amount
+        return self.broken
+
+    def __getattr__(self, name):
+        if name == "item" or name.startswith("__"):
+            # copy and pickle make an empty instance and look for special
+            # methods on it before item is set; those aren't the item's
+            raise AttributeError(name)
+        attribute = getattr(type(self.item), name, None)
+        if isinstance(attribute, property):
+            return attribute.fget(self)
+        if callable(attribute) and not isinstance(attribute, type):
+            return MethodType(attribute, self)
+        return getattr(self.item, name)
 
 if __name__ == "__main__":
-    weapon = Weapon()
+    weapon = Weapon.shared()
     print("Weapon creation test:")
     print("---------------------")
     print("name  :", weapon.name)
@@ -54,7 +169,7 @@ if __name__ == "__main__":
     print("damage:", weapon.damage)
     print()
     
-    armor = Armor()
+    armor = Armor.shared()
     print("Armor creation test:")
     print("--------------------")
     print("name   :", armor.name)
@@ -64,7 +179,7 @@ if __name__ == "__main__":
     print("defense:", armor.defense)
     print()
     
-    potion = Potion()
+    potion = Potion.shared()
     print("Potion creation test:")
     print("---------------------")
     print("name   :", potion.name)
@@ -72,6 +187,17 @@ if __name__ == "__main__":
     print("bonus  :", potion.bonus)
     print("---------------------")
     print("heal   :", potion.use())
+    print()
+
+    sword = ItemInstance(Weapon.shared(name = "Longsword", base = 8),
+                         durability = 3, enchantment = 2)
+    print("Enchanted instance test:")
+    print("---------------------")
+    print("shared :", Weapon.shared(name = "Longsword", base = 8) is sword.item)
+    print("bonus  :", sword.bonus)
+    print("attack :", sword.attack)
+    print("damage :", sword.damage)
+    print("broken :", sword.wear(3))
 
     
 
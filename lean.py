@@ -0,0 +1,351 @@
+# lean.py
+# 10/18/2026
+
+''' memory-lean versions of the character, monster and item classes
+
+    These behave like the classes in character.py, monster.py and
+    items.py (they borrow the very same methods), but:
+
+      - they use __slots__, so there is no per-instance __dict__
+      - potions are kept as counts per kind of potion, not as a list of
+        Potion objects; the count tuples are shared between everybody
+        carrying the same potions
+      - the default weapon and armor are single shared objects
+      - an empty inventory isn't allocated until something goes in it
+
+    They are meant for spawning big crowds of monsters.  Run this module
+    to see the bytes per entity for both versions.
+'''
+from copy import copy
+from rng import get_dice
+from monster import *
+
+# (class, name, base, bonus): the shared lean item
+LEAN_SHARED = {}
+
+def shared_lean_item(kind, name, base, bonus):
+    ''' the shared lean item with these values, shared now if need be '''
+    item = LEAN_SHARED.get((kind, name, base, bonus))
+    if item is None:
+        item = kind(name, base, bonus).share()
+    return item
+
+class LeanItem(object):
+    '''generic base class, without a __dict__
+
+    like catalog items, the shared defaults below are read-only.'''
+    __slots__ = ("name", "base", "bonus", "isShared")
+
+    def __init__(self, name = "nameless thing", base = 0, bonus = 0):
+        object.__setattr__(self, "isShared", False)
+        self.name = name
+        self.base = base
+        self.bonus = bonus
+
+    def __setattr__(self, name, value):
+        # isShared isn't there yet while copy or pickle fill the slots in
+        if getattr(self, "isShared", False):
+            raise AttributeError("{} is a shared {}; wrap it in an "
+                                 "ItemInstance to change it".format(
+                                     self.name, type(self).__name__))
+        object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        ''' a copy of a shared item can be changed '''
+        return type(self)(self.name, self.base, self.bonus)
+
+    def __deepcopy__(self, memo):
+        ''' shared items stay shared, like catalog items '''
+        if self.isShared:
+            return self
+        return copy(self)
+
+    def __reduce__(self):
+        ''' pickled as the arguments to make it again; a shared item comes
+            back as this process's shared one '''
+        arguments = (type(self), self.name, self.base, self.bonus)
+        if self.isShared:
+            return (shared_lean_item, arguments)
+        return (arguments[0], arguments[1:])
+
+    def share(self):
+        ''' make this item read-only, for handing to everybody '''
+        object.__setattr__(self, "isShared", True)
+        return LEAN_SHARED.setdefault((type(self), self.name, self.base,
+                                       self.bonus), self)
+
+    instance = Item.instance
+
+class LeanWeapon(LeanItem):
+    '''generic weapon class'''
+    __slots__ = ()
+
+    def __init__(self, name = "Fists", base = 6, bonus = 0):
+        super(LeanWeapon, self).__init__(name, base, bonus)
+
+    attack = Weapon.attack
+    damage = Weapon.damage
+    roll_damage = Weapon.roll_damage
+
+class LeanArmor(LeanItem):
+    '''generic armor class'''
+    __slots__ = ()
+
+    def __init__(self, name = "Leather", base = 1, bonus = 0):
+        super(LeanArmor, self).__init__(name, base, bonus)
+
+    defense = Armor.defense
+
+class LeanPotion(LeanItem):
+    '''generic healing potion class'''
+    __slots__ = ()
+
+    def __init__(self, name = "Cure Light", base = 8, bonus = 1):
+        super(LeanPotion, self).__init__(name, base, bonus)
+
+    use = Potion.use
+
+DEFAULT_WEAPON = LeanWeapon().share()
+DEFAULT_ARMOR = LeanArmor().share()
+DEFAULT_POTION = LeanPotion().share()
+
+# every potion-count tuple in use, so identical ones are shared
+STACKS = {}
+
+def intern_stacks(stacks):
+    ''' the shared copy of a tuple of (potion, count) pairs '''
+    return STACKS.setdefault(stacks, stacks)
+
+class PotionPouch(object):
+    ''' list-like view of a character's potion counts
+
+        Character.heal and potionList only need len, [-1], pop and
+        iteration, so this gives them those over the counts.'''
+    __slots__ = ("owner",)
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def __len__(self):
+        return sum(count for potion, count in self.owner.potionStacks)
+
+    def __iter__(self):
+        for potion, count in self.owner.potionStacks:
+            for i in range(count):
+                yield potion
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def pop(self):
+        stacks = list(self.owner.potionStacks)
+        if not stacks:
+            raise IndexError("pop from empty potion pouch")
+        potion, count = stacks.pop()
+        if count > 1:
+            stacks.append((potion, count - 1))
+        self.owner.potionStacks = intern_stacks(tuple(stacks))
+        return potion
+
+    def append(self, potion):
+        stacks = list(self.owner.potionStacks)
+        if stacks and stacks[-1][0] is potion:
+            stacks[-1] = (potion, stacks[-1][1] + 1)
+        else:
+            stacks.append((potion, 1))
+        self.owner.potionStacks = intern_stacks(tuple(stacks))
+
+class LeanCharacter(object):
+    ''' Base Character Class, without a __dict__ '''
+    __slots__ = ("name", "maxHealth", "health", "speed", "hunger",
+                 "stamina", "strength", "dexterity", "constitution",
+                 "intelligence", "wisdom", "charisma", "bag",
+                 "potionStacks", "weapon", "armor", "dice")
+
+    def __init__(self,
+                 name = "Average Joe",
+                 maxHealth = 10,
+                 speed = 25,
+                 stamina = 25,
+                 strength = 10,
+                 dexterity = 10,
+                 constitution = 10,
+                 intelligence = 10,
+                 wisdom = 10,
+                 charisma = 10,
+                 numberOfPotions = 2,
+                 inventory = [],
+                 weapon = "",
+                 armor = "",
+                 dice = None):
+        ''' All values represent the average score '''
+        self.name = name
+        self.maxHealth = maxHealth
+        self.health = maxHealth
+        self.speed = speed
+        self.hunger = 100 # 100 = Full, 0 = starving
+        self.stamina = stamina
+        self.strength = strength
+        self.dexterity = dexterity
+        self.constitution = constitution
+        self.intelligence = intelligence
+        self.wisdom = wisdom
+        self.charisma = charisma
+        self.bag = None
+        for item in inventory:
+            self.inventory.append(item[:])
+        if numberOfPotions:
+            self.potionStacks = intern_stacks(((DEFAULT_POTION,
+                                                numberOfPotions),))
+        else:
+            self.potionStacks = ()
+        if weapon == "":
+            self.weapon = DEFAULT_WEAPON
+        else:
+            self.weapon = weapon
+        if armor == "":
+            self.armor = DEFAULT_ARMOR
+        else:
+            self.armor = armor
+        self.dice = dice
+
+    @property
+    def inventory(self):
+        ''' the inventory list, made the first time it is needed '''
+        if self.bag is None:
+            self.bag = []
+        return self.bag
+
+    @property
+    def potions(self):
+        return PotionPouch(self)
+
+    # lean characters have no room for a cache, so derived stats are
+    # worked out every time
+    modifiers = None
+
+    @property
+    def derived(self):
+        return {}
+
+    def invalidate(self):
+        pass
+
+    strBonus = Character.strBonus
+    dexBonus = Character.dexBonus
+    conBonus = Character.conBonus
+    intBonus = Character.intBonus
+    wisBonus = Character.wisBonus
+    chaBonus = Character.chaBonus
+    potionList = Character.potionList
+    AC = Character.AC
+    attackBonus = Character.attackBonus
+    get_damaged = Character.get_damaged
+    heal = Character.heal
+    flee = Character.flee
+    attack = Character.attack
+    combat_choice = Character.combat_choice
+    __str__ = Character.__str__
+
+    @property
+    def potionCount(self):
+        ''' counts your potions, straight from the counts '''
+        return sum(count for potion, count in self.potionStacks)
+
+class LeanMonster(LeanCharacter):
+    ''' generic monster class, without a __dict__ '''
+    __slots__ = ("aggression", "awareness", "fear")
+
+    def __init__(self,
+                 name = "Generic Foe",
+                 maxHealth = 10,
+                 speed = 25,
+                 stamina = 25,
+                 strength = 8,
+                 dexterity = 8,
+                 constitution = 10,
+                 intelligence = 8,
+                 wisdom = 10,
+                 charisma = 10,
+                 numberOfPotions = 2,
+                 inventory = [],
+                 aggression = 50,
+                 awareness = 50,
+                 fear = 50,
+                 dice = None):
+        super(LeanMonster, self).__init__(name, maxHealth, speed, stamina,
+                                          strength, dexterity, constitution,
+                                          intelligence, wisdom, charisma,
+                                          numberOfPotions, inventory,
+                                          dice = dice)
+        self.aggression = aggression
+        self.awareness = awareness
+        self.fear = fear  #indicates cowardice level
+
+    combat_choice = Monster.combat_choice
+
+class LeanOrc(LeanMonster):
+    ''' generic Orc class, without a __dict__ '''
+    __slots__ = ()
+
+    def __init__(self, name = "Dorque da Orc", dice = None):
+        randint = get_dice(dice).randint
+        super(LeanOrc, self).__init__(name, maxHealth = randint(1,8),
+                                      strength = randint(8,10),
+                                      dexterity = randint(10,12),
+                                      intelligence = 8,
+                                      aggression = 80, awareness = 30,
+                                      fear = 20, dice = dice)
+
+class LeanWrathMan(LeanMonster):
+    ''' generic wrath class, without a __dict__ '''
+    __slots__ = ()
+
+    def __init__(self, name = 'Wrath', dice = None):
+        randint = get_dice(dice).randint
+        super(LeanWrathMan, self).__init__(
+            name, maxHealth = randint(20,50), speed = randint(20,30),
+            stamina = randint(20,30), strength = randint(8,15),
+            dexterity = randint(6,10), constitution = randint(6,10),
+            intelligence = randint(6,10), wisdom = randint(6,10),
+            charisma = randint(4,14), numberOfPotions = randint(0,8),
+            aggression = randint(20,70), awareness = randint(0,30),
+            fear = 0, dice = dice)
+
+    get_damaged = WrathMan.get_damaged
+
+def memory_per_entity(factory, count = 10000):
+    ''' average bytes allocated per object made by factory '''
+    import tracemalloc
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    crowd = [factory() for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+if __name__ == "__main__":
+    print("bytes per entity      before    after")
+    print("-----------------------------------------")
+    for name, before, after in (("Character", Character, LeanCharacter),
+                                ("Monster", Monster, LeanMonster),
+                                ("Orc", Orc, LeanOrc),
+                                ("WrathMan", WrathMan, LeanWrathMan),
+                                ("Weapon", Weapon, LeanWeapon),
+                                ("Armor", Armor, LeanArmor),
+                                ("Potion", Potion, LeanPotion)):
+        print("{:<18}{:>10.0f}{:>9.0f}".format(name,
+                                              memory_per_entity(before),
+                                              memory_per_entity(after)))
+
+    # the lean classes have to copy and pickle like the ones they replace,
+    # with the shared defaults staying shared
+    import pickle
+    from copy import deepcopy
+    for thing in (LeanWeapon(), DEFAULT_WEAPON, LeanCharacter(), LeanOrc()):
+        for copier in (copy, deepcopy,
+                       lambda t: pickle.loads(pickle.dumps(t))):
+            copier(thing)
+    assert deepcopy(LeanCharacter()).weapon is DEFAULT_WEAPON
+    assert pickle.loads(pickle.dumps(DEFAULT_WEAPON)) is DEFAULT_WEAPON
+    print("copies, deep copies and pickles of lean entities: ok")
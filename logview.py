@@ -0,0 +1,127 @@
+# logview.py
+# 10/18/2026
+
+''' the game log, for the Tk views
+
+    A LogView is a Text widget with its scrollbar that never does more
+    than one round of Text work per frame.  write() only queues a
+    message; every FRAME_MS the queued messages go in with a single
+    insert, the oldest lines past maxLines come off with a single
+    delete, and the view scrolls once.  So a long session stays as quick
+    as a short one, and a burst of combat messages costs one redraw.
+
+    type() is the typewriter effect: the text comes out charsPerFrame
+    letters per frame instead of one insert per letter.
+
+    A LogView can be subscribed to an EventStream directly:
+
+        log = LogView(frame)
+        controller.events.subscribe(log)
+'''
+import tkinter as tk
+from collections import deque
+
+# how often, in ms, queued text is put into the widget (about 30 a second)
+FRAME_MS = 33
+
+class LogView(tk.Frame):
+    ''' a bounded, batched, scrolling log
+
+        lines keeps the last maxLines lines of text that have been shown,
+        oldest first; the Text widget never holds more than that either.'''
+    def __init__(self, parent, maxLines = 500, charsPerFrame = 4,
+                 **textOptions):
+        tk.Frame.__init__(self, parent)
+        self.maxLines = maxLines
+        self.charsPerFrame = charsPerFrame
+        self.lines = deque(maxlen = maxLines)
+        self.partial = ""
+        self.queue = deque()    # [text, typed] pairs, in order
+        self.scheduled = None
+
+        self.text = tk.Text(self, **textOptions)
+        self.text.grid(row=0, column=0)
+        self.scroll = tk.Scrollbar(self, command=self.text.yview)
+        self.scroll.grid(row=0, column=1, sticky='nsw')
+        self.text.configure(yscrollcommand=self.scroll.set)
+
+    def write(self, text):
+        ''' queue text for the next frame; add your own newlines '''
+        self.queue.append([text, False])
+        self.schedule()
+
+    def print(self, *things):
+        ''' like print(), into the log '''
+        self.write(" ".join(str(thing) for thing in things) + "\n")
+
+    def __call__(self, event):
+        ''' EventStream sink: log the event's text '''
+        self.write(event.text + "\n")
+
+    def type(self, text):
+        ''' typewriter text: a few letters each frame '''
+        self.queue.append([text, True])
+        self.schedule()
+
+    def schedule(self):
+        if self.scheduled is None:
+            self.scheduled = self.after(FRAME_MS, self.flush)
+
+    def flush(self):
+        ''' put everything due this frame into the widget
+
+            plain text goes in whole; typed text stops the frame after
+            charsPerFrame letters, and whatever was queued after it waits
+            its turn.'''
+        self.scheduled = None
+        parts = []
+        while self.queue:
+            item = self.queue[0]
+            text, typed = item
+            if not typed:
+                parts.append(text)
+                self.queue.popleft()
+                continue
+            parts.append(text[:self.charsPerFrame])
+            if len(text) > self.charsPerFrame:
+                item[0] = text[self.charsPerFrame:]
+            else:
+                self.queue.popleft()
+            break
+        chunk = "".join(parts)
+        if chunk:
+            self.show(chunk)
+        if self.queue:
+            self.schedule()
+
+    def show(self, chunk):
+        ''' one insert, at most one delete and one scroll '''
+        lines = (self.partial + chunk).split("\n")
+        self.partial = lines.pop()
+        self.lines.extend(lines)
+        if len(lines) > self.maxLines:
+            # most of it would only be trimmed off again
+            self.text.delete("1.0", tk.END)
+            chunk = "\n".join(self.lines) + "\n" + self.partial
+        self.text.insert(tk.END, chunk)
+        # a last line that is still empty doesn't count
+        line, column = map(int, self.text.index("end-1c").split("."))
+        extra = (line if column else line - 1) - self.maxLines
+        if extra > 0:
+            self.text.delete("1.0", "{}.0".format(extra + 1))
+        self.text.see(tk.END)
+
+    def clear(self):
+        self.queue.clear()
+        self.lines.clear()
+        self.partial = ""
+        self.text.delete("1.0", tk.END)
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    log = LogView(root, maxLines = 100, width = 60, height = 20)
+    log.grid()
+    log.type("Welcome, adventurer, to the land of nowhere-ness.\n")
+    for i in range(5000):
+        log.print("message", i)
+    root.mainloop()
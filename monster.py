@@ -3,8 +3,33 @@
 # 11/16/2016
 
 ''' Monster Package '''
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
 from character import *
-from random import randint, choice
+from rng import get_dice
+
+# rolled_choice rolls three d100, so there are this many ways it can go
+AI_ROLLS = 100 ** 3
+
+@lru_cache(maxsize = 4096)
+def decision_weights(aggression, awareness, fear):
+    ''' the decision table: of the AI_ROLLS ways rolled_choice can roll,
+        how many end in attack and how many in heal (flee gets the rest)
+
+        counts the d100 triples where attack comes out on top (it wins
+        every tie), then those where heal does (it beats flee on a tie).'''
+    def upTo(limit):
+        ''' how many d100 rolls are at most limit '''
+        return min(max(limit, 0), 100)
+    attack = 0
+    heal = 0
+    for roll in range(1, 101):
+        attackValue = roll + aggression
+        attack += upTo(attackValue - awareness) * upTo(attackValue - fear)
+        healValue = roll + awareness
+        heal += upTo(healValue - aggression - 1) * upTo(healValue - fear)
+    return attack, heal
 
 class Monster(Character):
     ''' generic monster class '''
@@ -23,24 +48,73 @@ class Monster(Character):
                  inventory = [],
                  aggression = 50,
                  awareness = 50,
-                 fear = 50):
+                 fear = 50,
+                 dice = None):
         super(Monster, self).__init__(name, maxHealth, speed, stamina,
                                       strength, dexterity, constitution,
                                       intelligence, wisdom, charisma,
-                                      numberOfPotions, inventory)
+                                      numberOfPotions, inventory,
+                                      dice = dice)
         self.aggression = aggression
         self.awareness = awareness
         self.fear = fear  #indicates cowardice level
+        self.startingPotions = numberOfPotions
+
+    @staticmethod
+    def roll_stats(randint):
+        ''' the stats this kind rolls afresh for each monster, by keyword;
+            a Monster rolls nothing '''
+        return {}
+
+    def reset(self, dice = None):
+        ''' make a used monster as good as new, without a new object
+
+            re-rolls whatever roll_stats() rolls, then heals it, fills its
+            hunger and potions back up and drops its modifiers, reusing the
+            lists it already has.  Its name and anything roll_stats()
+            doesn't cover stay as they are, so a monster a factory dressed
+            up keeps that.'''
+        self.dice = dice
+        for stat, value in self.roll_stats(get_dice(dice).randint).items():
+            if stat == "numberOfPotions":
+                self.startingPotions = value
+            else:
+                setattr(self, stat, value)
+        self.health = self.maxHealth
+        self.hunger = 100
+        potions = self.potions
+        del potions[self.startingPotions:]
+        potion = Potion.shared()
+        for i in range(len(potions)):
+            potions[i] = potion
+        for i in range(len(potions), self.startingPotions):
+            potions.append(potion)
+        self.modifiers = None
+        self.invalidate()
 
     def combat_choice(self):
         ''' combat AI
 
             returns a, h, or f.  Based on aggression, awareness, morale
-            
-            '''
-        attackValue = randint(1,100) + self.aggression
-        healValue = randint(1,100) + self.awareness
-        fleeValue = randint(1,100) + self.fear
+
+            gives exactly the odds of rolled_choice, looked up in the
+            decision table, so it only needs one roll.'''
+        attack, heal = decision_weights(self.aggression, self.awareness,
+                                        self.fear)
+        roll = get_dice(self.dice).randint(1, AI_ROLLS)
+        if roll <= attack:
+            return "a"
+        elif roll <= attack + heal:
+            return "h"
+        return "f"
+
+    def rolled_choice(self):
+        ''' the original combat AI: a d100 each for attack, heal and flee,
+            each with its own score added; the highest wins '''
+        dice = get_dice(self.dice)
+        attackValue = dice.randint(1,100) + self.aggression
+        healValue = dice.randint(1,100) + self.awareness
+        fleeValue = dice.randint(1,100) + self.fear
 
         if attackValue >= healValue and attackValue >= fleeValue:
             return "a"
@@ -55,73 +129,185 @@ class Orc(Monster):
     ''' generic Orc class
 
         this class '''
-    def __init__(self, name = "Dorque da Orc"):
-        orcName = name
+    def __init__(self, name = "Dorque da Orc", dice = None):
+        super(Orc, self).__init__(name, speed = 25, stamina = 25,
+                                  constitution = 10, intelligence = 8,
+                                  wisdom = 10, charisma = 10,
+                                  numberOfPotions = 2, aggression = 80,
+                                  awareness = 30, fear = 20, dice = dice,
+                                  **self.roll_stats(get_dice(dice).randint))
+
+    @staticmethod
+    def roll_stats(randint):
         maxHealth = randint(1,8)
-        speed = 25
-        stamina = 25
         strength = randint(8,10)
         dexterity = randint(10,12)
-        constitution = 10
-        intelligence = 8
-        wisdom = 10
-        charisma = 10
-        numberOfPotions = 2
-        inventory = []
-        aggression = 80
-        awareness = 30
-        fear = 20
-        super(Orc, self).__init__(orcName, maxHealth, speed, stamina, strength,
-                                  dexterity, constitution, intelligence,
-                                  wisdom, charisma, numberOfPotions,
-                                  inventory, aggression, awareness, fear)
+        return dict(maxHealth = maxHealth, strength = strength,
+                    dexterity = dexterity)
+
 class WrathMan(Monster):
     '''generic wrath class
 
        converts half of damage taken into strength
        takes other half of damage'''
-    def __init__(self,name = 'Wrath'):
-        maxHealth = randint(20,50)
-        speed = randint(20,30)
-        stamina = randint(20,30)
-        strength = randint(8,15)
-        dexterity = randint(6,10)
-        constitution = randint(6,10)
-        intelligence = randint(6,10)
-        wisdom = randint(6,10)
-        charisma = randint(4,14)
-        numberOfPotions = randint(0,8)
-        inventory = []
-        aggression = randint(20,70)
-        awareness = randint(0,30)
-        fear = 0
-        super(WrathMan,self).__init__(name,maxHealth,speed,stamina,
-                                      strength,dexterity,constitution,
-                                      intelligence,wisdom,charisma,
-                                      numberOfPotions,inventory,
-                                      aggression,awareness,fear)
+    def __init__(self,name = 'Wrath', dice = None):
+        super(WrathMan,self).__init__(name, fear = 0, dice = dice,
+                                      **self.roll_stats(
+                                          get_dice(dice).randint))
+
+    @staticmethod
+    def roll_stats(randint):
+        # one at a time, in this order, so the same dice make the same Wrath
+        stats = {}
+        stats["maxHealth"] = randint(20,50)
+        stats["speed"] = randint(20,30)
+        stats["stamina"] = randint(20,30)
+        stats["strength"] = randint(8,15)
+        stats["dexterity"] = randint(6,10)
+        stats["constitution"] = randint(6,10)
+        stats["intelligence"] = randint(6,10)
+        stats["wisdom"] = randint(6,10)
+        stats["charisma"] = randint(4,14)
+        stats["numberOfPotions"] = randint(0,8)
+        stats["aggression"] = randint(20,70)
+        stats["awareness"] = randint(0,30)
+        return stats
+
     def get_damaged(self,damage):
         '''gets stronger and more aggressive with every hit
            takes half damage'''
         self.strength += damage//2
         self.health -= damage//2
         self.aggression += damage
+
+def halves_damage(combatant):
+    '''True for anything that takes damage the way a WrathMan does
+
+    checks the get_damaged method rather than the class, so lookalikes
+    such as the lean and entity store versions count too.'''
+    return getattr(type(combatant), "get_damaged", None) is \
+           WrathMan.get_damaged
    
 
-def random_monster():
-    '''generate a monster at random
+class SpawnTable(object):
+    '''weighted list of monster types to spawn from
 
-    create an instance of each monster here, then add that instance to
-    the listOfMonsters.  The function will pick a random instance out of
-    the list, then return it to the caller.'''
-    
-    monster = Monster()
-    orc = Orc()
-    wrath = WrathMan()# DAS
-    
-    listOfMonsters = [monster, orc, wrath]
-    return choice(listOfMonsters)
+    each entry is a class (or anything called as kind(dice = dice) that
+    makes a monster) and a whole-number weight; a kind with weight 3
+    turns up three times as often as one with weight 1.'''
+    def __init__(self, entries = ()):
+        self.kinds = []
+        self.weights = []
+        self.totals = []
+        for kind, weight in entries:
+            self.add(kind, weight)
+
+    def add(self, kind, weight = 1):
+        '''put a kind in the table, or change its weight'''
+        if weight < 0:
+            raise ValueError("spawn weights can't be negative")
+        if kind in self.kinds:
+            self.weights[self.kinds.index(kind)] = weight
+        else:
+            self.kinds.append(kind)
+            self.weights.append(weight)
+        self.totals = list(accumulate(self.weights))
+
+    def choose(self, dice = None):
+        '''pick one kind, with chances in proportion to the weights'''
+        if not self.totals or not self.totals[-1]:
+            raise ValueError("nothing to spawn from an empty table")
+        roll = get_dice(dice).randint(1, self.totals[-1])
+        return self.kinds[bisect_left(self.totals, roll)]
+
+    def __len__(self):
+        return len(self.kinds)
+
+# every monster type the game knows, by class name, and the table that
+# random_monster() spawns from
+MONSTER_TYPES = {}
+SPAWN_TABLE = SpawnTable()
+
+def register_monster(kind, weight = 1):
+    '''add a monster type to MONSTER_TYPES and the default SPAWN_TABLE'''
+    MONSTER_TYPES[kind.__name__] = kind
+    SPAWN_TABLE.add(kind, weight)
+    return kind
+
+register_monster(Monster)
+register_monster(Orc)
+register_monster(WrathMan)
+
+class Spawner(object):
+    '''makes monsters from a spawn table, reusing dead ones
+
+    spawn() builds only the kind it picks.  Monsters handed back with
+    recycle() wait in a pool, one list per table entry, and the next spawn
+    of that entry reset()s one of them instead of making a new object, so
+    a long run of encounters settles down to no new monsters at all.
+    Each monster remembers the entry it came from as spawnedAs, so one
+    made by a factory goes back in that factory's list, not its class's.'''
+    def __init__(self, table = None, dice = None):
+        self.table = table if table is not None else SPAWN_TABLE
+        self.dice = dice
+        self.pool = {}
+
+    def spawn(self, kind = None):
+        '''one monster, of the given kind or one picked from the table'''
+        if kind is None:
+            kind = self.table.choose(self.dice)
+        dead = self.pool.get(kind)
+        if dead:
+            monster = dead.pop()
+            reset = getattr(monster, "reset", None)
+            if reset is not None:
+                reset(self.dice)    # fresh stats, same object
+            else:
+                monster.__init__(dice = self.dice)
+            return monster
+        monster = kind(dice = self.dice)
+        try:
+            monster.spawnedAs = kind
+        except AttributeError:
+            pass    # slotted; recycle() goes by its class instead
+        return monster
+
+    def spawn_many(self, count, kind = None):
+        '''a list of count monsters'''
+        return [self.spawn(kind) for i in range(count)]
+
+    def recycle(self, monster):
+        '''hand a monster that's done with back for reuse'''
+        kind = getattr(monster, "spawnedAs", None) or type(monster)
+        self.pool.setdefault(kind, []).append(monster)
+
+    def recycle_dead(self, monsters):
+        '''recycle every dead monster in a list; returns the living ones'''
+        living = []
+        for monster in monsters:
+            if monster.health <= 0:
+                self.recycle(monster)
+            else:
+                living.append(monster)
+        return living
+
+    def prefill(self, count, kind = None):
+        '''make count monsters ahead of time and leave them in the pool'''
+        for monster in self.spawn_many(count, kind):
+            self.recycle(monster)
+
+    @property
+    def pooled(self):
+        '''how many monsters are waiting to be reused'''
+        return sum(len(dead) for dead in self.pool.values())
+
+def random_monster(dice = None):
+    '''generate a monster at random
 
+    picks a type from SPAWN_TABLE, where Monster, Orc and WrathMan are
+    equally likely, and builds just that one.  The monster rolls its stats
+    with the given dice (None means the shared dice).'''
+    return SPAWN_TABLE.choose(dice)(dice = dice)
 
 if __name__ == "__main__":
 
@@ -0,0 +1,367 @@
+# replay.py
+# 10/18/2026
+
+''' compact binary combat replays
+
+    record() runs a fight through GameEngine.combat and keeps it as a
+    Replay: the seed every roll came from, the two combatants as they were
+    when the fight started, and a packed log of what happened.  Each
+    action costs one byte plus the numbers it needs (a d20 roll, damage
+    or healing), so the log of a typical fight is a couple dozen bytes and
+    the whole replay, combatants included, a couple hundred; the text it
+    prints runs to kilobytes and can't be fought again.
+
+        result, replay = record(hero, Orc(), seed = 1234)
+        data = replay.to_bytes()
+        ...
+        player = ReplayPlayer(Replay.from_bytes(data))
+        player.play()                  # prints the fight again
+        player.play(until = 3)         # where things stood after round 3
+        player.verify()                # re-run it from the seed
+
+    play() only reads the log, so it needs no dice and is as fast as
+    the log is short.  rerun() fights the whole thing again from the seed
+    with fresh copies of the combatants: monsters use their AI with the
+    same dice, and plain Characters (the player) make the choices that
+    were recorded.  A chooser that rolls dice of its own can't be re-run,
+    but its fights still play back.
+
+    write_replays() and read_replays() store any number of replays back to
+    back in one file.
+'''
+import struct
+from events import *
+from GameEngine import *
+from rng import Dice, DICE
+
+MAGIC = b"GERP"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBQ")
+# kind, then maxHealth, health, speed, stamina, hunger, the six ability
+# scores, potionCount, aggression, awareness and fear
+STATS = struct.Struct("<B15h")
+ITEM = struct.Struct("<hh")
+LENGTH = struct.Struct("<I")
+
+# what each value of a combatant's kind byte rebuilds into
+KINDS = (Character, Monster, Orc, WrathMan)
+
+# the numbers stored after each kind of action; round, flee and no potion
+# events need nothing but their code byte, and deaths aren't stored since
+# playback can see them coming
+PAYLOADS = {HIT: struct.Struct("<Bh"),
+            MISS: struct.Struct("<B"),
+            FUMBLE: struct.Struct("<B"),
+            HEAL: struct.Struct("<h")}
+
+# the combat choice that leads to each kind of action
+CHOICES = {HIT: "a", MISS: "a", FUMBLE: "a", HEAL: "h", NO_POTION: "h",
+           FLEE: "f", FLEE_FAILED: "f"}
+
+def kind_of(combatant):
+    ''' the kind byte for a combatant
+
+        goes by behaviour, so the lean and entity store lookalikes are
+        stored as the real thing.'''
+    if halves_damage(combatant):
+        return 3
+    if isinstance(combatant, Orc):
+        return 2
+    if hasattr(combatant, "aggression"):
+        return 1
+    return 0
+
+def pack_name(name):
+    data = str(name).encode("utf-8")[:255]
+    return bytes((len(data),)) + data
+
+def unpack_name(data, offset):
+    length = data[offset]
+    offset += 1
+    return data[offset:offset + length].decode("utf-8", "replace"), \
+           offset + length
+
+def pack_item(item):
+    return ITEM.pack(item.base, item.bonus) + pack_name(item.name)
+
+def unpack_item(cls, data, offset):
+    base, bonus = ITEM.unpack_from(data, offset)
+    name, offset = unpack_name(data, offset + ITEM.size)
+    return cls.shared(name = name, base = base, bonus = bonus), offset
+
+def pack_combatant(combatant):
+    ''' a combatant's starting state, as bytes '''
+    potion = combatant.potions[-1] if combatant.potions else Potion.shared()
+    return STATS.pack(kind_of(combatant), combatant.maxHealth,
+                      combatant.health, combatant.speed, combatant.stamina,
+                      combatant.hunger, combatant.strength,
+                      combatant.dexterity, combatant.constitution,
+                      combatant.intelligence, combatant.wisdom,
+                      combatant.charisma, combatant.potionCount,
+                      getattr(combatant, "aggression", 0),
+                      getattr(combatant, "awareness", 0),
+                      getattr(combatant, "fear", 0)) + \
+           pack_name(combatant.name) + pack_item(combatant.weapon) + \
+           pack_item(combatant.armor) + pack_item(potion)
+
+def unpack_combatant(data, offset):
+    ''' rebuild a combatant from pack_combatant's bytes
+
+        returns the combatant and the offset just past it.'''
+    values = STATS.unpack_from(data, offset)
+    offset += STATS.size
+    name, offset = unpack_name(data, offset)
+    weapon, offset = unpack_item(Weapon, data, offset)
+    armor, offset = unpack_item(Armor, data, offset)
+    potion, offset = unpack_item(Potion, data, offset)
+    kind, maxHealth, health, speed, stamina, hunger, strength, dexterity, \
+          constitution, intelligence, wisdom, charisma, potionCount, \
+          aggression, awareness, fear = values
+    # the throwaway dice keep Orc and WrathMan from rolling on anybody's
+    # real dice; every stat they roll is overwritten straight away
+    combatant = KINDS[kind](name = name, dice = Dice(0))
+    combatant.maxHealth = maxHealth
+    combatant.health = health
+    combatant.speed = speed
+    combatant.stamina = stamina
+    combatant.hunger = hunger
+    combatant.strength = strength
+    combatant.dexterity = dexterity
+    combatant.constitution = constitution
+    combatant.intelligence = intelligence
+    combatant.wisdom = wisdom
+    combatant.charisma = charisma
+    combatant.potions = [potion] * potionCount
+    combatant.weapon = weapon
+    combatant.armor = armor
+    if kind:
+        combatant.aggression = aggression
+        combatant.awareness = awareness
+        combatant.fear = fear
+    combatant.dice = None
+    return combatant, offset
+
+class Replay(object):
+    ''' one recorded fight
+
+        seed is where every roll came from, start holds the two packed
+        combatants and actions is the packed log.'''
+    def __init__(self, seed, start, actions = b""):
+        self.seed = seed
+        self.start = bytes(start)
+        self.actions = bytearray(actions)
+
+    def to_bytes(self):
+        return HEADER.pack(MAGIC, VERSION, self.seed) + self.start + \
+               bytes(self.actions)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a combat replay")
+        if version != VERSION:
+            raise ValueError("unknown replay version: " + str(version))
+        offset = HEADER.size
+        for i in range(2):
+            combatant, offset = unpack_combatant(data, offset)
+        return cls(seed, data[HEADER.size:offset], data[offset:])
+
+    def combatants(self):
+        ''' fresh copies of both combatants as the fight started '''
+        one, offset = unpack_combatant(self.start, 0)
+        two, offset = unpack_combatant(self.start, offset)
+        return one, two
+
+    def records(self):
+        ''' every logged action as (kind, side, amount, roll) '''
+        actions = self.actions
+        offset = 0
+        while offset < len(actions):
+            code = actions[offset]
+            offset += 1
+            kind = code & 15
+            side = code >> 4
+            amount = 0
+            roll = 0
+            payload = PAYLOADS.get(kind)
+            if payload:
+                values = payload.unpack_from(actions, offset)
+                offset += payload.size
+                if kind == HIT:
+                    roll, amount = values
+                elif kind == HEAL:
+                    amount = values[0]
+                else:
+                    roll = values[0]
+            yield kind, side, amount, roll
+
+    def __len__(self):
+        ''' size of the replay in bytes '''
+        return HEADER.size + len(self.start) + len(self.actions)
+
+class ReplayRecorder(object):
+    ''' an EventStream sink that packs a fight's events into a Replay '''
+    def __init__(self, one, two, seed):
+        self.sides = (one, two)
+        self.replay = Replay(seed, pack_combatant(one) + pack_combatant(two))
+
+    def __call__(self, event):
+        if event.kind == DEATH:
+            return
+        side = 1 if event.actor is self.sides[1] else 0
+        self.replay.actions.append(event.kind | side << 4)
+        if event.kind == HIT:
+            self.replay.actions += PAYLOADS[HIT].pack(event.roll,
+                                                      event.amount)
+        elif event.kind == HEAL:
+            self.replay.actions += PAYLOADS[HEAL].pack(event.amount)
+        elif event.kind in PAYLOADS:
+            self.replay.actions += PAYLOADS[event.kind].pack(event.roll)
+
+def seeded_combat(one, two, seed, **options):
+    ''' run combat() with every roll coming from Dice(seed)
+
+        initiative, one and two each get their own stream of the seed.
+        Their own dice are put back afterwards.'''
+    master = Dice(seed)
+    initiative = master.stream()
+    oldDice = (one.dice, two.dice)
+    one.dice = master.stream()
+    two.dice = master.stream()
+    try:
+        return combat(one, two, dice = initiative, **options)
+    finally:
+        one.dice, two.dice = oldDice
+
+def record(one, two, seed = None, output = None, chooser = None,
+           maxRounds = None, events = None):
+    ''' fight one and two like combat() does, and record it
+
+        seed picks the rolls; leave it None for a fresh one from the
+        shared dice.  events, if given, also gets every event.  Returns
+        the CombatResult and the Replay.'''
+    if seed is None:
+        seed = DICE.random.getrandbits(64)
+    recorder = ReplayRecorder(one, two, seed)
+    stream = EventStream()
+    stream.subscribe(recorder)
+    if events is not None:
+        stream.subscribe(events.emit)
+    result = seeded_combat(one, two, seed, output = output,
+                           chooser = chooser, maxRounds = maxRounds,
+                           events = stream)
+    return result, recorder.replay
+
+class ReplayPlayer(object):
+    ''' plays back or re-runs a Replay '''
+    def __init__(self, replay):
+        self.replay = replay
+
+    def play(self, output = print, events = None, until = None):
+        ''' step through the log, without rolling any dice
+
+            output and events get the fight's events just as they did from
+            combat().  until stops after that many rounds, to fast-forward
+            to the middle of a fight.  Returns a CombatResult, whose one
+            and two show where everybody stood.'''
+        one, two = self.replay.combatants()
+        sides = (one, two)
+        result = CombatResult(one, two)
+
+        publish = publisher(output, events)
+
+        for kind, side, amount, roll in self.replay.records():
+            if kind == ROUND:
+                if until is not None and result.rounds >= until:
+                    break
+                result.rounds += 1
+                publish(CombatEvent(ROUND, amount = result.rounds))
+                continue
+            actor = sides[side]
+            target = sides[1 - side]
+            damage = 0
+            death = None
+            if kind == HIT:
+                healthBefore = target.health
+                target.get_damaged(amount)
+                damage = healthBefore - target.health
+                if target.health <= 0:
+                    death = CombatEvent(DEATH, target, actor)
+            elif kind == HEAL:
+                actor.potions.pop()
+                actor.health = min(actor.health + amount, actor.maxHealth)
+            message = CombatEvent(kind, actor, target, amount, roll)
+            score_action(result, actor, target, message, damage, death)
+            publish(message)
+            if death:
+                publish(death)
+        return result
+
+    def recorded_chooser(self):
+        ''' a chooser that repeats the recorded choices of the players
+
+            monsters still ask their AI, so their dice roll just as they
+            did the first time.'''
+        choices = [CHOICES[kind] for kind, side, amount, roll
+                   in self.replay.records() if kind in CHOICES]
+        choices.reverse()
+
+        def chooser(current):
+            choice = choices.pop() if choices else "a"
+            if type(current).combat_choice is not Character.combat_choice:
+                return current.combat_choice()
+            return choice
+        return chooser
+
+    def rerun(self, output = None, maxRounds = None, events = None):
+        ''' fight it all over again from the seed
+
+            returns the CombatResult and the Replay of the new fight.'''
+        one, two = self.replay.combatants()
+        return record(one, two, self.replay.seed, output = output,
+                      chooser = self.recorded_chooser(),
+                      maxRounds = maxRounds, events = events)
+
+    def verify(self):
+        ''' True if re-running the fight gives exactly the same log '''
+        rounds = sum(1 for kind, side, amount, roll in self.replay.records()
+                     if kind == ROUND)
+        result, replay = self.rerun(maxRounds = rounds)
+        return replay.to_bytes() == self.replay.to_bytes()
+
+def write_replays(file, replays):
+    ''' write replays to a binary file, each one prefixed by its length '''
+    for replay in replays:
+        data = replay.to_bytes()
+        file.write(LENGTH.pack(len(data)))
+        file.write(data)
+
+def read_replays(file):
+    ''' every replay in a file written by write_replays, one at a time '''
+    while True:
+        prefix = file.read(LENGTH.size)
+        if len(prefix) < LENGTH.size:
+            return
+        yield Replay.from_bytes(file.read(LENGTH.unpack(prefix)[0]))
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from simulation import auto_choice
+    hero = Character(name = "Mr. Peebles")
+    result, replay = record(hero, WrathMan(), seed = 7, chooser = auto_choice)
+    print("recorded", result.rounds, "rounds in", len(replay), "bytes")
+    player = ReplayPlayer(replay)
+    player.play()
+    print("re-runs the same:", player.verify())
+
+    start = perf_counter()
+    replays = [record(Character(name = "Mr. Peebles"), Orc(), seed = i,
+                      chooser = auto_choice)[1] for i in range(2000)]
+    print("recorded 2000 fights in {:.2f} s, {:.1f} bytes each".format(
+        perf_counter() - start, sum(map(len, replays)) / len(replays)))
+    start = perf_counter()
+    for replay in replays:
+        ReplayPlayer(replay).play(output = None)
+    print("played them back in {:.2f} s".format(perf_counter() - start))
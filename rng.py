@@ -0,0 +1,149 @@
+# rng.py
+# 10/18/2026
+
+''' dice rolling service for the game
+
+    Everything in the game that rolls dice goes through a Dice object
+    instead of the random module's hidden global generator, so a fight, a
+    character or a whole run can be replayed from a seed.
+
+    Characters, monsters and fights take a dice argument.  When it is left
+    as None they fall back to the shared DICE, which is looked up at roll
+    time, so reseeding DICE (or swapping it with set_dice) affects
+    everything that has no dice of its own.
+
+        dice = Dice(seed = 42)
+        orc = Orc(dice = dice.stream())   # the orc gets its own stream
+
+    BufferedDice hands out rolls from big pre-drawn blocks, cut out of one
+    getrandbits() call each, which is cheaper per roll than a randint call
+    in hot loops like combat.
+'''
+from array import array
+from random import Random
+
+class Dice(object):
+    ''' a seedable stream of die rolls '''
+    def __init__(self, seed = None):
+        self.random = Random(seed)
+
+    def seed(self, seed = None):
+        ''' restart the stream from a new seed '''
+        self.random.seed(seed)
+
+    def randint(self, low, high):
+        ''' a whole number from low to high, inclusive '''
+        return self.random.randint(low, high)
+
+    def roll(self, sides):
+        ''' roll one die with the given number of sides '''
+        return self.random.randint(1, sides)
+
+    def choice(self, sequence):
+        ''' pick one item out of a sequence '''
+        return sequence[self.randint(0, len(sequence) - 1)]
+
+    def stream(self):
+        ''' make an independent child stream, seeded from this one
+
+            use this to give each fight or each entity its own dice; the
+            children are still reproducible from the parent's seed.'''
+        return type(self)(self.random.getrandbits(64))
+
+# an array typecode for 4-byte unsigned words
+WORD = "I" if array("I").itemsize == 4 else "L"
+
+class BufferedDice(Dice):
+    ''' Dice that pre-draws blocks of rolls
+
+        the first roll in a given range draws about blockSize results for
+        that range at once; later rolls just pop the next one off the
+        block.'''
+    def __init__(self, seed = None, blockSize = 4096):
+        super(BufferedDice, self).__init__(seed)
+        self.blockSize = blockSize
+        self.buffers = {}
+        self.tables = {}
+
+    def seed(self, seed = None):
+        super(BufferedDice, self).seed(seed)
+        self.buffers = {}
+
+    def refill(self, low, high):
+        ''' draw a new block of rolls for one range
+
+            the whole block comes from one getrandbits() call, cut into a
+            byte per roll when the results fit in a byte (every die in the
+            game) and four bytes otherwise.  A field that would favour the
+            low numbers is thrown away rather than wrapped round, so every
+            result stays equally likely.'''
+        span = high - low + 1
+        if span < 1:
+            raise ValueError("empty range for randint({}, {})".format(low,
+                                                                     high))
+        count = self.blockSize
+        if 0 <= low and high < 256:
+            tables = self.tables.get((low, high))
+            if tables is None:
+                # each byte goes straight to its roll, or is deleted
+                limit = 256 - 256 % span
+                tables = (bytes(low + b % span if b < limit else 0
+                                for b in range(256)),
+                          bytes(range(limit, 256)))
+                self.tables[(low, high)] = tables
+            data = self.random.getrandbits(8 * count).to_bytes(count, "little")
+            block = list(data.translate(*tables))
+        elif span <= 2 ** 32:
+            limit = 2 ** 32 - 2 ** 32 % span
+            words = array(WORD, self.random.getrandbits(32 * count).to_bytes(
+                4 * count, "little"))
+            block = [low + word % span for word in words if word < limit]
+        else:
+            randint = self.random.randint
+            block = [randint(low, high) for i in range(count)]
+        if not block:
+            # a tiny block can lose every field
+            return self.refill(low, high)
+        self.buffers[(low, high)] = block
+        return block
+
+    def randint(self, low, high):
+        try:
+            return self.buffers[(low, high)].pop()
+        except (KeyError, IndexError):
+            return self.refill(low, high).pop()
+
+    def roll(self, sides):
+        try:
+            return self.buffers[(1, sides)].pop()
+        except (KeyError, IndexError):
+            return self.refill(1, sides).pop()
+
+    def stream(self):
+        return type(self)(self.random.getrandbits(64), self.blockSize)
+
+DICE = Dice()
+
+def get_dice(dice = None):
+    ''' the dice to roll with: the given ones, or else the shared DICE '''
+    if dice is None:
+        return DICE
+    return dice
+
+def set_dice(dice):
+    ''' replace the shared DICE used by everything without its own dice '''
+    global DICE
+    DICE = dice
+
+if __name__ == "__main__":
+    from time import perf_counter
+    for dice in (Dice(1), BufferedDice(1)):
+        for sides in (20, 100 ** 3):
+            start = perf_counter()
+            total = 0
+            for i in range(1000000):
+                total += dice.roll(sides)
+            elapsed = perf_counter() - start
+            print(type(dice).__name__,
+                  "mean d{}: {:.3f}".format(sides, total / 1000000),
+                  " {:.0f} ns/roll".format(elapsed * 1e9 / 1000000))
@@ -0,0 +1,398 @@
+# savegame.py
+# 10/18/2026
+
+''' saving and loading the game
+
+    A save file holds the player, where they are in the world, and any
+    monsters the game wants kept (the one being fought, say), packed
+    small: a Character with its gear comes to about 120 bytes.
+
+        saves = SaveGame("game.save")
+        saves.save(player, position, monsters)  # only writes if changed
+        ...
+        player, position, monsters = saves.load(dice = dice)
+
+    Every character and monster goes in with its class name, so an Orc
+    comes back an Orc and a WrathMan keeps its strength, aggression and
+    half-damage.  Anything in MONSTER_TYPES loads the same way.
+
+    save() packs the state on the calling thread, which is quick, and
+    hands the bytes to a SaveWriter thread that puts them on disk, so the
+    Tk loop never waits on the disk.  If the bytes are the same as last
+    time, nothing is written at all, so autosaving every few seconds costs
+    nothing while the player stands still.  A save replaces the old file
+    in one step, so a crash halfway leaves the old save whole.
+
+    The file is a header and then sections, each a tag byte and a length;
+    a loader skips the tags it doesn't know, so newer saves with more in
+    them still load here.
+'''
+import os
+import struct
+import threading
+from monster import *
+from replay import pack_name, unpack_name
+from rng import Dice
+
+MAGIC = b"GESV"
+VERSION = 2     # 2 added LOOSE_RECORD
+
+HEADER = struct.Struct("<4sBH")         # magic, version, sections
+SECTION = struct.Struct("<BI")          # tag, length
+# maxHealth, health, speed, stamina, hunger, the six ability scores, then
+# aggression, awareness and fear (0 for characters)
+STATS = struct.Struct("<11h3i")
+POSITION = struct.Struct("<qqq")
+COUNT = struct.Struct("<H")
+ITEM = struct.Struct("<hh")
+INSTANCE = struct.Struct("<Bih")        # has durability, durability,
+                                        # enchantment
+PAIR = struct.Struct("<i")
+
+# section tags
+PLAYER, PLACE, MONSTER = 1, 2, 3
+
+# item record tags; an ITEM_RECORD is a shared catalog item and a
+# LOOSE_RECORD one of its own that can be changed
+ITEM_RECORD, INSTANCE_RECORD, PAIR_RECORD, LOOSE_RECORD = range(4)
+
+ITEM_TYPES = {"Item": Item, "Weapon": Weapon, "Armor": Armor,
+              "Potion": Potion}
+
+def character_types():
+    ''' every class a saved character can be, by name '''
+    types = {"Character": Character}
+    types.update(MONSTER_TYPES)
+    return types
+
+def pack_item(item):
+    ''' an item, shared or not, an ItemInstance or a [name, count] pair '''
+    if isinstance(item, ItemInstance):
+        return bytes((INSTANCE_RECORD,)) + INSTANCE.pack(
+            item.durability is not None, item.durability or 0,
+            item.enchantment) + pack_item(item.item)
+    if isinstance(item, Item):
+        tag = ITEM_RECORD if CATALOG.get(item.key) is item else LOOSE_RECORD
+        return bytes((tag,)) + pack_name(type(item).__name__) + \
+               ITEM.pack(item.base, item.bonus) + pack_name(item.name)
+    name, count = item
+    return bytes((PAIR_RECORD,)) + pack_name(name) + PAIR.pack(count)
+
+def unpack_item(data, offset):
+    tag = data[offset]
+    offset += 1
+    if tag == INSTANCE_RECORD:
+        hasDurability, durability, enchantment = INSTANCE.unpack_from(data,
+                                                                      offset)
+        item, offset = unpack_item(data, offset + INSTANCE.size)
+        return ItemInstance(item, durability if hasDurability else None,
+                            enchantment), offset
+    if tag == ITEM_RECORD or tag == LOOSE_RECORD:
+        typeName, offset = unpack_name(data, offset)
+        base, bonus = ITEM.unpack_from(data, offset)
+        name, offset = unpack_name(data, offset + ITEM.size)
+        kind = ITEM_TYPES[typeName]
+        if tag == LOOSE_RECORD:
+            return kind(name = name, base = base, bonus = bonus), offset
+        return kind.shared(name = name, base = base, bonus = bonus), offset
+    if tag == PAIR_RECORD:
+        name, offset = unpack_name(data, offset)
+        return [name, PAIR.unpack_from(data, offset)[0]], offset + PAIR.size
+    raise ValueError("unknown item record " + str(tag))
+
+def pack_potions(potions):
+    ''' potions in runs, since they're nearly always all the same '''
+    runs = []
+    for potion in potions:
+        if runs and runs[-1][1] is potion:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, potion])
+    return COUNT.pack(len(runs)) + b"".join(
+        COUNT.pack(count) + pack_item(potion) for count, potion in runs)
+
+def unpack_potions(data, offset):
+    potions = []
+    runs, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for i in range(runs):
+        count, = COUNT.unpack_from(data, offset)
+        potion, offset = unpack_item(data, offset + COUNT.size)
+        potions.extend([potion] * count)
+    return potions, offset
+
+def pack_character(character):
+    ''' a Character or Monster, with everything it carries, as bytes '''
+    return pack_name(type(character).__name__) + \
+           pack_name(character.name) + \
+           STATS.pack(character.maxHealth, character.health,
+                      character.speed, character.stamina, character.hunger,
+                      character.strength, character.dexterity,
+                      character.constitution, character.intelligence,
+                      character.wisdom, character.charisma,
+                      getattr(character, "aggression", 0),
+                      getattr(character, "awareness", 0),
+                      getattr(character, "fear", 0)) + \
+           pack_item(character.weapon) + pack_item(character.armor) + \
+           pack_potions(character.potions) + \
+           COUNT.pack(len(character.inventory)) + \
+           b"".join(pack_item(item) for item in character.inventory)
+
+def unpack_character(data, offset = 0, dice = None):
+    ''' rebuild what pack_character packed, rolling with dice from now on
+
+        returns the character and the offset just past it.'''
+    typeName, offset = unpack_name(data, offset)
+    name, offset = unpack_name(data, offset)
+    maxHealth, health, speed, stamina, hunger, strength, dexterity, \
+        constitution, intelligence, wisdom, charisma, aggression, \
+        awareness, fear = STATS.unpack_from(data, offset)
+    offset += STATS.size
+    kind = character_types().get(typeName)
+    if kind is None:
+        raise ValueError("no such character type: " + typeName)
+    # thrown-away dice for the stats Orc and WrathMan roll for themselves
+    character = kind(name = name, dice = Dice(0))
+    character.dice = dice
+    character.maxHealth = maxHealth
+    character.health = health
+    character.speed = speed
+    character.stamina = stamina
+    character.hunger = hunger
+    character.strength = strength
+    character.dexterity = dexterity
+    character.constitution = constitution
+    character.intelligence = intelligence
+    character.wisdom = wisdom
+    character.charisma = charisma
+    if isinstance(character, Monster):
+        character.aggression = aggression
+        character.awareness = awareness
+        character.fear = fear
+    character.weapon, offset = unpack_item(data, offset)
+    character.armor, offset = unpack_item(data, offset)
+    character.potions, offset = unpack_potions(data, offset)
+    count, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    character.inventory = []
+    for i in range(count):
+        item, offset = unpack_item(data, offset)
+        character.inventory.append(item)
+    return character, offset
+
+def pack_save(player, position = None, monsters = ()):
+    ''' a whole save file's bytes '''
+    sections = [(PLAYER, pack_character(player))]
+    if position is not None:
+        sections.append((PLACE, POSITION.pack(*position)))
+    for monster in monsters:
+        sections.append((MONSTER, pack_character(monster)))
+    return HEADER.pack(MAGIC, VERSION, len(sections)) + b"".join(
+        SECTION.pack(tag, len(body)) + body for tag, body in sections)
+
+def unpack_save(data, dice = None):
+    ''' (player, position, monsters) from a save file's bytes
+
+        position is None if the save didn't have one.  A file that isn't
+        a save, or is cut short, raises ValueError.'''
+    try:
+        return read_sections(data, dice)
+    except (struct.error, IndexError, KeyError) as error:
+        raise ValueError("save file is damaged: " + str(error))
+
+def read_sections(data, dice):
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a save file")
+    if version > VERSION:
+        raise ValueError("save file version {} is newer than this game"
+                         .format(version))
+    offset = HEADER.size
+    player = None
+    position = None
+    monsters = []
+    for i in range(count):
+        tag, length = SECTION.unpack_from(data, offset)
+        offset += SECTION.size
+        if tag == PLAYER:
+            player = unpack_character(data, offset, dice)[0]
+        elif tag == PLACE:
+            position = list(POSITION.unpack_from(data, offset))
+        elif tag == MONSTER:
+            monsters.append(unpack_character(data, offset, dice)[0])
+        offset += length
+    if player is None:
+        raise ValueError("save file has no player in it")
+    return player, position, monsters
+
+class SaveWriter(threading.Thread):
+    ''' puts save files on disk, off the calling thread
+
+        only the newest bytes for each path are kept, so if saves come in
+        faster than the disk takes them, the ones in between are skipped.
+        A write can bring a before() to run on this thread first, for
+        anything that has to be on disk ahead of the file.
+        written holds the bytes last put on disk for each path, and errors
+        whatever went wrong writing a path since anybody last asked.'''
+    def __init__(self):
+        super(SaveWriter, self).__init__(daemon = True)
+        self.pending = {}
+        self.writing = None     # (path, bytes) on their way to disk
+        self.written = {}
+        self.errors = {}
+        self.closing = False
+        self.ready = threading.Condition()
+        self.start()
+
+    def write(self, path, data, before = None):
+        with self.ready:
+            self.pending[path] = (data, before)
+            self.ready.notify_all()
+
+    def is_saved(self, path, data):
+        ''' True if these bytes are on disk at path, or on their way '''
+        with self.ready:
+            if path in self.pending:
+                return self.pending[path][0] == data
+            if self.writing is not None and self.writing[0] == path:
+                return self.writing[1] == data
+            return self.written.get(path) == data
+
+    def wrote(self, path, data):
+        ''' note bytes known to be on disk already, say just loaded '''
+        with self.ready:
+            self.written[path] = data
+
+    def take_error(self, path):
+        ''' what went wrong writing path, if anything, just the once '''
+        with self.ready:
+            return self.errors.pop(path, None)
+
+    def run(self):
+        while True:
+            with self.ready:
+                while not self.pending and not self.closing:
+                    self.ready.wait()
+                if not self.pending:
+                    return
+                path, (data, before) = self.pending.popitem()
+                self.writing = (path, data)
+            try:
+                if before is not None:
+                    before()
+                self.write_file(path, data)
+                error = None
+            except OSError as problem:
+                error = problem
+            with self.ready:
+                if error is None:
+                    self.written[path] = data
+                else:
+                    self.errors[path] = error
+                    self.written.pop(path, None)
+                self.writing = None
+                self.ready.notify_all()
+
+    def write_file(self, path, data):
+        ''' write next to the old file, then swap it in '''
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    def wait(self):
+        ''' block until everything handed in so far is on disk '''
+        with self.ready:
+            while self.pending or self.writing is not None:
+                self.ready.wait()
+
+    def close(self):
+        ''' finish what's pending and stop '''
+        with self.ready:
+            self.closing = True
+            self.ready.notify_all()
+        self.join()
+
+class SaveGame(object):
+    ''' one save file, written by a SaveWriter when the state has changed
+
+        "changed" is measured against what the writer has actually put on
+        disk (or is about to), so a save that failed is tried again next
+        time.  saved is the bytes of the last save handed to the writer,
+        or loaded; it goes back to None when a write fails.'''
+    def __init__(self, path, writer = None):
+        self.path = path
+        self.writer = writer if writer is not None else SaveWriter()
+        self.saved = None
+        self.saves = 0
+        self.skipped = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def check(self):
+        ''' raise the OSError from the last write, if it failed '''
+        error = self.writer.take_error(self.path)
+        if error is not None:
+            self.saved = None
+            raise error
+
+    def save(self, player, position = None, monsters = (), before = None):
+        ''' save, unless nothing has changed; True if it was saved
+
+            before, if given, is called on the writer's thread just ahead
+            of writing the file, such as a ChunkStore's sync.
+
+            raises the OSError of an earlier save that didn't make it to
+            disk; the next call tries again.'''
+        self.check()
+        data = pack_save(player, position, monsters)
+        if self.writer.is_saved(self.path, data):
+            self.skipped += 1
+            return False
+        self.saved = data
+        self.writer.write(self.path, data, before)
+        self.saves += 1
+        return True
+
+    def load(self, dice = None):
+        ''' (player, position, monsters) from the file; every one of them
+            rolls with dice (None means the shared dice) '''
+        self.writer.wait()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        loaded = unpack_save(data, dice)
+        self.saved = data
+        self.writer.wrote(self.path, data)
+        return loaded
+
+    def close(self):
+        ''' finish writing; raises the OSError if the last write failed '''
+        self.writer.close()
+        self.check()
+
+if __name__ == "__main__":
+    import tempfile
+    from time import perf_counter
+    hero = Character(name = "Mr. Peebles", weapon = Weapon.shared("Sword", 8),
+                     inventory = [["rope", 1]])
+    hero.inventory.append(ItemInstance(Armor.shared("Chain", 5), 20, 1))
+    hero.potions.pop()
+    wrath = WrathMan(dice = Dice(3))
+    wrath.get_damaged(6)
+    monsters = [Orc(dice = Dice(2)), wrath]
+    saves = SaveGame(os.path.join(tempfile.mkdtemp(), "game.save"))
+    saves.save(hero, [3, -4, 1], monsters)
+    print(len(saves.saved), "bytes")
+    start = perf_counter()
+    for i in range(10000):
+        saves.save(hero, [3, -4, 1], monsters)
+    print("10000 unchanged autosaves in {:.2f} s, {} written".format(
+        perf_counter() - start, saves.saves))
+    player, position, monsters = saves.load()
+    print(player)
+    print(position, [(type(m).__name__, m.strength, m.aggression)
+                     for m in monsters])
+    saves.close()
@@ -0,0 +1,265 @@
+# server.py
+# 10/18/2026
+
+''' asyncio game server, for many players at once
+
+    Every connection is a Session with its own Character, its own dice and
+    its own place in the world.  The protocol is plain lines of text, so
+    telnet or nc will do as a client:
+
+        python server.py 8023
+        nc localhost 8023
+
+    A player types the Travel verbs (north, south, east, west, up, down,
+    potion, info, save, help, search), fight to take on a monster next to
+    them (or a random one), or quit.  In a fight they answer each turn
+    with a, h or f.  All the players share one World.  save keeps a
+    player's character and place in saveDir, one file per name, and
+    quitting saves too; a player who comes back with the same name carries
+    on from there.  Saves go to disk on a SaveWriter thread, so they don't
+    hold up the loop either.
+
+    Nothing in a session ever blocks the loop: reads are awaited, every
+    write is followed by a drain() so a slow client only slows itself
+    down, lines longer than lineLimit end the session, and so does going
+    quiet for idleTimeout seconds.  One process holds thousands of
+    sessions.
+'''
+import asyncio
+import os
+import sys
+from asynccombat import *
+from rng import Dice
+from savegame import SaveGame, SaveWriter
+from world import *
+
+HELP = "north south east west up down potion info save search fight quit"
+
+class SessionClosed(Exception):
+    ''' the other end hung up, went quiet or sent something unreadable '''
+
+class Session(object):
+    ''' one connected player and everything that belongs to them '''
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.dice = server.dice.stream()
+        self.player = None
+        self.saves = None
+        self.position = [0, 0, 0]
+        self.outbox = []
+        self.events = EventStream()
+        self.events.subscribe(self.say)
+
+    def say(self, text):
+        ''' queue a line (or a CombatEvent) to go out with the next flush '''
+        self.outbox.append(str(text))
+
+    async def flush(self):
+        ''' send everything queued, and wait until the client keeps up '''
+        if self.writer.is_closing():
+            raise SessionClosed()
+        if self.outbox:
+            self.writer.write(("\n".join(self.outbox) + "\n").encode())
+            self.outbox = []
+        await self.writer.drain()
+
+    async def ask(self, prompt):
+        ''' send a prompt and wait for the answer line '''
+        self.outbox.append(prompt)
+        if self.writer.is_closing():
+            raise SessionClosed()
+        self.writer.write(("\n".join(self.outbox)).encode())
+        self.outbox = []
+        try:
+            await self.writer.drain()
+            line = await asyncio.wait_for(self.reader.readline(),
+                                          self.server.idleTimeout)
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            raise SessionClosed()
+        if not line:
+            raise SessionClosed()
+        return line.decode("utf-8", "replace").strip()
+
+    async def run(self):
+        ''' the whole life of a session '''
+        self.say("Welcome to GameEngine!")
+        name = await self.ask("What is your character's name?: ")
+        name = name or "Average Joe"
+        self.saves = self.server.saves_for(name)
+        if self.saves.exists():
+            self.load()
+        if self.player is None:
+            self.player = Character(name = name, dice = self.dice)
+        self.say(self.player)
+        self.say(HELP)
+        while self.player.health > 0:
+            command = (await self.ask("> ")).lower()
+            if command in ("quit", "exit"):
+                self.save()
+                self.say("Goodbye!")
+                break
+            if command == "fight":
+                await self.fight()
+            else:
+                self.do(command)
+        await self.flush()
+
+    def do(self, command):
+        ''' a travel verb '''
+        if command in DIRECTIONS:
+            self.say(self.server.world.step(self.position, command))
+        elif command == "potion":
+            success, event = self.player.heal()
+            self.events.emit(event)
+        elif command == "info":
+            self.say(self.player)
+        elif command == "save":
+            self.save()
+        elif command == "help":
+            self.say(HELP)
+        elif command == "search":
+            self.say(self.server.world.search(self.position, self.player))
+        elif command:
+            self.say("*** Invalid Input! ***")
+
+    def load(self):
+        ''' carry on from this player's save, if it can be read '''
+        try:
+            self.player, position, monsters = self.saves.load(
+                dice = self.dice)
+        except (OSError, ValueError) as error:
+            self.say("Couldn't load your saved game: " + str(error))
+            return
+        if position is not None:
+            self.position[:] = position
+        self.say("Welcome back!")
+
+    def save(self):
+        ''' save the player and where they are, if anything has changed '''
+        try:
+            if self.saves.save(self.player, self.position):
+                self.say("Game saved.")
+            else:
+                self.say("Nothing has changed since the last save.")
+        except OSError as error:
+            self.say("Couldn't save the game: " + str(error))
+
+    async def fight(self):
+        ''' combat against the nearest monster in the world, or a random
+            one if there's none within a step; the player answers each
+            turn over the wire, and the monster thinks for itself
+
+            a monster from the world is taken out of it for the fight, so
+            no other session can pick the same one, and is put back if it
+            lives through it (the player fled, died or went away).'''
+        world = self.server.world
+        near = world.nearby(self.position[0], self.position[1],
+                            self.position[2], 1, MONSTER_KINDS)
+        thing = near[0] if near else None
+        if thing is not None:
+            world.remove(thing)
+            monster = self.server.spawner.spawn(MONSTER_TYPES[thing.kind])
+        else:
+            monster = self.server.spawner.spawn()
+        monster.dice = self.dice
+        self.say("A wild " + monster.name + " appears!")
+        try:
+            await acombat(self.player, monster,
+                          controllers = (LineController(self.ask), None),
+                          output = None, dice = self.dice,
+                          events = self.events,
+                          timeout = self.server.turnTimeout)
+        finally:
+            if monster.health <= 0:
+                self.server.spawner.recycle(monster)
+            elif thing is not None:
+                world.add(thing)
+        await self.flush()
+
+class GameServer(object):
+    ''' accepts connections and runs a Session for each one
+
+        maxSessions caps how many play at once; anybody past that is told
+        to come back later.  A player who takes longer than turnTimeout
+        seconds over a combat turn attacks.  dice seed every session's own
+        stream.  Players' saves go in saveDir, made when it's first
+        needed, all written by the one SaveWriter.'''
+    def __init__(self, host = "127.0.0.1", port = 8023, dice = None,
+                 maxSessions = 10000, idleTimeout = 600, lineLimit = 1024,
+                 backlog = 1024, turnTimeout = 60, saveDir = "saves"):
+        self.host = host
+        self.port = port
+        self.dice = dice if dice is not None else Dice()
+        self.maxSessions = maxSessions
+        self.idleTimeout = idleTimeout
+        self.lineLimit = lineLimit
+        self.backlog = backlog
+        self.turnTimeout = turnTimeout
+        self.saveDir = saveDir
+        self.writer = SaveWriter()
+        self.spawner = Spawner(dice = self.dice.stream())
+        self.world = World(seed = self.dice.randint(0, 2 ** 32 - 1),
+                           capacity = 4096)
+        self.sessions = set()
+        self.server = None
+
+    def saves_for(self, name):
+        ''' the SaveGame for a player's name '''
+        os.makedirs(self.saveDir, exist_ok = True)
+        fileName = "".join(c for c in name if c.isalnum() or c in "-_ ")
+        return SaveGame(os.path.join(self.saveDir,
+                                     (fileName.strip() or "player") +
+                                     ".save"), self.writer)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host,
+                                                 self.port,
+                                                 limit = self.lineLimit,
+                                                 backlog = self.backlog)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def handle(self, reader, writer):
+        ''' run one connection from start to finish '''
+        if len(self.sessions) >= self.maxSessions:
+            writer.write(b"The server is full, try again later.\n")
+        else:
+            session = Session(self, reader, writer)
+            self.sessions.add(session)
+            try:
+                await session.run()
+            except (SessionClosed, ConnectionError):
+                pass
+            finally:
+                self.sessions.discard(session)
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        ''' stop taking connections and finish writing saves '''
+        if self.server is not None:
+            self.server.close()
+        self.writer.close()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8023
+    print("GameEngine server on port", port)
+    server = GameServer(port = port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,188 @@
+# simulation.py
+# 10/18/2026
+
+''' headless combat simulation for balance testing
+
+    simulate() runs a batch of fights between two combatant templates
+    through GameEngine.combat, with no printing and no input(), and
+    gathers the results into a SimulationReport.
+
+    A template can be a Character (or Monster) instance, which is copied
+    fresh for every fight, or a class / factory function, which is called
+    for every fight so that random stats are re-rolled each time.  One
+    that takes a dice keyword gets the batch's dice.  Pass
+    dice = rng.Dice(seed) to make a batch reproducible:
+
+        report = simulate(Character(name = "Hero"), Orc, fights = 10000)
+        print(report)
+'''
+from copy import deepcopy
+from functools import lru_cache
+from inspect import signature
+from GameEngine import *
+
+def auto_choice(current):
+    ''' default chooser for headless fights
+
+        Monsters use their own combat AI.  Plain Characters would normally
+        ask the player through input(), so instead they always attack,
+        which is the default answer at the combat prompt.'''
+    if type(current).combat_choice is Character.combat_choice:
+        return "a"
+    return current.combat_choice()
+
+@lru_cache(maxsize = 256)
+def takes_dice(template):
+    ''' whether a class or factory can be called with dice = ... '''
+    try:
+        parameters = signature(template).parameters.values()
+    except (TypeError, ValueError):
+        return False    # nothing to go by; call it the old way
+    return any(parameter.name == "dice" or
+               parameter.kind is parameter.VAR_KEYWORD
+               for parameter in parameters)
+
+def spawn(template, dice = None):
+    ''' produce a fresh combatant from a template, rolling with dice
+
+        a class or factory that takes a dice keyword is called with the
+        dice, and one that doesn't is just called; an instance is copied
+        and the copy is given the dice, unless dice is None.'''
+    if callable(template):
+        if takes_dice(template):
+            return template(dice = dice)
+        return template()
+    combatant = deepcopy(template)
+    if dice is not None:
+        combatant.dice = dice
+    return combatant
+
+class SimulationReport(object):
+    ''' aggregate results of many fights between one and two
+
+        oneDamage and twoDamage map "damage dealt in a fight" to the
+        number of fights where that happened, so together with fights they
+        give the damage distribution of each side.'''
+    def __init__(self):
+        self.fights = 0
+        self.oneWins = 0
+        self.twoWins = 0
+        self.oneFled = 0
+        self.twoFled = 0
+        self.draws = 0
+        self.totalRounds = 0
+        self.oneDamage = {}
+        self.twoDamage = {}
+
+    def add(self, result):
+        ''' fold one CombatResult into the totals '''
+        self.fights += 1
+        self.totalRounds += result.rounds
+        if result.winner is result.one:
+            self.oneWins += 1
+        elif result.winner is result.two:
+            self.twoWins += 1
+        elif result.fled is result.one:
+            self.oneFled += 1
+        elif result.fled is result.two:
+            self.twoFled += 1
+        else:
+            self.draws += 1
+        self.oneDamage[result.oneDamage] = \
+            self.oneDamage.get(result.oneDamage, 0) + 1
+        self.twoDamage[result.twoDamage] = \
+            self.twoDamage.get(result.twoDamage, 0) + 1
+
+    def merge(self, other):
+        ''' add the totals of another report to this one '''
+        self.fights += other.fights
+        self.oneWins += other.oneWins
+        self.twoWins += other.twoWins
+        self.oneFled += other.oneFled
+        self.twoFled += other.twoFled
+        self.draws += other.draws
+        self.totalRounds += other.totalRounds
+        for damage, count in other.oneDamage.items():
+            self.oneDamage[damage] = self.oneDamage.get(damage, 0) + count
+        for damage, count in other.twoDamage.items():
+            self.twoDamage[damage] = self.twoDamage.get(damage, 0) + count
+
+    def rate(self, count):
+        ''' fraction of all fights that count represents '''
+        if self.fights == 0:
+            return 0.0
+        return count / self.fights
+
+    @property
+    def oneWinRate(self):
+        return self.rate(self.oneWins)
+
+    @property
+    def twoWinRate(self):
+        return self.rate(self.twoWins)
+
+    @property
+    def oneFleeRate(self):
+        return self.rate(self.oneFled)
+
+    @property
+    def twoFleeRate(self):
+        return self.rate(self.twoFled)
+
+    @property
+    def drawRate(self):
+        return self.rate(self.draws)
+
+    @property
+    def meanRounds(self):
+        return self.rate(self.totalRounds)
+
+    @property
+    def oneMeanDamage(self):
+        return self.rate(sum(damage * count for damage, count
+                             in self.oneDamage.items()))
+
+    @property
+    def twoMeanDamage(self):
+        return self.rate(sum(damage * count for damage, count
+                             in self.twoDamage.items()))
+
+    def __str__(self):
+        info = "FIGHTS:      " + str(self.fights) + "\n" +\
+               "-----------------------------------\n" +\
+               "One wins:    {:.2%}\n".format(self.oneWinRate) +\
+               "Two wins:    {:.2%}\n".format(self.twoWinRate) +\
+               "One fled:    {:.2%}\n".format(self.oneFleeRate) +\
+               "Two fled:    {:.2%}\n".format(self.twoFleeRate) +\
+               "Draws:       {:.2%}\n".format(self.drawRate) +\
+               "Mean rounds: {:.2f}\n".format(self.meanRounds) +\
+               "One damage:  {:.2f}\n".format(self.oneMeanDamage) +\
+               "Two damage:  {:.2f}\n".format(self.twoMeanDamage) +\
+               "-----------------------------------\n"
+        return info
+
+def simulate(one, two, fights = 1000, chooser = auto_choice,
+             maxRounds = 1000, dice = None):
+    ''' run a number of silent fights between two templates
+
+        one and two are templates (see spawn), chooser picks the action
+        for whoever is acting, and maxRounds stops fights where nobody
+        can finish the other off; those count as draws.  Every roll in the
+        batch is made with dice, or the shared dice if that is None.'''
+    report = SimulationReport()
+    for i in range(fights):
+        result = combat(spawn(one, dice), spawn(two, dice), output = None,
+                        chooser = chooser, maxRounds = maxRounds,
+                        dice = dice)
+        report.add(result)
+    return report
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from rng import BufferedDice
+    start = perf_counter()
+    report = simulate(Character(name = "Mr. Peebles"), Orc, fights = 10000,
+                      dice = BufferedDice(seed = 1))
+    elapsed = perf_counter() - start
+    print(report)
+    print("{:.0f} fights/sec".format(report.fights / elapsed))
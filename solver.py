@@ -0,0 +1,256 @@
+# solver.py
+# 10/18/2026
+
+''' exact combat odds without simulation
+
+    solve() treats a fight from GameEngine.combat as a Markov chain whose
+    states are (health of one, health of two, potions of one, potions of
+    two), works out the chance of moving from each state to the next in
+    one round, and from that gets the exact chance of every ending and
+    the expected number of rounds.
+
+        odds = solve(Character(name = "Mr. Peebles"), Orc())
+        print(odds)
+
+    Combatants act like they do in simulation.simulate(): Monsters use
+    their aggression / awareness / fear AI, plain Characters always
+    attack.  Every round either leaves the state alone or uses up a potion
+    or some health, so apart from those "nothing happened" loops the chain
+    only ever moves downhill.  That lets each state be solved once, from
+    the bottom up, with no matrix inverse.
+
+    A WrathMan gets stronger as it is hit, which the state above can't
+    track, so fights involving one have to be simulated instead.
+'''
+from fractions import Fraction
+from functools import lru_cache
+from diceexpr import *
+from monster import Character, halves_damage, decision_weights, \
+     AI_ROLLS
+
+ONE_WINS = "one wins"
+TWO_WINS = "two wins"
+ONE_FLED = "one fled"
+TWO_FLED = "two fled"
+WINS = (ONE_WINS, TWO_WINS)
+FLED = (ONE_FLED, TWO_FLED)
+ENDINGS = (ONE_WINS, TWO_WINS, ONE_FLED, TWO_FLED)
+
+@lru_cache(maxsize = 4096)
+def choice_probabilities(aggression, awareness, fear):
+    ''' exact chances that Monster.combat_choice returns a, h and f,
+        as Fractions (attack, heal, flee) '''
+    attack, heal = decision_weights(aggression, awareness, fear)
+    return (Fraction(attack, AI_ROLLS), Fraction(heal, AI_ROLLS),
+            Fraction(AI_ROLLS - attack - heal, AI_ROLLS))
+
+def first_chance(oneSpeed, twoSpeed):
+    ''' chance that one wins initiative (ties go to one) '''
+    wins = 0
+    for oneRoll in range(1, 21):
+        for twoRoll in range(1, 21):
+            if oneRoll + oneSpeed >= twoRoll + twoSpeed:
+                wins += 1
+    return Fraction(wins, 400)
+
+class Side(object):
+    ''' what the solver needs to know about one combatant '''
+    def __init__(self, combatant, enemy):
+        if halves_damage(combatant):
+            raise ValueError("a WrathMan's fights can't be solved exactly")
+        self.maxHealth = combatant.maxHealth
+        self.speed = combatant.speed
+        if type(combatant).combat_choice is Character.combat_choice:
+            self.choices = (1, 0, 0)
+        else:
+            self.choices = choice_probabilities(combatant.aggression,
+                                                combatant.awareness,
+                                                combatant.fear)
+        self.hitChance = hit_chance(combatant, enemy)
+        self.damage = damage_distribution(combatant, enemy)
+        if combatant.potions:
+            self.healing = distribution(potion_expression(
+                combatant.potions[-1]))
+        else:
+            self.healing = None
+        self.fleeChance = Fraction(min(max(combatant.speed, 0), 100), 100)
+
+    def key(self):
+        ''' everything that affects the odds, for memoizing '''
+        return (self.maxHealth, self.speed, self.choices, self.hitChance,
+                tuple(sorted(self.damage.weights.items())),
+                tuple(sorted(self.healing.weights.items()))
+                if self.healing else None)
+
+    def __eq__(self, other):
+        return isinstance(other, Side) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+class CombatOdds(object):
+    ''' exact chances of each ending of a fight, and its expected length
+
+        draw is the chance that the fight can never end (neither side
+        can hit or get away); in that case rounds is infinite.'''
+    def __init__(self, oneWins, twoWins, oneFled, twoFled, draw, rounds):
+        self.oneWins = oneWins
+        self.twoWins = twoWins
+        self.oneFled = oneFled
+        self.twoFled = twoFled
+        self.draw = draw
+        self.rounds = rounds
+
+    def __str__(self):
+        info = "ODDS\n" +\
+               "-----------------------------------\n" +\
+               "One wins:    {:.2%}\n".format(float(self.oneWins)) +\
+               "Two wins:    {:.2%}\n".format(float(self.twoWins)) +\
+               "One fled:    {:.2%}\n".format(float(self.oneFled)) +\
+               "Two fled:    {:.2%}\n".format(float(self.twoFled)) +\
+               "Draws:       {:.2%}\n".format(float(self.draw)) +\
+               "Mean rounds: {:.2f}\n".format(float(self.rounds)) +\
+               "-----------------------------------\n"
+        return info
+
+class Solver(object):
+    ''' the Markov chain for one matchup
+
+        transitions maps each state to a sparse {next state: chance}
+        dict for one full round; next states are either other states or
+        one of the ENDINGS.'''
+    def __init__(self, one, two, exact = False):
+        self.sides = (one, two)
+        self.number = Fraction if exact else float
+        self.oneFirst = self.number(first_chance(one.speed, two.speed))
+        self.transitions = {}
+        self.actions = {}
+
+    def act(self, state, number):
+        ''' chances of what one action by side number leads to '''
+        key = (state, number)
+        if key in self.actions:
+            return self.actions[key]
+        side = self.sides[number]
+        other = 1 - number
+        convert = self.number
+        outcomes = {}
+
+        def add(outcome, chance):
+            outcomes[outcome] = outcomes.get(outcome, 0) + chance
+
+        attack, heal, flee = [convert(chance) for chance in side.choices]
+        if attack:
+            hit = convert(side.hitChance)
+            add(state, attack * (1 - hit))
+            for damage, weight in side.damage.weights.items():
+                chance = attack * hit * convert(Fraction(weight,
+                                                         side.damage.total))
+                health = state[other] - damage
+                if health <= 0:
+                    add(WINS[number], chance)
+                else:
+                    newState = list(state)
+                    newState[other] = health
+                    add(tuple(newState), chance)
+        if heal:
+            potions = state[2 + number]
+            if potions > 0 and side.healing:
+                for amount, weight in side.healing.weights.items():
+                    newState = list(state)
+                    newState[number] = min(state[number] + amount,
+                                           side.maxHealth)
+                    newState[2 + number] = potions - 1
+                    add(tuple(newState), heal * convert(
+                        Fraction(weight, side.healing.total)))
+            else:
+                add(state, heal)
+        if flee:
+            escape = convert(side.fleeChance)
+            add(FLED[number], flee * escape)
+            add(state, flee * (1 - escape))
+        self.actions[key] = outcomes
+        return outcomes
+
+    def round(self, state):
+        ''' chances of what one full round from state leads to '''
+        if state in self.transitions:
+            return self.transitions[state]
+        outcomes = {}
+        for first, chance in ((0, self.oneFirst), (1, 1 - self.oneFirst)):
+            if not chance:
+                continue
+            for middle, firstChance in self.act(state, first).items():
+                if middle in ENDINGS:
+                    outcomes[middle] = outcomes.get(middle, 0) + \
+                                       chance * firstChance
+                    continue
+                for end, secondChance in self.act(middle, 1 - first).items():
+                    outcomes[end] = outcomes.get(end, 0) + \
+                                    chance * firstChance * secondChance
+        self.transitions[state] = outcomes
+        return outcomes
+
+    def solve(self, start):
+        ''' CombatOdds for a fight starting in state start '''
+        # find every reachable state
+        seen = set([start])
+        waiting = [start]
+        while waiting:
+            state = waiting.pop()
+            for outcome in self.round(state):
+                if outcome not in ENDINGS and outcome not in seen:
+                    seen.add(outcome)
+                    waiting.append(outcome)
+
+        # lower states first: fewer potions, then less health
+        order = sorted(seen, key = lambda s: (s[2] + s[3], s[0] + s[1]))
+        zero = self.number(0)
+        values = {}
+        for state in order:
+            outcomes = dict(self.round(state))
+            stay = outcomes.pop(state, zero)
+            if stay >= 1:
+                values[state] = (zero, zero, zero, zero, self.number(1),
+                                 float("inf"))
+                continue
+            result = [zero] * 6
+            rounds = self.number(1)
+            for outcome, chance in outcomes.items():
+                if outcome in ENDINGS:
+                    result[ENDINGS.index(outcome)] += chance
+                else:
+                    later = values[outcome]
+                    for i in range(5):
+                        result[i] += chance * later[i]
+                    rounds += chance * later[5]
+            leave = 1 - stay
+            result = [value / leave for value in result[:5]]
+            values[state] = tuple(result) + (rounds / leave,)
+        return CombatOdds(*values[start])
+
+@lru_cache(maxsize = 1024)
+def solve_sides(one, two, start, exact):
+    ''' memoized work behind solve(); Sides compare by their stats '''
+    return Solver(one, two, exact).solve(start)
+
+def solve(one, two, exact = False):
+    ''' exact CombatOdds of combat(one, two), memoized by their stats
+
+        with exact = True the chances are Fractions; otherwise floats,
+        which is far faster and only off by rounding.'''
+    start = (one.health, two.health, one.potionCount, two.potionCount)
+    return solve_sides(Side(one, two), Side(two, one), start, exact)
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from monster import Orc, Monster
+    from simulation import simulate
+    from rng import Dice
+    hero = Character(name = "Mr. Peebles")
+    for enemy in (Orc(dice = Dice(1)), Monster()):
+        start = perf_counter()
+        odds = solve(hero, enemy)
+        print(odds)
+        print("solved in {:.1f} ms".format((perf_counter() - start) * 1000))
+        print(simulate(hero, enemy, fights = 20000, dice = Dice(2)))
@@ -0,0 +1,123 @@
+# statgen.py
+# 10/18/2026
+
+''' batch ability score generation
+
+    Makes any number of stat blocks at once, for each of the character
+    creation methods, as a (count, 6) numpy array in stat block order
+    (str, dex, con, int, wis, cha):
+
+        blocks = four_d6_blocks(100000, cheat = 2, seed = 1)
+        heroes = to_characters(blocks[:10], name = "Pregen")
+
+    Nothing here loops over dice.  4d6 scores, with or without a
+    RootApp.cheat mode, are drawn straight from their exact distribution
+    in diceexpr, and hardcore blocks use the same exact no-reroll sampler
+    as diceexpr.hardcore_stats, so the numbers come out just as
+    create_player's own rolls would.
+
+    This module needs numpy, like vectorcombat.
+'''
+import numpy as np
+from diceexpr import *
+from character import Character, ABILITIES
+
+SIMPLE_HIGH = 17
+SIMPLE_LOW = 9
+SIMPLE_REST = 12
+
+def sampler(weights):
+    ''' the values and running weight totals of a Distribution
+
+        an integer below the total, looked up in the totals, picks a value
+        with exactly the right chance.'''
+    values = sorted(weights.weights)
+    totals = np.cumsum([weights.weights[value] for value in values])
+    return np.array(values), totals
+
+def draw(weights, size, rng):
+    ''' values drawn from a Distribution, in an array of the given shape '''
+    values, totals = sampler(weights)
+    picks = rng.integers(0, int(totals[-1]), size = size)
+    return values[np.searchsorted(totals, picks, side = "right")]
+
+def hardcore_blocks(count, seed = None, rng = None):
+    ''' count hardcore stat blocks, each with at least one stat of
+        HARDCORE_NEEDED or more
+
+        the position of the first high stat is drawn first; before it
+        every stat is low, at it the stat is high, after it anything.'''
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    first = draw(HARDCORE_FIRST_HIGH, (count, 1), rng)
+    position = np.arange(6)
+    low = rng.integers(HARDCORE_LOW, HARDCORE_NEEDED, size = (count, 6))
+    high = rng.integers(HARDCORE_NEEDED, HARDCORE_HIGH + 1, size = (count, 6))
+    anything = rng.integers(HARDCORE_LOW, HARDCORE_HIGH + 1,
+                            size = (count, 6))
+    return np.where(position < first, low,
+                    np.where(position == first, high, anything))
+
+def simple_blocks(count, high = None, low = None, seed = None, rng = None):
+    ''' count simple stat blocks: 17 in the high stat, 9 in the low one,
+        12 everywhere else
+
+        high and low are stat numbers (0 for strength ... 5 for charisma),
+        either one for every block or an array with one per block.  Left
+        as None, each block gets a random pair of different stats.'''
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    if high is None:
+        high = rng.integers(0, 6, size = count)
+    high = np.broadcast_to(high, (count,))
+    if low is None:
+        low = (high + rng.integers(1, 6, size = count)) % 6
+    low = np.broadcast_to(low, (count,))
+    if np.any(high == low):
+        raise ValueError("the high and low stats must be different")
+    blocks = np.full((count, 6), SIMPLE_REST)
+    rows = np.arange(count)
+    blocks[rows, high] = SIMPLE_HIGH
+    blocks[rows, low] = SIMPLE_LOW
+    return blocks
+
+def four_d6_blocks(count, cheat = 0, seed = None, rng = None):
+    ''' count blocks of six 4d6-keep-3 scores, rolled with a cheat mode
+
+        the scores aren't assigned to stats yet; that is the player's job
+        in the FourD6 frame, so they are left in the order rolled.'''
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    return draw(distribution(CHEAT_EXPRESSIONS[cheat]), (count, 6), rng)
+
+METHODS = {"hardcore": hardcore_blocks,
+           "simple": simple_blocks,
+           "4d6": four_d6_blocks}
+
+def stat_blocks(method, count, seed = None, **options):
+    ''' count stat blocks made with one of the METHODS '''
+    return METHODS[method](count, seed = seed, **options)
+
+def to_characters(blocks, template = Character, **options):
+    ''' a Character (or whatever template makes) for every stat block
+
+        options are passed on to the template as they are.'''
+    return [template(**dict(options, **dict(zip(ABILITIES,
+                                                 map(int, block)))))
+            for block in blocks]
+
+if __name__ == "__main__":
+    from time import perf_counter
+    from rng import Dice
+    count = 1000000
+    for method, options in (("hardcore", {}), ("simple", {}),
+                            ("4d6", {}), ("4d6", {"cheat": 4})):
+        start = perf_counter()
+        blocks = stat_blocks(method, count, seed = 1, **options)
+        elapsed = perf_counter() - start
+        print("{:<9}{:<12}{:>7.0f}k blocks/sec   mean {:.2f}".format(
+            method, str(options), count / elapsed / 1000, blocks.mean()))
+    dice = Dice(1)
+    start = perf_counter()
+    for i in range(20000):
+        rolls = [sorted(dice.randint(1, 6) for j in range(4))[1:]
+                 for k in range(6)]
+    print("per-die loop:        {:>7.0f}k blocks/sec".format(
+        20000 / (perf_counter() - start) / 1000))
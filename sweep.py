@@ -0,0 +1,118 @@
+# sweep.py
+# 10/18/2026
+
+''' parallel balance sweeps
+
+    sweep() takes a grid of parameter values, builds every combination
+    ("cell") of them, and runs a batch of simulated fights for each cell
+    in a pool of worker processes.  The parameters it knows about are:
+
+        aggression, awareness, fear   - set on the monster
+        weaponBase, weaponBonus       - set on the hero's weapon
+        armorBase                     - set on the hero's armor
+
+    Every cell gets its own dice stream, split off in order from dice
+    seeded with the master seed, and every roll in that cell comes from
+    its stream.  So the results only depend on the master seed, never on
+    how many workers there were or which worker ran which cell.
+
+        results = sweep(Character(), Orc, {"aggression": [20, 50, 80],
+                                           "weaponBase": [4, 6, 8]},
+                        fights = 2000, seed = 42)
+        for params, report in results:
+            print(params, report.oneWinRate)
+'''
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from simulation import *
+from rng import BufferedDice
+
+MONSTER_PARAMETERS = ("aggression", "awareness", "fear")
+HERO_PARAMETERS = ("weaponBase", "weaponBonus", "armorBase")
+
+def apply_monster_parameters(monster, params):
+    ''' set one cell's AI values on a monster '''
+    for name in MONSTER_PARAMETERS:
+        if name in params:
+            setattr(monster, name, params[name])
+
+def apply_hero_parameters(hero, params):
+    ''' give a hero a weapon and armor with one cell's values
+
+        the hero's own items may be shared or enchanted, so rather than
+        changing them it gets the catalog's items with the cell's values,
+        keeping the names and anything the cell doesn't set.'''
+    weapon = hero.weapon
+    armor = hero.armor
+    if "weaponBase" in params or "weaponBonus" in params:
+        hero.weapon = Weapon.shared(
+            name = weapon.name,
+            base = params.get("weaponBase", weapon.base),
+            bonus = params.get("weaponBonus", weapon.bonus))
+    if "armorBase" in params:
+        hero.armor = Armor.shared(name = armor.name,
+                                  base = params["armorBase"],
+                                  bonus = armor.bonus)
+
+class CellTemplate(object):
+    ''' spawns a combatant for a cell, with the cell's values applied
+
+        this lives in the worker, so templates that are classes still get
+        re-rolled for every fight.'''
+    def __init__(self, template, params, isHero):
+        self.template = template
+        self.params = params
+        self.isHero = isHero
+
+    def __call__(self, dice = None):
+        combatant = spawn(self.template, dice)
+        if self.isHero:
+            apply_hero_parameters(combatant, self.params)
+        else:
+            apply_monster_parameters(combatant, self.params)
+        return combatant
+
+def grid_cells(grid):
+    ''' every combination of the grid values, as a list of dicts '''
+    names = sorted(grid)
+    return [dict(zip(names, values))
+            for values in product(*(grid[name] for name in names))]
+
+def run_cell(task):
+    ''' worker entry point: simulate one cell of the grid '''
+    hero, monster, params, fights, dice, maxRounds = task
+    return simulate(CellTemplate(hero, params, True),
+                    CellTemplate(monster, params, False),
+                    fights = fights, maxRounds = maxRounds, dice = dice)
+
+def sweep(hero, monster, grid, fights = 1000, seed = 0, workers = None,
+          maxRounds = 1000):
+    ''' simulate every cell of a parameter grid across worker processes
+
+        hero and monster are templates (see simulation.spawn) and must be
+        picklable, so pass classes or instances rather than lambdas.
+        grid maps parameter names to lists of values.  Returns a list of
+        (params, SimulationReport) pairs in grid order.  workers defaults
+        to one per CPU; workers = 0 runs everything in this process.'''
+    for name in grid:
+        if name not in MONSTER_PARAMETERS + HERO_PARAMETERS:
+            raise ValueError("unknown sweep parameter: " + name)
+    cells = grid_cells(grid)
+    master = BufferedDice(seed)
+    tasks = [(hero, monster, params, fights, master.stream(), maxRounds)
+             for params in cells]
+    if workers == 0:
+        reports = list(map(run_cell, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            reports = list(pool.map(run_cell, tasks))
+    return list(zip(cells, reports))
+
+if __name__ == "__main__":
+    grid = {"aggression": [20, 50, 80],
+            "fear": [0, 50],
+            "weaponBase": [4, 8]}
+    for params, report in sweep(Character(name = "Mr. Peebles"), Orc, grid,
+                                fights = 2000, seed = 42):
+        print(params, "win {:.2%}  rounds {:.2f}".format(report.oneWinRate,
+                                                         report.meanRounds))
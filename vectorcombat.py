@@ -0,0 +1,263 @@
+# vectorcombat.py
+# 10/18/2026
+
+''' NumPy Monte Carlo combat backend
+
+    vector_simulate() plays thousands of independent combat() duels at
+    once.  Every live fight is a column in a set of arrays, and each step
+    of a round (initiative, the monster AI draws, the d20 attack against
+    AC, weapon damage, potions and fleeing) is done as one array operation
+    across all of the fights that are still going.
+
+    The rules are the same as GameEngine.combat with the simulation
+    module's auto_choice: Monsters use their aggression / awareness / fear
+    AI, plain Characters always attack, and a WrathMan turns half of the
+    damage it takes into strength and all of it into aggression.  The
+    result is a simulation.SimulationReport, so it can be compared
+    directly with simulation.simulate().
+
+    Healing uses the base and bonus of the combatant's last potion for
+    every potion it drinks; all of the game's potions are Cure Light, so
+    this is the same thing the scalar path does.
+
+    This module needs numpy, which the rest of the game does not.
+'''
+import numpy as np
+from simulation import *
+
+ATTACK = 0
+HEAL = 1
+FLEE = 2
+
+# the letter Monster.combat_choice uses for each action code
+CHOICE_LETTERS = np.array(["a", "h", "f"])
+
+def decision_table(aggression, awareness, fear):
+    ''' the monster.decision_weights of every (aggression, awareness, fear)
+        row, as two arrays
+
+        the table is only worked out once per different row, so a crowd
+        of identical monsters costs one lookup.'''
+    # pack each row into one number, so finding the different rows is a
+    # plain sort of integers
+    offset = 1 << 20
+    columns = [np.asarray(column, dtype = np.int64).reshape(-1) + offset
+               for column in (aggression, awareness, fear)]
+    keys = (columns[0] << 42) | (columns[1] << 21) | columns[2]
+    unique, inverse = np.unique(keys, return_inverse = True)
+    mask = (1 << 21) - 1
+    weights = np.array([decision_weights(int(key >> 42) - offset,
+                                         int((key >> 21) & mask) - offset,
+                                         int(key & mask) - offset)
+                        for key in unique], dtype = np.int64).reshape(-1, 2)
+    return weights[inverse, 0], weights[inverse, 1]
+
+def ai_choices(aggression, awareness, fear, rng = None):
+    ''' Monster.combat_choice for a whole array of monsters at once
+
+        takes arrays of their aggression, awareness and fear, and returns
+        an array of ATTACK, HEAL and FLEE codes (CHOICE_LETTERS turns them
+        into a, h and f).  Each monster gets one draw, looked up in the
+        exact decision table.'''
+    rng = rng if rng is not None else np.random.default_rng()
+    attack, heal = decision_table(aggression, awareness, fear)
+    roll = rng.integers(1, AI_ROLLS + 1, size = len(attack))
+    choice = np.full(len(attack), FLEE, dtype = np.int8)
+    choice[roll <= attack + heal] = HEAL
+    choice[roll <= attack] = ATTACK
+    return choice
+
+class Sides(object):
+    ''' the stats of both combatants in every fight, as (2, fights) arrays
+
+        row 0 holds combatant one and row 1 holds combatant two, so
+        stat[side, fight] is one combatant in one fight.'''
+    def __init__(self, one, two, fights):
+        self.fights = fights
+        sides = (self.spawn_all(one, fights), self.spawn_all(two, fights))
+        self.health = self.column(sides, lambda c: c.health)
+        self.maxHealth = self.column(sides, lambda c: c.maxHealth)
+        self.speed = self.column(sides, lambda c: c.speed)
+        self.strength = self.column(sides, lambda c: c.strength)
+        self.AC = self.column(sides, lambda c: c.AC)
+        self.weaponAttack = self.column(sides, lambda c: c.weapon.attack)
+        self.weaponBase = self.column(sides, lambda c: c.weapon.base)
+        self.weaponBonus = self.column(sides, lambda c: c.weapon.bonus)
+        self.potions = self.column(sides, lambda c: c.potionCount)
+        self.potionBase = self.column(sides, lambda c:
+                                      c.potions[-1].base if c.potions else 1)
+        self.potionBonus = self.column(sides, lambda c:
+                                       c.potions[-1].bonus if c.potions else 0)
+        self.aggression = self.column(sides, lambda c:
+                                      getattr(c, "aggression", 0))
+        self.awareness = self.column(sides, lambda c:
+                                     getattr(c, "awareness", 0))
+        self.fear = self.column(sides, lambda c: getattr(c, "fear", 0))
+        self.usesAI = self.column(sides, lambda c:
+                                  type(c).combat_choice is not
+                                  Character.combat_choice, dtype = bool)
+        self.isWrath = self.column(sides, halves_damage, dtype = bool)
+        self.damage = np.zeros((2, fights), dtype = np.int64)
+
+    @staticmethod
+    def spawn_all(template, fights):
+        ''' one shared instance, or a list of freshly spawned ones '''
+        if callable(template):
+            return [template() for i in range(fights)]
+        return template
+
+    def column(self, sides, getter, dtype = np.int64):
+        ''' build a (2, fights) array of one stat '''
+        rows = []
+        for side in sides:
+            if isinstance(side, list):
+                rows.append(np.array([getter(c) for c in side], dtype = dtype))
+            else:
+                rows.append(np.full(self.fights, getter(side), dtype = dtype))
+        return np.stack(rows)
+
+class VectorCombat(object):
+    ''' a batch of duels being resolved together '''
+    def __init__(self, one, two, fights, rng = None, maxRounds = 1000):
+        self.fights = fights
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.maxRounds = maxRounds
+        self.sides = Sides(one, two, fights)
+        self.rounds = np.zeros(fights, dtype = np.int64)
+        self.winner = np.full(fights, -1, dtype = np.int8)
+        self.fled = np.full(fights, -1, dtype = np.int8)
+
+    def roll(self, sides, count):
+        ''' count rolls of 1d<sides>; sides may be an array '''
+        return self.rng.integers(1, np.asarray(sides) + 1, size = count)
+
+    def choices(self, actor, fights):
+        ''' vectorized Monster.combat_choice for the acting combatants '''
+        s = self.sides
+        choice = np.full(len(fights), ATTACK, dtype = np.int8)
+        ai = s.usesAI[actor, fights]
+        if not ai.any():
+            return choice
+        aiActor = actor[ai]
+        aiFights = fights[ai]
+        choice[ai] = ai_choices(s.aggression[aiActor, aiFights],
+                                s.awareness[aiActor, aiFights],
+                                s.fear[aiActor, aiFights], self.rng)
+        return choice
+
+    def flee(self, actor, fights):
+        ''' vectorized Character.flee; returns the mask of escapes '''
+        chance = self.roll(100, len(fights))
+        escaped = chance <= self.sides.speed[actor, fights]
+        self.fled[fights[escaped]] = actor[escaped]
+        return escaped
+
+    def heal(self, actor, fights):
+        ''' vectorized Character.heal '''
+        s = self.sides
+        has = s.potions[actor, fights] > 0
+        actor = actor[has]
+        fights = fights[has]
+        amount = self.roll(s.potionBase[actor, fights], len(fights)) +\
+                 s.potionBonus[actor, fights]
+        s.health[actor, fights] = np.minimum(s.health[actor, fights] + amount,
+                                             s.maxHealth[actor, fights])
+        s.potions[actor, fights] -= 1
+
+    def attack(self, actor, fights):
+        ''' vectorized Character.attack; returns the mask of kills '''
+        s = self.sides
+        target = 1 - actor
+        count = len(fights)
+        roll = self.roll(20, count)
+        strBonus = (s.strength[actor, fights] // 2) - 5
+        attack = roll + strBonus + s.weaponAttack[actor, fights]
+        hit = (roll != 1) & (attack >= s.AC[target, fights])
+        damage = self.roll(s.weaponBase[actor, fights], count) +\
+                 s.weaponBonus[actor, fights] + strBonus
+        damage = np.maximum(damage, 1)
+
+        before = s.health[target, fights]
+        wrath = s.isWrath[target, fights]
+        taken = np.where(wrath, damage // 2, damage)
+        taken[~hit] = 0
+        s.health[target, fights] = before - taken
+        wrathHit = hit & wrath
+        s.strength[target[wrathHit], fights[wrathHit]] += damage[wrathHit] // 2
+        s.aggression[target[wrathHit], fights[wrathHit]] += damage[wrathHit]
+        s.damage[actor, fights] += taken
+
+        dead = s.health[target, fights] <= 0
+        self.winner[fights[dead]] = actor[dead]
+        return dead
+
+    def take_action(self, actor, fights):
+        ''' every actor does its chosen action; returns finished fights '''
+        over = np.zeros(len(fights), dtype = bool)
+        choice = self.choices(actor, fights)
+        for action, handler in ((FLEE, self.flee), (HEAL, self.heal),
+                                (ATTACK, self.attack)):
+            mask = choice == action
+            if not mask.any():
+                continue
+            result = handler(actor[mask], fights[mask])
+            if result is not None:
+                over[np.flatnonzero(mask)[result]] = True
+        return over
+
+    def run(self):
+        ''' fight every duel to the end, or to maxRounds '''
+        live = np.arange(self.fights)
+        rounds = 0
+        s = self.sides
+        while len(live) and rounds < self.maxRounds:
+            rounds += 1
+            self.rounds[live] = rounds
+            count = len(live)
+            oneInit = self.roll(20, count) + s.speed[0, live]
+            twoInit = self.roll(20, count) + s.speed[1, live]
+            first = np.where(oneInit >= twoInit, 0, 1)
+            over = self.take_action(first, live)
+            second = 1 - first[~over]
+            rest = live[~over]
+            over = self.take_action(second, rest)
+            live = rest[~over]
+        return self.report()
+
+    def report(self):
+        ''' collect the arrays into a SimulationReport '''
+        report = SimulationReport()
+        report.fights = self.fights
+        report.oneWins = int((self.winner == 0).sum())
+        report.twoWins = int((self.winner == 1).sum())
+        report.oneFled = int((self.fled == 0).sum())
+        report.twoFled = int((self.fled == 1).sum())
+        report.draws = report.fights - report.oneWins - report.twoWins -\
+                       report.oneFled - report.twoFled
+        report.totalRounds = int(self.rounds.sum())
+        for side, damageTable in ((0, report.oneDamage),
+                                  (1, report.twoDamage)):
+            values, counts = np.unique(self.sides.damage[side],
+                                       return_counts = True)
+            for value, count in zip(values, counts):
+                damageTable[int(value)] = int(count)
+        return report
+
+def vector_simulate(one, two, fights = 100000, seed = None, maxRounds = 1000):
+    ''' run a batch of fights with the NumPy backend
+
+        takes the same templates as simulation.simulate() and returns a
+        SimulationReport.  seed makes the batch reproducible.'''
+    rng = np.random.default_rng(seed)
+    return VectorCombat(one, two, fights, rng, maxRounds).run()
+
+if __name__ == "__main__":
+    from time import perf_counter
+    hero = Character(name = "Mr. Peebles")
+    orc = Orc()
+    start = perf_counter()
+    report = vector_simulate(hero, orc, fights = 1000000, seed = 1)
+    elapsed = perf_counter() - start
+    print(report)
+    print("{:.0f} fights/sec".format(report.fights / elapsed))
+    print(simulate(hero, orc, fights = 20000))
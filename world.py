@@ -0,0 +1,360 @@
+# world.py
+# 10/18/2026
+
+''' the world the Travel verbs move through
+
+    The world is a grid of tiles in three dimensions: x runs east, y runs
+    north, and level goes up and down.  It has no edge, so it is never
+    built as a whole.  It is cut into chunks of CHUNK_SIZE by CHUNK_SIZE
+    tiles on one level.  A chunk is generated from the world's seed the
+    first time somebody comes near it. The same seed always gives the same
+    chunk, so a chunk nobody has changed can be thrown away and made again
+    later.
+
+    A World keeps at most capacity chunks, dropping the one used longest
+    ago. A chunk whose monsters or items have changed leaves only its
+    list of things behind when it is dropped, and gets the list back when
+    it is made again.  Given a ChunkStore (see chunkstore.py), a World
+    writes the chunks it drops to disk instead, and reads them back from
+    there.
+
+    Each chunk holds the monsters and items on it, so finding what is
+    near a spot only has to look at the few chunks around it (nearby()).
+
+        world = World(seed = 42)
+        position = [0, 0, 0]
+        print(world.step(position, "north"))
+        print(world.search(position, player))
+'''
+from collections import OrderedDict
+from random import Random
+from monster import *
+
+# tiles along each side of a chunk
+CHUNK_SIZE = 16
+
+# what a tile can be; a chunk keeps one byte per tile
+GROUND, ROCK, WATER, STAIRS_UP, STAIRS_DOWN, STAIRS = range(6)
+TILE_NAMES = ("ground", "rock", "water", "stairs up", "stairs down",
+              "stairs up and down")
+BLOCKING = {ROCK: "There's rock in the way.",
+            WATER: "There's water in the way."}
+GOES_UP = (STAIRS_UP, STAIRS)
+GOES_DOWN = (STAIRS_DOWN, STAIRS)
+
+# what a chunk can have on it: the monsters by class name, then items
+THING_KINDS = ("Monster", "Orc", "WrathMan", "Potion")
+MONSTER_KINDS = ("Monster", "Orc", "WrathMan")
+# most things one chunk is made with
+MAX_THINGS = 8
+# most things one chunk can ever hold; a ChunkStore record has room for
+# exactly this many
+MAX_CHUNK_THINGS = 80
+
+# how far search() looks, in tiles
+SEARCH_RADIUS = 4
+
+# the Travel verbs that move: what they say and which way they go
+DIRECTIONS = {"north": ("You go North", (0, 1, 0)),
+              "south": ("You go South", (0, -1, 0)),
+              "east": ("You go East", (1, 0, 0)),
+              "west": ("You go West", (-1, 0, 0)),
+              "up": ("You went up", (0, 0, 1)),
+              "down": ("You went down", (0, 0, -1))}
+
+def chunk_key(x, y, level):
+    ''' which chunk a tile is in '''
+    return (x // CHUNK_SIZE, y // CHUNK_SIZE, level)
+
+def a_or_an(name):
+    return ("an " if name[0] in "AEIOUaeiou" else "a ") + name
+
+class Thing(object):
+    ''' a monster or item lying somewhere in the world '''
+    __slots__ = ("x", "y", "level", "kind")
+
+    def __init__(self, x, y, level, kind):
+        self.x = x
+        self.y = y
+        self.level = level
+        self.kind = kind
+
+    @property
+    def isMonster(self):
+        return self.kind in MONSTER_KINDS
+
+    def distance(self, x, y):
+        ''' how many steps away, counting diagonals as one '''
+        return max(abs(self.x - x), abs(self.y - y))
+
+    def __repr__(self):
+        return "Thing({}, {}, {}, {!r})".format(self.x, self.y, self.level,
+                                                self.kind)
+
+class Chunk(object):
+    ''' CHUNK_SIZE by CHUNK_SIZE tiles on one level, and the things on them
+
+        tiles is a bytearray (or a view of a ChunkStore's file), row by
+        row from the south-west corner.  dirty is set once the things have
+        changed since the chunk was made or last stored.'''
+    def __init__(self, key, tiles, things = None):
+        self.key = key
+        self.tiles = tiles
+        self.things = things if things is not None else []
+        self.dirty = False
+        self.stored = False
+        self.x = key[0] * CHUNK_SIZE
+        self.y = key[1] * CHUNK_SIZE
+
+    def tile(self, x, y):
+        ''' the tile at world coordinates x, y '''
+        return self.tiles[(y - self.y) * CHUNK_SIZE + x - self.x]
+
+    def things_at(self, x, y):
+        return [thing for thing in self.things
+                if thing.x == x and thing.y == y]
+
+    def add(self, thing):
+        ''' put a thing on the chunk; False if it's already full '''
+        if len(self.things) >= MAX_CHUNK_THINGS:
+            return False
+        self.things.append(thing)
+        self.dirty = True
+        return True
+
+    def remove(self, thing):
+        self.things.remove(thing)
+        self.dirty = True
+
+def stairs_tile(seed, cx, cy, link):
+    ''' where in chunk cx, cy the stairs between level link and the one
+        above it are; both levels work it out the same way '''
+    return Random("{}:{}:{}:{}:stairs".format(seed, cx, cy, link)).randrange(
+        CHUNK_SIZE * CHUNK_SIZE)
+
+def generate(seed, key):
+    ''' make a chunk from the world's seed; always the same for a key '''
+    cx, cy, level = key
+    dice = Random("{}:{}:{}:{}".format(seed, cx, cy, level))
+    random = dice.random
+    tiles = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+    for i in range(len(tiles)):
+        roll = random()
+        if roll < 0.12:
+            tiles[i] = ROCK
+        elif roll < 0.17:
+            tiles[i] = WATER
+    if key == (0, 0, 0):
+        tiles[0] = GROUND       # everybody starts at 0, 0, 0
+    up = stairs_tile(seed, cx, cy, level)
+    down = stairs_tile(seed, cx, cy, level - 1)
+    tiles[up] = STAIRS_UP
+    tiles[down] = STAIRS if down == up else STAIRS_DOWN
+
+    things = []
+    for i in range(dice.randint(0, MAX_THINGS)):
+        spot = dice.randrange(len(tiles))
+        if tiles[spot] != GROUND or (key == (0, 0, 0) and spot == 0):
+            continue
+        things.append(Thing(cx * CHUNK_SIZE + spot % CHUNK_SIZE,
+                            cy * CHUNK_SIZE + spot // CHUNK_SIZE, level,
+                            dice.choice(THING_KINDS)))
+    return Chunk(key, tiles, things)
+
+class World(object):
+    ''' the chunks near the players, and the way to move between them
+
+        chunks is an OrderedDict from chunk key to Chunk, least recently
+        used first.  edits holds the things of changed chunks that have
+        been dropped, when there's no store to write them to.  radius is
+        how many chunks around a player visit() keeps loaded.
+
+        A store that already has a seed decides the seed.'''
+    def __init__(self, seed = None, capacity = 64, radius = 1, store = None):
+        self.seed = seed if seed is not None else Random().getrandbits(32)
+        self.capacity = max(capacity, (2 * radius + 1) ** 2)
+        self.radius = radius
+        self.chunks = OrderedDict()
+        self.edits = {}
+        self.store = store
+        if store is not None:
+            if store.seed is None:
+                store.set_seed(self.seed)
+            self.seed = store.seed
+        self.hits = 0
+        self.misses = 0
+
+    def chunk(self, key):
+        ''' the chunk for a key, made now if it isn't loaded '''
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            self.hits += 1
+            return chunk
+        self.misses += 1
+        chunk = self.store.read(key) if self.store is not None else None
+        if chunk is None:
+            chunk = generate(self.seed, key)
+            things = self.edits.pop(key, None)
+            if things is not None:
+                chunk.things = things
+                chunk.dirty = True
+        self.chunks[key] = chunk
+        self.evict()
+        return chunk
+
+    def evict(self):
+        ''' drop the least recently used chunks past capacity '''
+        while len(self.chunks) > self.capacity:
+            key, chunk = self.chunks.popitem(last = False)
+            self.unload(chunk)
+
+    def unload(self, chunk):
+        ''' a chunk is being dropped; keep whatever can't be made again,
+            or with a store, anything that isn't on disk yet '''
+        if self.store is not None:
+            if chunk.dirty or not chunk.stored:
+                self.store.write(chunk)
+        elif chunk.dirty:
+            self.edits[chunk.key] = chunk.things
+
+    def write_back(self):
+        ''' write every changed chunk into the store, without waiting for
+            the disk; the store's sync() or flush() puts it there '''
+        if self.store is not None:
+            for chunk in self.chunks.values():
+                if chunk.dirty or not chunk.stored:
+                    self.store.write(chunk)
+
+    def flush(self):
+        ''' write every changed chunk back to the store, and to disk '''
+        if self.store is not None:
+            self.write_back()
+            self.store.flush()
+
+    def close(self):
+        ''' write everything back and close the store
+
+            the loaded chunks' tiles look into the store's file, so they
+            get copies of their own first.'''
+        if self.store is not None:
+            self.flush()
+            for chunk in self.chunks.values():
+                if isinstance(chunk.tiles, memoryview):
+                    chunk.tiles = bytes(chunk.tiles)
+            self.chunks.clear()
+            self.store.close()
+
+    def chunk_at(self, x, y, level):
+        return self.chunk(chunk_key(x, y, level))
+
+    def tile(self, x, y, level):
+        return self.chunk_at(x, y, level).tile(x, y)
+
+    def visit(self, position):
+        ''' make sure the chunks around a position are loaded, the one
+            it's in last so it's the freshest '''
+        cx, cy, level = chunk_key(*position)
+        for dx in range(-self.radius, self.radius + 1):
+            for dy in range(-self.radius, self.radius + 1):
+                if dx or dy:
+                    self.chunk((cx + dx, cy + dy, level))
+        self.chunk((cx, cy, level))
+
+    def nearby(self, x, y, level, radius, kinds = None):
+        ''' the things within radius steps of x, y, nearest first
+
+            only the chunks that overlap the square are looked at.
+            kinds limits it to those kinds of thing.'''
+        found = []
+        for cx in range((x - radius) // CHUNK_SIZE,
+                        (x + radius) // CHUNK_SIZE + 1):
+            for cy in range((y - radius) // CHUNK_SIZE,
+                            (y + radius) // CHUNK_SIZE + 1):
+                for thing in self.chunk((cx, cy, level)).things:
+                    if kinds is not None and thing.kind not in kinds:
+                        continue
+                    distance = thing.distance(x, y)
+                    if distance <= radius:
+                        found.append((distance, thing))
+        found.sort(key = lambda pair: pair[0])
+        return [thing for distance, thing in found]
+
+    def add(self, thing):
+        ''' put a thing in the world; False if its chunk is full '''
+        return self.chunk_at(thing.x, thing.y, thing.level).add(thing)
+
+    def remove(self, thing):
+        self.chunk_at(thing.x, thing.y, thing.level).remove(thing)
+
+    def step(self, position, direction):
+        ''' move a position one step in a direction, if nothing's in the
+            way; returns what to tell the player '''
+        text, (dx, dy, dz) = DIRECTIONS[direction]
+        x, y, level = position
+        here = self.tile(x, y, level)
+        if dz > 0 and here not in GOES_UP:
+            return "There are no stairs up here."
+        if dz < 0 and here not in GOES_DOWN:
+            return "There are no stairs down here."
+        x, y, level = x + dx, y + dy, level + dz
+        there = self.tile(x, y, level)
+        if there in BLOCKING:
+            return BLOCKING[there]
+        monsters = self.nearby(x, y, level, 0, MONSTER_KINDS)
+        if monsters:
+            return a_or_an(monsters[0].kind).capitalize() + " is in the way."
+        position[:] = [x, y, level]
+        self.visit(position)
+        return text
+
+    def search(self, position, player = None):
+        ''' look around a position; potions right there are picked up by
+            the player.  Returns what to tell the player.'''
+        x, y, level = position
+        lines = []
+        for thing in self.nearby(x, y, level, SEARCH_RADIUS):
+            if thing.kind == "Potion" and player is not None and \
+               thing.distance(x, y) == 0:
+                self.remove(thing)
+                player.potions.append(Potion.shared())
+                lines.append("You pick up a potion.")
+            else:
+                lines.append("You see " + a_or_an(thing.kind) + " " +
+                             self.direction_to(x, y, thing.x, thing.y) + ".")
+        here = self.tile(x, y, level)
+        if here != GROUND:
+            lines.append("There are " + TILE_NAMES[here] + " here.")
+        if not lines:
+            return "You find nothing in the nowhere-ness."
+        return "\n".join(lines)
+
+    def direction_to(self, x, y, toX, toY):
+        ''' "2 north, 1 east" or "right here" '''
+        parts = []
+        if toY != y:
+            parts.append(str(abs(toY - y)) + (" north" if toY > y else
+                                              " south"))
+        if toX != x:
+            parts.append(str(abs(toX - x)) + (" east" if toX > x else
+                                              " west"))
+        return ", ".join(parts) or "right here"
+
+    def __len__(self):
+        return len(self.chunks)
+
+if __name__ == "__main__":
+    from time import perf_counter
+    world = World(seed = 7)
+    position = [0, 0, 0]
+    print(world.search(position))
+    walker = Random(1)
+    start = perf_counter()
+    steps = 100000
+    for i in range(steps):
+        world.step(position, walker.choice(("north", "north", "east", "south",
+                                            "west", "up", "down")))
+    seconds = perf_counter() - start
+    print("{} steps in {:.2f} s, ended at {}".format(steps, seconds, position))
+    print(len(world), "chunks loaded,", world.misses, "made,", world.hits,
+          "hits")